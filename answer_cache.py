@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+HeyChat Answer Cache
+Disk-backed cache of chat answers for quick-ask.sh, keyed by the normalized
+transcript and the model, with TTL expiry and LRU eviction. Optionally, a
+question that is merely similar to a cached one (cosine similarity of
+hashed character trigrams, computed locally with NumPy, and the same
+numbers) also counts as a hit. Hit rate and the API time saved are kept
+across runs.
+
+Questions about the current time, date, weather or news get a short TTL,
+since their answers go stale in minutes.
+
+Usage:
+    python3 answer_cache.py ask "what is 5 miles in kilometers"   # prints the answer
+    python3 answer_cache.py ask --similarity 0.85 "convert 5 miles into kilometers"
+    python3 answer_cache.py stats
+    python3 answer_cache.py clear
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from conversation_store import CONFIG_DIR, read_setting
+from openai_client import OpenAIClient, OpenAIError, default_chat_model
+
+DEFAULT_PATH = CONFIG_DIR / 'answer_cache.json'
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAXSIZE = 500
+VOLATILE_TTL = 60
+VOLATILE_WORDS = re.compile(r"\b(time|today|tonight|tomorrow|yesterday|now|date|day|weather|"
+                            r"forecast|news|latest|current|currently)\b")
+VECTOR_SIZE = 4096
+_NUMBERS = re.compile(r"\d+")
+
+
+def normalize(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ' '.join(re.sub(r"[^\w\s]", ' ', text).split())
+
+
+def vectorize(text):
+    """Unit vector of hashed character trigrams (with word boundaries)"""
+    vector = np.zeros(VECTOR_SIZE, dtype=np.float32)
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode('utf-8')) % VECTOR_SIZE] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """TTL/LRU answer cache persisted as a JSON file"""
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE,
+                 similarity=None, clock=time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.similarity = similarity
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> entry dict, least recently used first
+        self._vectors = {}
+        self.stats = {"hits": 0, "similar_hits": 0, "misses": 0, "saved_seconds": 0.0}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            print(f"⚠️  Ignoring unreadable answer cache {self.path}", file=sys.stderr)
+            return
+        self.stats.update(data.get('stats', {}))
+        now = self._clock()
+        for entry in data.get('entries', []):
+            if entry['expires'] > now:
+                self._entries[entry['key']] = entry
+
+    def save(self):
+        """Write the cache atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({"stats": self.stats, "entries": list(self._entries.values())}, f)
+        os.replace(temp, self.path)
+
+    @staticmethod
+    def key(question, model):
+        return f"{model}|{normalize(question)}"
+
+    def _vector(self, entry):
+        vector = self._vectors.get(entry['key'])
+        if vector is None:
+            vector = self._vectors[entry['key']] = vectorize(entry['question'])
+        return vector
+
+    def _similar(self, question, model):
+        """Most similar live entry for the same model above the threshold, or None.
+
+        Only questions with the same numbers are compared: "5 miles" and
+        "6 miles" look alike to trigrams but need different answers.
+        """
+        numbers = _NUMBERS.findall(question)
+        candidates = [entry for entry in self._entries.values()
+                      if entry['model'] == model and _NUMBERS.findall(entry['question']) == numbers]
+        if not candidates:
+            return None
+        scores = np.stack([self._vector(entry) for entry in candidates]) @ vectorize(question)
+        best = int(np.argmax(scores))
+        return candidates[best] if scores[best] >= self.similarity else None
+
+    def get(self, question, model):
+        """Return the cached entry for a question, or None; counts the lookup"""
+        now = self._clock()
+        for key in [key for key, entry in self._entries.items() if entry['expires'] <= now]:
+            del self._entries[key]
+            self._vectors.pop(key, None)
+
+        entry = self._entries.get(self.key(question, model))
+        if entry is None and self.similarity:
+            entry = self._similar(normalize(question), model)
+            if entry:
+                self.stats['similar_hits'] += 1
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end(entry['key'])
+        entry['hits'] += 1
+        self.stats['hits'] += 1
+        self.stats['saved_seconds'] += entry['latency']
+        return entry
+
+    def put(self, question, model, answer, latency):
+        """Cache an answer and the API time it took, evicting the least recently used"""
+        normalized = normalize(question)
+        ttl = VOLATILE_TTL if VOLATILE_WORDS.search(normalized) else self.ttl
+        key = self.key(question, model)
+        now = self._clock()
+        self._entries[key] = {
+            "key": key, "model": model, "question": normalized, "answer": answer,
+            "created": now, "expires": now + ttl, "latency": round(latency, 3), "hits": 0
+        }
+        self._entries.move_to_end(key)
+        self._vectors.pop(key, None)
+        while len(self._entries) > self.maxsize:
+            evicted, _ = self._entries.popitem(last=False)
+            self._vectors.pop(evicted, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._vectors.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def summary(self):
+        """One-line hit rate and saved time"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        return (f"hit rate {rate:.0f}% ({self.stats['hits']}/{lookups}, "
+                f"{self.stats['similar_hits']} similar), {self.stats['saved_seconds']:.1f}s of API time saved, "
+                f"{len(self)} cached")
+
+
+def ask(cache, client, question, model):
+    """Answer from the cache, or ask the chat API and cache the answer"""
+    started = time.monotonic()
+    entry = cache.get(question, model)
+    if entry:
+        print(f"⚡ Cached answer (saved {entry['latency']:.2f}s) · {cache.summary()}", file=sys.stderr)
+        return entry['answer']
+
+    answer = client.chat([{"role": "user", "content": question}], model=model)
+    latency = time.monotonic() - started
+    cache.put(question, model, answer, latency)
+    print(f"🌐 Answered in {latency:.2f}s · {cache.summary()}", file=sys.stderr)
+    return answer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat answer cache for quick questions')
+    parser.add_argument('command', choices=['ask', 'stats', 'clear'])
+    parser.add_argument('question', nargs='?', help='Transcribed question (ask)')
+    parser.add_argument('--model', help='Chat model (default: CHATGPT_MODEL)')
+    parser.add_argument('--cache-file', default=read_setting('HEYCHAT_ANSWER_CACHE_FILE', str(DEFAULT_PATH)),
+                        help=f'Cache file (HEYCHAT_ANSWER_CACHE_FILE, default: {DEFAULT_PATH})')
+    parser.add_argument('--ttl', type=int, default=int(read_setting('HEYCHAT_ANSWER_CACHE_TTL', DEFAULT_TTL)),
+                        help=f'Seconds an answer stays cached (HEYCHAT_ANSWER_CACHE_TTL, default: {DEFAULT_TTL})')
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAXSIZE,
+                        help=f'Least recently used answers beyond this are dropped (default: {DEFAULT_MAXSIZE})')
+    parser.add_argument('--similarity', type=float,
+                        default=float(read_setting('HEYCHAT_ANSWER_CACHE_SIMILARITY', 0)) or None,
+                        help='Also reuse answers to questions at least this similar, 0-1 '
+                             '(HEYCHAT_ANSWER_CACHE_SIMILARITY, default: exact matches only)')
+
+    args = parser.parse_args()
+
+    cache = AnswerCache(args.cache_file, ttl=args.ttl, maxsize=args.max_entries, similarity=args.similarity)
+
+    if args.command == 'stats':
+        print(f"📊 Answer cache {cache.path}: {cache.summary()}")
+        return
+    if args.command == 'clear':
+        cache.clear()
+        cache.save()
+        print(f"🧹 Answer cache cleared ({cache.path})")
+        return
+
+    if not args.question:
+        parser.error("ask needs a question")
+    client = OpenAIClient()
+    try:
+        answer = ask(cache, client, args.question, args.model or default_chat_model())
+    except (OpenAIError, OSError) as e:
+        print(f"❌ Chat request failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        cache.save()
+    print(answer)
+
+
+if __name__ == "__main__":
+    main()
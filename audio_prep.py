@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+HeyChat Audio Upload Preparation
+Shrinks recordings before they are sent to /v1/audio/transcriptions: trims
+leading and trailing silence, downsamples to 16 kHz mono (all Whisper uses)
+and encodes to FLAC or Opus with sox or ffmpeg. Falls back to WAV
+when no encoder is installed.
+
+Usage:
+    python3 audio_prep.py recording.wav                     # stats only
+    python3 audio_prep.py recording.wav --output /tmp/upload   # writes /tmp/upload.flac, prints the path
+    python3 audio_prep.py recording.wav --codec opus --output /tmp/upload
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from audio_stream import SAMPLE_RATE, read_wav, wav_bytes
+
+CODECS = ('flac', 'opus', 'wav')
+DEFAULT_CODEC = 'flac'
+# Silence trimming: frames this far above the recording's noise floor (and
+# within TRIM_RANGE_DB of its loudest frame) are kept...
+TRIM_FRAME_MS = 20
+TRIM_MARGIN_DB = 12.0
+TRIM_RANGE_DB = 20.0
+TRIM_MIN_DB = -50.0
+# ...plus this much audio on either side, so word onsets and tails survive
+TRIM_PAD_MS = 150
+OPUS_BITRATE = '24k'
+
+_RAW_INPUT = ['-t', 'raw', '-r', '{rate}', '-e', 'signed-integer', '-b', '16', '-c', '1', '-']
+_FFMPEG_INPUT = ['ffmpeg', '-loglevel', 'error', '-f', 's16le', '-ar', '{rate}', '-ac', '1', '-i', '-']
+
+# (file extension, content type, encoder commands reading raw mono PCM on stdin, tried in order)
+FORMATS = {
+    'flac': ('flac', 'audio/flac', [
+        ['sox', '-q', *_RAW_INPUT, '-t', 'flac', '-'],
+        [*_FFMPEG_INPUT, '-c:a', 'flac', '-f', 'flac', '-']
+    ]),
+    'opus': ('ogg', 'audio/ogg', [
+        [*_FFMPEG_INPUT, '-c:a', 'libopus', '-b:a', OPUS_BITRATE, '-application', 'voip', '-f', 'ogg', '-']
+    ]),
+    'wav': ('wav', 'audio/wav', [])
+}
+
+_warned = set()
+
+
+class PreparedAudio:
+    """Encoded upload plus what it cost and saved"""
+
+    def __init__(self, data, codec, original_bytes, duration, seconds):
+        self.data = data
+        self.codec = codec
+        self.extension, self.content_type, _ = FORMATS[codec]
+        self.original_bytes = original_bytes
+        self.duration = duration
+        self.seconds = seconds
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - len(self.data)
+
+    def filename(self, stem='audio'):
+        return f"{stem}.{self.extension}"
+
+    def describe(self):
+        saved = self.bytes_saved / self.original_bytes * 100 if self.original_bytes else 0
+        return (f"{self.original_bytes:,} → {len(self.data):,} bytes ({saved:.0f}% saved, "
+                f"{self.codec}, {self.duration:.1f}s audio) in {self.seconds * 1000:.0f} ms")
+
+
+def trim_silence(samples, rate):
+    """Drop leading and trailing silence, keeping ``TRIM_PAD_MS`` around the speech.
+
+    Returns the samples unchanged if nothing rises above the noise floor.
+    """
+    step = rate * TRIM_FRAME_MS // 1000
+    count = len(samples) // step
+    if count < 2:
+        return samples
+    frames = samples[:count * step].astype(np.float32).reshape(count, step) / 32768.0
+    levels = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    # The percentile is the noise floor only if there is some silence; the
+    # range cap keeps a recording that is all speech intact
+    threshold = max(min(np.percentile(levels, 10) + TRIM_MARGIN_DB, levels.max() - TRIM_RANGE_DB),
+                    TRIM_MIN_DB)
+    loud = np.flatnonzero(levels > threshold)
+    if not len(loud):
+        return samples
+    pad = rate * TRIM_PAD_MS // 1000
+    return samples[max(0, loud[0] * step - pad):min(len(samples), (loud[-1] + 1) * step + pad)]
+
+
+def resample(samples, rate, target=SAMPLE_RATE):
+    """Band-limited downsampling of int16 samples (FFT, whole clip at once).
+
+    Returns the samples and their new rate; audio at or below ``target`` is
+    left alone, since upsampling only makes the upload bigger.
+    """
+    if rate <= target or not len(samples):
+        return samples, rate
+    length = max(1, round(len(samples) * target / rate))
+    spectrum = np.fft.rfft(samples.astype(np.float64))
+    resampled = np.fft.irfft(spectrum, length) * (length / len(samples))
+    return np.clip(np.round(resampled), -32768, 32767).astype(np.int16), target
+
+
+def encode(samples, rate=SAMPLE_RATE, codec=DEFAULT_CODEC):
+    """Encode mono int16 samples; returns (data, codec actually used)"""
+    pcm = np.asarray(samples, dtype='<i2').tobytes()
+    for template in FORMATS[codec][2]:
+        command = [arg.format(rate=rate) for arg in template]
+        if not shutil.which(command[0]):
+            continue
+        try:
+            result = subprocess.run(command, input=pcm, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            continue
+        if result.stdout:
+            return result.stdout, codec
+
+    if codec != 'wav' and codec not in _warned:
+        _warned.add(codec)
+        tools = ' or '.join(command[0] for command in FORMATS[codec][2])
+        print(f"⚠️  No working {codec} encoder ({tools}), uploading WAV", file=sys.stderr)
+    return wav_bytes(samples, rate), 'wav'
+
+
+def prepare(samples, rate, codec=DEFAULT_CODEC, trim=True, original_bytes=None):
+    """Trim, downsample and encode mono int16 samples for upload.
+
+    ``original_bytes`` is the size of what would have been uploaded
+    otherwise (default: a WAV of the input at its own rate).
+    """
+    started = time.perf_counter()
+    if original_bytes is None:
+        original_bytes = 44 + len(samples) * 2
+    if trim:
+        samples = trim_silence(samples, rate)
+    samples, rate = resample(samples, rate)
+    data, used = encode(samples, rate, codec)
+    return PreparedAudio(data, used, original_bytes, len(samples) / rate,
+                         time.perf_counter() - started)
+
+
+def prepare_file(path, codec=DEFAULT_CODEC, trim=True):
+    """Prepare a WAV recording for upload"""
+    samples, rate = read_wav(path)
+    return prepare(samples, rate, codec, trim, original_bytes=Path(path).stat().st_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat audio upload preparation')
+    parser.add_argument('wav', help='WAV recording')
+    parser.add_argument('--codec', choices=CODECS, default=DEFAULT_CODEC,
+                        help=f'Upload codec (default: {DEFAULT_CODEC})')
+    parser.add_argument('--output', help='Write the upload here (extension set by the codec) and print its path')
+    parser.add_argument('--no-trim', action='store_true', help='Keep leading and trailing silence')
+
+    args = parser.parse_args()
+
+    try:
+        prepared = prepare_file(args.wav, args.codec, trim=not args.no_trim)
+    except (OSError, ValueError, EOFError, wave.Error) as e:
+        print(f"❌ Could not prepare {args.wav}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"📦 Upload: {prepared.describe()}", file=sys.stderr)
+    if args.output:
+        output = Path(args.output).with_suffix('.' + prepared.extension)
+        output.write_bytes(prepared.data)
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
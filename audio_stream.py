@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+HeyChat Audio Streaming
+Capture audio as a stream of short frames (microphone via sox 'rec', or a WAV
+file replayed in real time) and cut it into segments at pauses while the user
+is still speaking, so each segment can be transcribed as soon as it ends.
+"""
+
+import io
+import subprocess
+import time
+import wave
+from collections import deque
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+# Frame RMS above this fraction of full scale counts as speech (rec's 1%)
+SPEECH_THRESHOLD = 0.01
+# A pause this long inside speech ends a segment...
+PAUSE_MS = 300
+# ...once the segment is at least this long (Whisper does badly on tiny clips)
+MIN_SEGMENT_MS = 1500
+# This much trailing silence ends the utterance
+END_SILENCE_MS = 4000
+MAX_UTTERANCE_MS = 30000
+# Audio kept from before the detected start of speech, so onsets aren't clipped
+PRE_ROLL_MS = 150
+
+
+def read_wav(path):
+    """Read a PCM WAV file as mono int16 samples and its sample rate"""
+    with wave.open(str(path), 'rb') as f:
+        rate = f.getframerate()
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        data = f.readframes(f.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(data, dtype='<i2')
+    elif width == 1:
+        samples = ((np.frombuffer(data, dtype=np.uint8).astype(np.int16) - 128) << 8)
+    elif width == 4:
+        samples = (np.frombuffer(data, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+def wav_bytes(samples, rate=SAMPLE_RATE):
+    """Encode mono int16 samples as an in-memory WAV file"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
+
+
+def frame_rms(frame):
+    """RMS of an int16 frame as a fraction of full scale"""
+    if not len(frame):
+        return 0.0
+    x = frame.astype(np.float32) / 32768.0
+    return float(np.sqrt(np.mean(x * x)))
+
+
+class MicStream:
+    """Microphone frames from sox 'rec' (16 kHz mono int16), one process per utterance"""
+
+    def __init__(self, rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.rate = rate
+        self.frame_ms = frame_ms
+
+    def frames(self):
+        frame_bytes = self.rate * self.frame_ms // 1000 * 2
+        process = subprocess.Popen(
+            ['rec', '-q', '-t', 'raw', '-r', str(self.rate), '-c', '1', '-b', '16',
+             '-e', 'signed-integer', '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                data = process.stdout.read(frame_bytes)
+                if not data:
+                    return
+                yield np.frombuffer(data, dtype='<i2')
+        finally:
+            process.terminate()
+            process.wait()
+
+    def exhausted(self):
+        return False
+
+
+class WavStream:
+    """Replay WAV files as microphone frames, one file per utterance.
+
+    With ``realtime`` the frames are paced at the speed they were recorded,
+    so capture/transcription overlap behaves as it would live.
+    """
+
+    def __init__(self, paths, frame_ms=FRAME_MS, realtime=True):
+        self._paths = list(paths)
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self.rate = SAMPLE_RATE
+
+    def frames(self):
+        if not self._paths:
+            return
+        samples, self.rate = read_wav(self._paths.pop(0))
+        step = self.rate * self.frame_ms // 1000
+        started = time.monotonic()
+        for n, offset in enumerate(range(0, len(samples), step)):
+            if self.realtime:
+                delay = started + n * self.frame_ms / 1000 - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield samples[offset:offset + step]
+
+    def exhausted(self):
+        return not self._paths
+
+
+class EnergyDetector:
+    """Fixed-threshold speech detector: frame RMS above ``threshold``"""
+
+    def __init__(self, threshold=SPEECH_THRESHOLD):
+        self.threshold = threshold
+
+    def is_speech(self, frame):
+        return frame_rms(frame) > self.threshold
+
+
+class PauseSegmenter:
+    """Cut a frame stream into speech segments at pauses.
+
+    ``segments(frames)`` yields ``(samples, is_final)`` tuples: a segment is
+    emitted as soon as a pause of ``pause_ms`` follows at least
+    ``min_segment_ms`` of audio, and the final one when ``end_silence_ms`` of
+    silence (or the end of the stream) closes the utterance. Leading silence
+    is skipped (apart from ``pre_roll_ms``). Pass ``min_segment_ms=None`` to
+    keep the whole utterance as one segment.
+
+    After each utterance, ``speech_ended_at`` is the time.monotonic() of the
+    last speech frame and ``timing`` holds endpoint timing in audio time
+    (milliseconds from the start of the stream): speech_start_ms,
+    speech_end_ms, endpoint_ms and endpoint_delay_ms.
+    """
+
+    def __init__(self, detector=None, frame_ms=FRAME_MS, pause_ms=PAUSE_MS,
+                 min_segment_ms=MIN_SEGMENT_MS, end_silence_ms=END_SILENCE_MS,
+                 max_utterance_ms=MAX_UTTERANCE_MS, pre_roll_ms=PRE_ROLL_MS):
+        self.detector = detector or EnergyDetector()
+        self.frame_ms = frame_ms
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.min_segment_frames = (max(1, min_segment_ms // frame_ms)
+                                   if min_segment_ms is not None else None)
+        self.end_silence_ms = end_silence_ms
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.max_frames = max(1, max_utterance_ms // frame_ms)
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.speech_ended_at = None
+        self.timing = None
+
+    def segments(self, frames):
+        frames = iter(frames)
+        segment = []
+        segment_has_speech = False
+        silent_run = 0
+        heard_speech = False
+        total = 0
+        index = -1
+        first_speech = last_speech = None
+        pre_roll = deque(maxlen=self.pre_roll_frames or 1)
+        self.speech_ended_at = None
+        self.timing = None
+        reset = getattr(self.detector, 'reset', None)
+        if reset:
+            reset()
+
+        try:
+            for index, frame in enumerate(frames):
+                speech = self.detector.is_speech(frame)
+                if not heard_speech:
+                    if not speech:
+                        if self.pre_roll_frames:
+                            pre_roll.append(frame)
+                        continue
+                    heard_speech = True
+                    first_speech = index
+                    if self.pre_roll_frames:
+                        segment.extend(pre_roll)
+
+                segment.append(frame)
+                total += 1
+                if speech:
+                    segment_has_speech = True
+                    silent_run = 0
+                    last_speech = index
+                    self.speech_ended_at = time.monotonic()
+                else:
+                    silent_run += 1
+
+                if silent_run >= self.end_frames or total >= self.max_frames:
+                    break
+                if (self.min_segment_frames is not None and silent_run == self.pause_frames
+                        and len(segment) >= self.min_segment_frames):
+                    # Cut in the middle of the pause, carrying the rest into the next segment
+                    keep = self.pause_frames // 2
+                    yield np.concatenate(segment[:len(segment) - keep]), False
+                    segment = segment[len(segment) - keep:]
+                    segment_has_speech = False
+        finally:
+            # Stop the recorder as soon as the utterance is over
+            close = getattr(frames, 'close', None)
+            if close:
+                close()
+
+        if not heard_speech:
+            return
+        speech_end_ms = (last_speech + 1) * self.frame_ms
+        endpoint_ms = (index + 1) * self.frame_ms
+        self.timing = {
+            "speech_start_ms": first_speech * self.frame_ms,
+            "speech_end_ms": speech_end_ms,
+            "endpoint_ms": endpoint_ms,
+            "endpoint_delay_ms": endpoint_ms - speech_end_ms
+        }
+        # Trailing silence carries no words; keep a short tail only
+        tail = max(0, silent_run - self.pause_frames // 2)
+        if tail:
+            segment = segment[:max(0, len(segment) - tail)]
+        yield (np.concatenate(segment) if segment_has_speech and segment else None), True
@@ -10,11 +10,16 @@ import os
 from datetime import datetime
 import readline
 
+from conversation_store import get_store
+
 class InteractiveBrowser:
-    def __init__(self):
+    def __init__(self, store=None):
         self.db_name = "heychat"
+        self.store = store or get_store()
         self.current_page = 0
         self.page_size = 5
+        self.page_cursors = [None]  # Keyset cursor for the start of each visited page
+        self.next_cursor = None
         
     def clear_screen(self):
         """Clear the terminal screen"""
@@ -51,79 +56,45 @@ class InteractiveBrowser:
         print()
     
     def list_conversations(self, limit=None):
-        """List conversations with pagination"""
+        """List conversations starting from the first page"""
         if limit:
+            if not str(limit).isdigit() or int(limit) < 1:
+                print("❌ Usage: list [n] (n must be a positive number)")
+                return
             self.page_size = int(limit)
         
+        self.current_page = 0
+        self.page_cursors = [None]
+        self.show_page()
+    
+    def show_page(self):
+        """Show the current page of conversations using keyset pagination"""
         print(f"📋 Conversations (Page {self.current_page + 1})")
         print("-" * 50)
         
-        # In a real implementation, this would query Supabase with pagination
-        # For now, show placeholder data
-        conversations = [
-            {
-                "id": "conv_001",
-                "session_id": "session_20251007120000_abc123",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 12:00:00",
-                "message_count": 8,
-                "duration": "00:05:23",
-                "last_message": "Can you help me with a coding problem?"
-            },
-            {
-                "id": "conv_002", 
-                "session_id": "session_20251007130000_def456",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 13:00:00",
-                "message_count": 12,
-                "duration": "00:08:45",
-                "last_message": "Thank you for your help!"
-            },
-            {
-                "id": "conv_003",
-                "session_id": "session_20251007140000_ghi789",
-                "title": "Voice Conversation", 
-                "created_at": "2025-01-15 14:00:00",
-                "message_count": 6,
-                "duration": "00:03:12",
-                "last_message": "What's the weather like today?"
-            },
-            {
-                "id": "conv_004",
-                "session_id": "session_20251007150000_jkl012",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 15:00:00", 
-                "message_count": 15,
-                "duration": "00:12:30",
-                "last_message": "Can you explain machine learning?"
-            },
-            {
-                "id": "conv_005",
-                "session_id": "session_20251007160000_mno345",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 16:00:00",
-                "message_count": 4,
-                "duration": "00:02:15",
-                "last_message": "Goodbye!"
-            }
-        ]
-        
-        start_idx = self.current_page * self.page_size
-        end_idx = start_idx + self.page_size
-        page_conversations = conversations[start_idx:end_idx]
+        page = self.store.list_conversations_page(
+            limit=self.page_size,
+            cursor=self.page_cursors[self.current_page]
+        )
+        page_conversations = page['conversations']
+        self.next_cursor = page['next_cursor']
         
         if not page_conversations:
             print("No more conversations to show.")
             return
         
+        start_idx = self.current_page * self.page_size
         for i, conv in enumerate(page_conversations, start_idx + 1):
             print(f"{i:2d}. {conv['session_id']}")
-            print(f"    📅 {conv['created_at']}")
+            print(f"    📅 {conv['created_at'].replace('T', ' ')}")
             print(f"    💬 {conv['message_count']} messages | ⏱️  {conv['duration']}")
-            print(f"    💭 {conv['last_message'][:60]}{'...' if len(conv['last_message']) > 60 else ''}")
+            preview = conv['last_message_preview']
+            if preview:
+                print(f"    💭 {preview[:60]}{'...' if len(preview) > 60 else ''}")
             print()
         
-        print(f"Showing {len(page_conversations)} of {len(conversations)} conversations")
+        print(f"Showing {start_idx + 1}-{start_idx + len(page_conversations)}"
+              f"{' (more available)' if self.next_cursor else ''}")
         print("Use 'next' or 'prev' to navigate pages")
         print()
     
@@ -132,40 +103,11 @@ class InteractiveBrowser:
         print(f"🗣️  Conversation: {session_id}")
         print("=" * 60)
         
-        # In a real implementation, this would query Supabase
-        # For now, show placeholder conversation
-        messages = [
-            {
-                "timestamp_str": "20251007120000",
-                "role": "user",
-                "content": "Hello, how are you today?"
-            },
-            {
-                "timestamp_str": "20251007120005",
-                "role": "assistant", 
-                "content": "I'm doing well, thank you for asking! How can I help you today?"
-            },
-            {
-                "timestamp_str": "20251007120015",
-                "role": "user",
-                "content": "Can you help me with a coding problem?"
-            },
-            {
-                "timestamp_str": "20251007120020",
-                "role": "assistant",
-                "content": "Of course! I'd be happy to help you with a coding problem. What programming language are you working with and what specific issue are you facing?"
-            },
-            {
-                "timestamp_str": "20251007120030",
-                "role": "user",
-                "content": "I'm working with Python and I'm having trouble with list comprehensions."
-            },
-            {
-                "timestamp_str": "20251007120035",
-                "role": "assistant",
-                "content": "List comprehensions are a powerful feature in Python! They provide a concise way to create lists. The basic syntax is: [expression for item in iterable if condition]. Would you like me to show you some examples?"
-            }
-        ]
+        conversation = self.store.get_conversation(session_id)
+        messages = conversation['messages'] if conversation else []
+        if conversation is None:
+            print("❌ Conversation not found")
+            print()
         
         for msg in messages:
             timestamp = self.format_timestamp(msg['timestamp_str'])
@@ -184,25 +126,13 @@ class InteractiveBrowser:
         print(f"🔍 Search Results for: '{search_term}'")
         print("-" * 50)
         
-        # In a real implementation, this would query Supabase
-        # For now, show placeholder results
-        results = [
-            {
-                "session_id": "session_20251007120000_abc123",
-                "timestamp": "2025-01-15 12:00:00",
-                "preview": "Hello, how are you today? I'm doing well, thank you for asking!",
-                "match_count": 2
-            },
-            {
-                "session_id": "session_20251007130000_def456", 
-                "timestamp": "2025-01-15 13:00:00",
-                "preview": "Can you help me with a coding problem? Of course! I'd be happy to help...",
-                "match_count": 1
-            }
-        ]
+        results = self.store.search_conversations(search_term)
+        if not results:
+            print("No matching conversations.")
+            print()
         
         for result in results:
-            print(f"📅 {result['timestamp']}")
+            print(f"📅 {result['created_at'].replace('T', ' ')}")
             print(f"🆔 {result['session_id']}")
             print(f"💬 {result['preview']}")
             print(f"🎯 {result['match_count']} matches")
@@ -216,24 +146,14 @@ class InteractiveBrowser:
         print("📊 HeyChat Statistics")
         print("-" * 30)
         
-        # In a real implementation, this would query Supabase
-        stats = {
-            "total_conversations": 15,
-            "total_messages": 127,
-            "total_duration": "02:15:30",
-            "avg_messages_per_conversation": 8.5,
-            "most_active_day": "2025-01-15",
-            "longest_conversation": "00:12:45",
-            "most_common_words": ["help", "python", "code", "problem", "thank"]
-        }
+        stats = self.store.get_stats()
         
         print(f"📈 Total Conversations: {stats['total_conversations']}")
         print(f"💬 Total Messages: {stats['total_messages']}")
         print(f"⏱️  Total Duration: {stats['total_duration']}")
         print(f"📊 Avg Messages/Conversation: {stats['avg_messages_per_conversation']}")
-        print(f"📅 Most Active Day: {stats['most_active_day']}")
+        print(f"📅 Most Active Day: {stats['most_active_day'] or 'N/A'}")
         print(f"🏆 Longest Conversation: {stats['longest_conversation']}")
-        print(f"🔤 Most Common Words: {', '.join(stats['most_common_words'])}")
         print()
         
         print("Press Enter to continue...")
@@ -243,43 +163,36 @@ class InteractiveBrowser:
         """Export conversation to file"""
         print(f"📤 Exporting conversation: {session_id}")
         
-        # In a real implementation, this would query Supabase and export
-        export_data = {
-            "session_id": session_id,
-            "exported_at": datetime.now().isoformat(),
-            "messages": [
-                {
-                    "timestamp": "2025-01-15T12:00:00",
-                    "role": "user",
-                    "content": "Hello, how are you today?"
-                },
-                {
-                    "timestamp": "2025-01-15T12:00:05", 
-                    "role": "assistant",
-                    "content": "I'm doing well, thank you for asking!"
-                }
-            ]
-        }
-        
-        filename = f"conversation_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        with open(filename, 'w') as f:
-            json.dump(export_data, f, indent=2)
-        
-        print(f"✅ Exported to: {filename}")
+        chunks = self.store.export_stream(session_id, 'json')
+        if chunks is None:
+            print("❌ Conversation not found")
+        else:
+            filename = f"conversation_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            
+            with open(filename, 'w') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            
+            print(f"✅ Exported to: {filename}")
         print("Press Enter to continue...")
         input()
     
     def next_page(self):
         """Go to next page"""
+        if not self.next_cursor:
+            print("Already on last page.")
+            print()
+            return
         self.current_page += 1
-        self.list_conversations()
+        del self.page_cursors[self.current_page:]
+        self.page_cursors.append(self.next_cursor)
+        self.show_page()
     
     def prev_page(self):
         """Go to previous page"""
         if self.current_page > 0:
             self.current_page -= 1
-            self.list_conversations()
+            self.show_page()
         else:
             print("Already on first page.")
             print()
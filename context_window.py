@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+HeyChat Context Window
+Keeps the messages sent to /v1/chat/completions under a token budget.
+
+Token counts are computed once per message when it is added and kept as a
+running total, so a turn never re-tokenizes the whole history. When the
+unsummarized history grows past the budget, the oldest turns are folded
+into a running summary (or simply dropped when no summarizer is given) and
+the summary is sent as a system message ahead of the recent turns.
+
+Uses tiktoken for exact counts when installed, otherwise a ~4 characters
+per token estimate.
+"""
+
+import re
+
+DEFAULT_BUDGET = 3000
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+# Compact when the recent history exceeds the budget, down to this fraction of
+# it, so summarization runs every few turns rather than on every turn
+COMPACT_TO = 0.6
+# Always keep at least this many of the latest messages verbatim
+KEEP_RECENT = 4
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a voice conversation between a user and an assistant. "
+    "Update the summary with the new turns below. Keep names, facts, decisions and open "
+    "questions; drop small talk. Reply with the summary only, under 150 words."
+)
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_tokens(text):
+    """Rough token count: about 4 characters per token, at least one per word"""
+    return max(len(text) // 4, len(_WORDS.findall(text)) * 3 // 4) + 1
+
+
+def token_counter(model=None):
+    """Return a text -> token count function, exact with tiktoken if installed"""
+    try:
+        import tiktoken
+    except ImportError:
+        return approximate_tokens
+    try:
+        encoding = tiktoken.encoding_for_model(model or 'gpt-4o-mini')
+    except KeyError:
+        encoding = tiktoken.get_encoding('cl100k_base')
+    return lambda text: len(encoding.encode(text))
+
+
+class ContextWindow:
+    """Token-budgeted view of a session's history.
+
+    ``history`` is the session's full role/content list (owned by the
+    journal); this class only tracks per-message counts and the summary,
+    which covers ``history[:summary['covers']]``.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, counter=None, keep_recent=KEEP_RECENT):
+        self.budget = budget
+        self.count = counter or approximate_tokens
+        self.keep_recent = keep_recent
+        self.summary = None
+        self.sent_tokens = 0
+        self._counts = []
+        self._recent_tokens = 0
+
+    def reset(self, summary=None):
+        """Forget cached counts (new session or cleared history)"""
+        self.summary = summary
+        self._counts = []
+        self._recent_tokens = 0
+
+    @property
+    def start(self):
+        """Index of the first message not covered by the summary"""
+        return self.summary['covers'] if self.summary else 0
+
+    def sync(self, history):
+        """Count tokens for messages added since the last call"""
+        if len(history) < len(self._counts) or self.start > len(history):
+            self.reset()
+        for i in range(len(self._counts), len(history)):
+            tokens = self.count(history[i]['content']) + MESSAGE_OVERHEAD
+            self._counts.append(tokens)
+            if i >= self.start:
+                self._recent_tokens += tokens
+
+    def summary_message(self):
+        if not self.summary or not self.summary['text']:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation: {self.summary['text']}"}
+
+    def messages(self, history):
+        """Messages to send: the summary plus as many recent turns as fit the budget.
+
+        Sets ``sent_tokens`` to the estimated size of the result.
+        """
+        self.sync(history)
+        summary = self.summary_message()
+        used = self.summary['tokens'] if summary else 0
+        first = len(history)
+        while first > self.start:
+            tokens = self._counts[first - 1]
+            if used + tokens > self.budget and first < len(history):
+                break
+            used += tokens
+            first -= 1
+        selected = history[first:]
+        self.sent_tokens = used
+        return ([summary] if summary else []) + selected
+
+    def tokens(self, history):
+        """Estimated prompt tokens for the current window"""
+        self.sync(history)
+        return (self.summary['tokens'] if self.summary else 0) + self._recent_tokens
+
+    def needs_compaction(self, history):
+        self.sync(history)
+        return self.tokens(history) > self.budget and len(history) - self.start > self.keep_recent
+
+    def compact(self, history, summarize=None):
+        """Fold the oldest turns into the summary until the window is under the target.
+
+        ``summarize(previous_summary_text, messages)`` returns the new summary
+        text; without it the old turns are just dropped. Returns the new
+        summary dict, or None if nothing needed compacting.
+        """
+        if not self.needs_compaction(history):
+            return None
+
+        target = int(self.budget * COMPACT_TO)
+        cut = self.start
+        remaining = self._recent_tokens
+        last_allowed = len(history) - self.keep_recent
+        while cut < last_allowed and remaining > target:
+            remaining -= self._counts[cut]
+            cut += 1
+        # Don't split a user question from its answer
+        while cut < last_allowed and history[cut]['role'] != 'user':
+            remaining -= self._counts[cut]
+            cut += 1
+        if cut == self.start:
+            return None
+
+        previous = self.summary['text'] if self.summary else ''
+        dropped = history[self.start:cut]
+        text = summarize(previous, dropped) if summarize else previous
+        self.summary = {
+            "text": text,
+            "covers": cut,
+            "tokens": (self.count(text) + MESSAGE_OVERHEAD) if text else 0
+        }
+        self._recent_tokens = remaining
+        return self.summary
+
+
+def summary_request(previous, messages):
+    """Chat messages asking the model to fold ``messages`` into ``previous``"""
+    turns = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    content = f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{turns}"
+    return [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": content}
+    ]
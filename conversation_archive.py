@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+HeyChat Conversation Archive
+Bulk export and import of the whole conversation store for backup and analytics.
+
+Archives are either gzip-compressed newline-delimited JSON (``.ndjson.gz``)
+or a Parquet file (``.parquet``, requires pyarrow). Both are written from a
+single streaming cursor and read back in batches, so memory use is bounded
+by the batch size rather than the size of the store. Fusion records of the
+exported conversations travel with them (by session_id), so fused sessions
+still resolve after a restore.
+"""
+
+import gzip
+import io
+import json
+import time
+import zlib
+from contextlib import closing
+from datetime import datetime
+
+from conversation_store import StoreError, to_iso, to_number
+
+ARCHIVE_VERSION = 2
+ARCHIVE_FORMATS = ('ndjson', 'parquet')
+ACTIVITY_FILTERS = ('all', 'active', 'inactive')
+DEFAULT_BATCH_SIZE = 2000
+# Fast gzip level: keeps export close to disk speed at a modest size cost
+COMPRESS_LEVEL = 3
+
+# Flat row layout shared by both formats: one row per message, carrying its
+# conversation's fields (conversations without messages get one row with
+# empty message fields)
+CONVERSATION_FIELDS = (
+    'session_id', 'title', 'conversation_created_at', 'conversation_updated_at',
+    'is_active', 'conversation_metadata'
+)
+MESSAGE_FIELDS = (
+    'timestamp_str', 'role', 'content', 'audio_file_path', 'confidence',
+    'message_created_at', 'message_metadata'
+)
+# Parquet archives carry the fusion records as JSON in the file metadata
+PARQUET_FUSIONS_KEY = b'heychat.fusions'
+
+
+def _json_text(value):
+    """Metadata as JSON text (PostgreSQL returns JSONB already decoded)"""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _json_value(value):
+    """Metadata as a decoded JSON value where possible"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _archive_filter(backend, since, until, activity):
+    """WHERE clause and parameters selecting the archived conversations (alias ``c``)"""
+    if activity not in ACTIVITY_FILTERS:
+        raise ValueError(f"Unknown activity filter: {activity}")
+
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f"c.created_at >= {backend.ts}")
+        params.append(backend.timestamp(_parse_datetime(since)))
+    if until is not None:
+        conditions.append(f"c.created_at < {backend.ts}")
+        params.append(backend.timestamp(_parse_datetime(until)))
+    if activity != 'all':
+        conditions.append("c.is_active = TRUE" if activity == 'active' else "c.is_active = FALSE")
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def iter_archive_rows(store, since=None, until=None, activity='all', batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches of flat archive rows, conversations in id order and messages in order.
+
+    ``since``/``until`` bound conversation creation time; ``activity`` is
+    'all', 'active' or 'inactive'.
+    """
+    backend = store.backend
+    where, params = _archive_filter(backend, since, until, activity)
+
+    query = backend.sql(f"""
+        SELECT c.session_id, c.title,
+               c.created_at AS conversation_created_at,
+               c.updated_at AS conversation_updated_at,
+               c.is_active, c.metadata AS conversation_metadata,
+               m.id AS message_id, m.timestamp_str, m.role, m.content, m.audio_file_path,
+               m.transcription_confidence AS confidence,
+               m.created_at AS message_created_at, m.metadata AS message_metadata
+        FROM conversations c
+        LEFT JOIN messages m ON m.conversation_id = c.id
+        {where}
+        ORDER BY c.id ASC, m.seq ASC
+    """)
+
+    with backend.pool.connection() as conn:
+        for rows in backend.stream(conn, query, params, batch_size):
+            yield [
+                {
+                    "session_id": row['session_id'],
+                    "title": row['title'],
+                    "conversation_created_at": to_iso(row['conversation_created_at']),
+                    "conversation_updated_at": to_iso(row['conversation_updated_at']),
+                    "is_active": bool(row['is_active']),
+                    "conversation_metadata": _json_text(row['conversation_metadata']),
+                    "has_message": row['message_id'] is not None,
+                    "timestamp_str": row['timestamp_str'],
+                    "role": row['role'],
+                    "content": row['content'],
+                    "audio_file_path": row['audio_file_path'],
+                    "confidence": to_number(row['confidence']),
+                    "message_created_at": to_iso(row['message_created_at']),
+                    "message_metadata": _json_text(row['message_metadata'])
+                }
+                for row in rows
+            ]
+
+
+def archive_fusions(store, since=None, until=None, activity='all'):
+    """Fusion records whose source conversation is archived, oldest first, keyed by session_id"""
+    backend = store.backend
+    where, params = _archive_filter(backend, since, until, activity)
+    with backend.pool.connection() as conn:
+        rows = conn.execute(backend.sql(f"""
+            SELECT c.session_id AS source_session_id,
+                   t.session_id AS target_session_id,
+                   s.session_id AS surviving_session_id,
+                   f.fused_at, f.fusion_reason, f.metadata
+            FROM conversation_fusions f
+            JOIN conversations c ON c.id = f.source_conversation_id
+            LEFT JOIN conversations t ON t.id = f.target_conversation_id
+            LEFT JOIN conversations s ON s.id = f.surviving_conversation_id
+            {where}
+            ORDER BY f.id ASC
+        """), params).fetchall()
+    return [
+        {
+            "source_session_id": row['source_session_id'],
+            "target_session_id": row['target_session_id'],
+            "surviving_session_id": row['surviving_session_id'],
+            "fused_at": to_iso(row['fused_at']),
+            "reason": row['fusion_reason'],
+            "metadata": _json_value(row['metadata'])
+        }
+        for row in rows
+    ]
+
+
+def iter_ndjson(store, since=None, until=None, activity='all', batch_size=DEFAULT_BATCH_SIZE, stats=None):
+    """Yield the archive as NDJSON text chunks: a header, conversation and message
+    records, then fusion records.
+
+    If ``stats`` is given, its "conversations", "messages" and "fusions" counters are updated.
+    """
+    if stats is None:
+        stats = {"conversations": 0, "messages": 0, "fusions": 0}
+    yield json.dumps({
+        "type": "archive",
+        "version": ARCHIVE_VERSION,
+        "exported_at": datetime.now().isoformat(),
+        "filters": {
+            "since": to_iso(since),
+            "until": to_iso(until),
+            "activity": activity
+        }
+    }) + "\n"
+
+    current_session = None
+    for batch in iter_archive_rows(store, since, until, activity, batch_size):
+        lines = []
+        for row in batch:
+            if row['session_id'] != current_session:
+                current_session = row['session_id']
+                stats['conversations'] += 1
+                lines.append(json.dumps({
+                    "type": "conversation",
+                    "session_id": row['session_id'],
+                    "title": row['title'],
+                    "created_at": row['conversation_created_at'],
+                    "updated_at": row['conversation_updated_at'],
+                    "is_active": row['is_active'],
+                    "metadata": _json_value(row['conversation_metadata'])
+                }))
+            if row['has_message']:
+                stats['messages'] += 1
+                lines.append(json.dumps({
+                    "type": "message",
+                    "session_id": row['session_id'],
+                    "timestamp_str": row['timestamp_str'],
+                    "role": row['role'],
+                    "content": row['content'],
+                    "audio_file_path": row['audio_file_path'],
+                    "confidence": row['confidence'],
+                    "created_at": row['message_created_at'],
+                    "metadata": _json_value(row['message_metadata'])
+                }))
+        yield "\n".join(lines) + "\n"
+
+    fusions = archive_fusions(store, since, until, activity)
+    stats['fusions'] = stats.get('fusions', 0) + len(fusions)
+    if fusions:
+        yield "\n".join(json.dumps({"type": "fusion", **fusion}) for fusion in fusions) + "\n"
+
+
+def iter_gzip(chunks, level=COMPRESS_LEVEL):
+    """Gzip-compress a stream of text chunks, yielding compressed bytes"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise StoreError("Parquet archives require pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _parquet_schema(pa):
+    return pa.schema([
+        ('session_id', pa.string()),
+        ('title', pa.string()),
+        ('conversation_created_at', pa.string()),
+        ('conversation_updated_at', pa.string()),
+        ('is_active', pa.bool_()),
+        ('conversation_metadata', pa.string()),
+        ('has_message', pa.bool_()),
+        ('timestamp_str', pa.string()),
+        ('role', pa.string()),
+        ('content', pa.string()),
+        ('audio_file_path', pa.string()),
+        ('confidence', pa.float64()),
+        ('message_created_at', pa.string()),
+        ('message_metadata', pa.string())
+    ])
+
+
+def write_archive(store, path, format='ndjson', since=None, until=None, activity='all',
+                  batch_size=DEFAULT_BATCH_SIZE):
+    """Write an archive file and return export statistics"""
+    if format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {format}")
+
+    started = time.perf_counter()
+    stats = {"path": str(path), "format": format, "conversations": 0, "messages": 0, "fusions": 0}
+
+    if format == 'ndjson':
+        with open(path, 'wb') as f:
+            for data in iter_gzip(iter_ndjson(store, since, until, activity, batch_size, stats)):
+                f.write(data)
+    else:
+        pa = _pyarrow()
+        fusions = archive_fusions(store, since, until, activity)
+        schema = _parquet_schema(pa).with_metadata({PARQUET_FUSIONS_KEY: json.dumps(fusions)})
+        stats['fusions'] = len(fusions)
+        current_session = None
+        with pa.parquet.ParquetWriter(path, schema, compression='zstd') as writer:
+            for batch in iter_archive_rows(store, since, until, activity, batch_size):
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                # Rows arrive grouped by conversation, as in iter_ndjson
+                for row in batch:
+                    if row['session_id'] != current_session:
+                        current_session = row['session_id']
+                        stats['conversations'] += 1
+                    if row['has_message']:
+                        stats['messages'] += 1
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def _ndjson_events(text_stream):
+    for line in text_stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        kind = record.pop('type', None)
+        if kind in ('conversation', 'message', 'fusion'):
+            yield kind, record
+
+
+def _ndjson_file_events(open_stream):
+    """_ndjson_events over a stream that is closed when iteration ends or is abandoned"""
+    with open_stream() as f:
+        yield from _ndjson_events(f)
+
+
+def _parquet_events(path, batch_size):
+    pa = _pyarrow()
+    current_session = None
+    with pa.parquet.ParquetFile(path) as parquet:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            for row in batch.to_pylist():
+                if row['session_id'] != current_session:
+                    current_session = row['session_id']
+                    yield 'conversation', {
+                        "session_id": row['session_id'],
+                        "title": row['title'],
+                        "created_at": row['conversation_created_at'],
+                        "updated_at": row['conversation_updated_at'],
+                        "is_active": row['is_active'],
+                        "metadata": row['conversation_metadata']
+                    }
+                if row['has_message']:
+                    yield 'message', {
+                        "session_id": row['session_id'],
+                        "timestamp_str": row['timestamp_str'],
+                        "role": row['role'],
+                        "content": row['content'],
+                        "audio_file_path": row['audio_file_path'],
+                        "confidence": row['confidence'],
+                        "created_at": row['message_created_at'],
+                        "metadata": row['message_metadata']
+                    }
+        metadata = parquet.schema_arrow.metadata or {}
+    for fusion in json.loads(metadata.get(PARQUET_FUSIONS_KEY, b'[]')):
+        yield 'fusion', fusion
+
+
+def open_archive_events(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Iterate (kind, record) events from an archive path or a binary file object.
+
+    Paths ending in .parquet are read as Parquet; everything else as NDJSON,
+    gzip-compressed or plain.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        if str(source).endswith('.parquet'):
+            return _parquet_events(source, batch_size)
+        with open(source, 'rb') as f:
+            compressed = f.read(2) == b'\x1f\x8b'
+        if compressed:
+            return _ndjson_file_events(lambda: gzip.open(source, 'rt', encoding='utf-8'))
+        return _ndjson_file_events(lambda: open(source, 'r', encoding='utf-8'))
+
+    # Closing the wrapper closes the GzipFile but not the caller's file object
+    return _ndjson_file_events(lambda: io.TextIOWrapper(gzip.GzipFile(fileobj=source), encoding='utf-8'))
+
+
+def import_archive(store, source, batch_size=DEFAULT_BATCH_SIZE):
+    """Load an archive into the store in one transaction and return import statistics.
+
+    Conversations whose session_id already exists are skipped with their
+    messages, so re-importing the same archive is a no-op. Fusion records
+    are restored for imported source conversations whose target and
+    surviving conversations are in the archive or already in the store.
+    """
+    backend = store.backend
+    started = time.perf_counter()
+    stats = {"conversations": 0, "messages": 0, "skipped_conversations": 0,
+             "fusions": 0, "skipped_fusions": 0}
+    tags = []
+    imported = {}  # session_id -> new conversation id
+
+    find_conversation = backend.sql("SELECT id FROM conversations WHERE session_id = ?")
+    insert_conversation = backend.sql(f"""
+        INSERT INTO conversations (session_id, title, created_at, updated_at, is_active, metadata)
+        VALUES (?, ?, COALESCE({backend.ts}, {backend.now}), COALESCE({backend.ts}, {backend.now}),
+                ?, {backend.json})
+        RETURNING id
+    """)
+    message_columns = ('conversation_id', 'timestamp_str', 'role', 'content', 'audio_file_path',
+                       'transcription_confidence', 'created_at', 'metadata')
+    insert_fusion = backend.sql(f"""
+        INSERT INTO conversation_fusions (source_conversation_id, target_conversation_id,
+                                          fused_at, fusion_reason, metadata, surviving_conversation_id)
+        VALUES (?, ?, COALESCE({backend.ts}, {backend.now}), ?, {backend.json}, ?)
+    """)
+
+    def timestamp(value):
+        value = _parse_datetime(value)
+        return backend.timestamp(value) if value is not None else None
+
+    with backend.pool.connection() as conn, closing(open_archive_events(source, batch_size)) as events:
+        conv_id = None
+        pending = []
+        # Messages without a created_at get the import time, as the column default would
+        now = conn.execute(f"SELECT {backend.now} AS now").fetchone()['now']
+
+        def conversation_id(session_id):
+            if session_id in imported:
+                return imported[session_id]
+            row = conn.execute(find_conversation, (session_id,)).fetchone() if session_id else None
+            return row['id'] if row else None
+
+        def flush():
+            # Batches span conversations: every row carries its conversation_id
+            if pending:
+                backend.insert_many(conn, 'messages', message_columns, pending, json_columns=('metadata',))
+                stats['messages'] += len(pending)
+                pending.clear()
+
+        for kind, record in events:
+            if kind == 'conversation':
+                if conn.execute(find_conversation, (record['session_id'],)).fetchone():
+                    conv_id = None
+                    stats['skipped_conversations'] += 1
+                    continue
+                conv_id = conn.execute(insert_conversation, (
+                    record['session_id'],
+                    record.get('title'),
+                    timestamp(record.get('created_at')),
+                    timestamp(record.get('updated_at')),
+                    bool(record.get('is_active', True)),
+                    _json_text(record.get('metadata'))
+                )).fetchone()['id']
+                imported[record['session_id']] = conv_id
+                stats['conversations'] += 1
+                tags.append(f"conversation:{conv_id}")
+                tags.append(f"session:{record['session_id']}")
+            elif kind == 'fusion':
+                flush()
+                source_id = imported.get(record['source_session_id'])
+                target_id = conversation_id(record.get('target_session_id'))
+                surviving_id = conversation_id(record.get('surviving_session_id'))
+                if source_id is None or target_id is None or surviving_id is None:
+                    stats['skipped_fusions'] += 1
+                    continue
+                conn.execute(insert_fusion, (
+                    source_id, target_id, timestamp(record.get('fused_at')),
+                    record.get('reason'), _json_text(record.get('metadata')), surviving_id
+                ))
+                stats['fusions'] += 1
+            elif conv_id is not None:
+                pending.append((
+                    conv_id,
+                    record['timestamp_str'],
+                    record['role'],
+                    record['content'],
+                    record.get('audio_file_path'),
+                    record.get('confidence'),
+                    timestamp(record.get('created_at')) or now,
+                    _json_text(record.get('metadata'))
+                ))
+                if len(pending) >= batch_size:
+                    flush()
+        flush()
+
+    if tags:
+        store.notify_write(*tags)
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,1036 @@
+#!/usr/bin/env python3
+"""
+HeyChat Conversation Store
+In-process query API over the HeyChat database with pooled connections.
+Shared by the command line viewers and the web server so that a request
+never has to spawn a new interpreter just to run a query.
+"""
+
+import base64
+import binascii
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# Configuration
+BASE_DIR = Path(__file__).parent
+CONFIG_DIR = Path.home() / ".config/voice-chatgpt"
+ENV_FILE = CONFIG_DIR / ".env"
+DEFAULT_DATABASE_URL = f"sqlite:///{CONFIG_DIR / 'heychat.db'}"
+SQLITE_SCHEMA_FILE = BASE_DIR / "schema_sqlite.sql"
+DEFAULT_POOL_SIZE = 8
+# Server-side prepare every statement on first use; set HEYCHAT_PG_PREPARE_THRESHOLD=none
+# when connecting through a transaction-mode pooler (e.g. pgbouncer) that cannot keep them.
+DEFAULT_PG_PREPARE_THRESHOLD = "0"
+# PostgreSQL bulk inserts of at least this many rows use COPY; smaller ones a multi-row INSERT
+PG_COPY_MIN_ROWS = 1000
+# Bind parameters per statement allowed by the PostgreSQL wire protocol
+PG_MAX_PARAMS = 65535
+MESSAGE_COLUMNS = ('conversation_id', 'timestamp_str', 'role', 'content', 'audio_file_path',
+                   'transcription_confidence', 'metadata')
+
+
+class StoreError(Exception):
+    """Raised when the conversation store is misconfigured or unavailable"""
+
+
+def read_setting(name, default=None):
+    """Read a setting from the environment, falling back to the HeyChat .env file"""
+    if name in os.environ:
+        return os.environ[name]
+
+    try:
+        with open(ENV_FILE) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                key, value = line.split('=', 1)
+                key = key.replace('export ', '', 1).strip()
+                if key == name:
+                    return os.path.expandvars(value.strip().strip('"').strip("'"))
+    except OSError:
+        pass
+
+    return default
+
+
+def timestamp_to_iso(timestamp_str):
+    """Convert a yyyymmddhhmmss timestamp string to ISO format"""
+    try:
+        return datetime.strptime(timestamp_str, "%Y%m%d%H%M%S").isoformat()
+    except (TypeError, ValueError):
+        return timestamp_str
+
+
+def duration_between(start_str, end_str):
+    """Duration between two yyyymmddhhmmss timestamp strings as a timedelta"""
+    try:
+        start = datetime.strptime(start_str, "%Y%m%d%H%M%S")
+        end = datetime.strptime(end_str, "%Y%m%d%H%M%S")
+        return end - start
+    except (TypeError, ValueError):
+        return timedelta(0)
+
+
+def format_timedelta(delta):
+    """Format a timedelta as H:MM:SS"""
+    return str(delta).split('.')[0]
+
+
+def encode_cursor(updated_at, conv_id):
+    """Encode a (updated_at, id) keyset position as an opaque cursor string"""
+    raw = json.dumps([str(updated_at), conv_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        updated_at, conv_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(updated_at), int(conv_id)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def to_iso(value):
+    """Normalize a database timestamp (datetime or string) to ISO format"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace(' ', 'T', 1)
+
+
+def to_number(value):
+    """Convert database numerics (Decimal) to JSON-friendly numbers"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def refresh_summary(backend, conn, conversation_id):
+    """Rebuild a conversation's conversation_summaries row from its messages.
+
+    Inserts keep summaries current through a trigger; this is for changes
+    that move messages between conversations (fusion) and for upgrades.
+    """
+    totals = conn.execute(backend.sql("""
+        SELECT COUNT(*) AS message_count, MIN(timestamp_str) AS first_message,
+               MAX(timestamp_str) AS last_message
+        FROM messages WHERE conversation_id = ?
+    """), (conversation_id,)).fetchone()
+    if not totals['message_count']:
+        conn.execute(backend.sql("DELETE FROM conversation_summaries WHERE conversation_id = ?"),
+                     (conversation_id,))
+        return
+    newest = conn.execute(backend.sql("""
+        SELECT content, created_at FROM messages
+        WHERE conversation_id = ? ORDER BY seq DESC LIMIT 1
+    """), (conversation_id,)).fetchone()
+    duration = duration_between(totals['first_message'], totals['last_message'])
+    conn.execute(backend.sql("""
+        INSERT INTO conversation_summaries (conversation_id, message_count, first_message, last_message,
+                                            duration_seconds, last_message_preview, last_message_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (conversation_id) DO UPDATE SET
+            message_count = excluded.message_count,
+            first_message = excluded.first_message,
+            last_message = excluded.last_message,
+            duration_seconds = excluded.duration_seconds,
+            last_message_preview = excluded.last_message_preview,
+            last_message_at = excluded.last_message_at
+    """), (conversation_id, totals['message_count'], totals['first_message'], totals['last_message'],
+           int(duration.total_seconds()), newest['content'][:200], newest['created_at']))
+
+
+class ConnectionPool:
+    """Small thread-safe pool of DB-API connections.
+
+    Connections are created lazily up to ``size`` and handed out LIFO so the
+    warmest connection (and its statement cache) is reused first. Each
+    checkout is a transaction: committed on success, rolled back on error.
+    """
+
+    def __init__(self, connect, size=DEFAULT_POOL_SIZE, timeout=30.0):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+        self.timeout = timeout
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with-block"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise StoreError("Timed out waiting for a database connection")
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except Exception:
+                    conn.close()
+                    raise
+                self._idle.put(conn)
+                raise
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class SQLiteBackend:
+    """Embedded SQLite backend for tests and single-node installs.
+
+    Each pooled connection keeps a statement cache, so the fixed query
+    strings used by ConversationStore are compiled once per connection.
+    """
+
+    name = "sqlite"
+    json = "?"
+    ts = "?"
+    now = "datetime('now', 'localtime')"
+    for_update = ""  # writers already serialize on the database lock
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self._connect, size=pool_size)
+        self._initialize_schema()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _initialize_schema(self):
+        with self.pool.connection() as conn:
+            had_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+            ).fetchone() is not None
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(messages)")}
+            needs_seq = bool(columns) and 'seq' not in columns
+            fusion_columns = {row['name'] for row in conn.execute("PRAGMA table_info(conversation_fusions)")}
+            needs_lineage = bool(fusion_columns) and 'surviving_conversation_id' not in fusion_columns
+            if needs_lineage:
+                conn.execute("ALTER TABLE conversation_fusions ADD COLUMN surviving_conversation_id INTEGER "
+                             "REFERENCES conversations(id) ON DELETE CASCADE")
+            needs_summaries = bool(columns) and conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'conversation_summaries'"
+            ).fetchone() is None
+            if needs_seq:
+                # Upgrade to per-conversation sequence numbers before the
+                # schema script indexes them
+                conn.execute("ALTER TABLE conversations ADD COLUMN last_seq INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE messages ADD COLUMN seq INTEGER")
+            conn.executescript(SQLITE_SCHEMA_FILE.read_text())
+            if needs_seq:
+                # Number existing messages in their old (timestamp, id) order
+                conn.execute("""
+                    UPDATE messages SET seq = numbered.seq
+                    FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY conversation_id
+                                                      ORDER BY timestamp_str, id) AS seq
+                        FROM messages
+                    ) AS numbered
+                    WHERE messages.id = numbered.id
+                """)
+                conn.execute("""
+                    UPDATE conversations
+                    SET last_seq = (SELECT COALESCE(MAX(seq), 0) FROM messages
+                                    WHERE conversation_id = conversations.id)
+                """)
+            if needs_summaries:
+                # Summarize conversations whose messages predate the summaries table
+                for row in conn.execute("SELECT DISTINCT conversation_id FROM messages").fetchall():
+                    refresh_summary(self, conn, row['conversation_id'])
+            if needs_lineage:
+                # Replay earlier fusions in order to find where each source ended up
+                for fusion in conn.execute("""
+                    SELECT id, source_conversation_id, target_conversation_id
+                    FROM conversation_fusions ORDER BY id
+                """).fetchall():
+                    conn.execute("""
+                        UPDATE conversation_fusions SET surviving_conversation_id = ?
+                        WHERE id = ? OR (id < ? AND surviving_conversation_id = ?)
+                    """, (fusion['target_conversation_id'], fusion['id'], fusion['id'],
+                          fusion['source_conversation_id']))
+            if not had_fts:
+                # Index rows written before the FTS tables existed
+                conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+                conn.execute("INSERT INTO conversations_fts(conversations_fts) VALUES ('rebuild')")
+
+    def sql(self, query):
+        """Adapt a ?-placeholder query to this backend"""
+        return query
+
+    def executemany(self, conn, query, rows):
+        """Execute one statement for many parameter rows"""
+        conn.executemany(query, rows)
+
+    def insert_many(self, conn, table, columns, rows, json_columns=()):
+        """Insert rows (value tuples in ``columns`` order) with one prepared statement"""
+        values = ', '.join(self.json if column in json_columns else '?' for column in columns)
+        conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})", rows)
+
+    def stream(self, conn, query, params=(), batch_size=500):
+        """Yield query results in batches of dicts; SQLite steps the statement lazily"""
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+
+    def search_query(self, search_term, limit):
+        """Ranked full-text search over the FTS5 indexes (lower bm25 is better)"""
+        terms = re.findall(r'\w+', search_term)
+        if not terms:
+            return None
+        match = ' '.join(f'"{term}"' for term in terms)
+        query = """
+            WITH hits AS (
+                SELECT m.conversation_id, bm25(messages_fts) AS score,
+                       snippet(messages_fts, 0, '[', ']', '…', 20) AS preview
+                FROM messages_fts
+                JOIN messages m ON m.id = messages_fts.rowid
+                WHERE messages_fts MATCH ?
+                UNION ALL
+                SELECT conversations_fts.rowid, bm25(conversations_fts), conversations_fts.title
+                FROM conversations_fts
+                WHERE conversations_fts MATCH ?
+            )
+            SELECT c.id, c.session_id, c.title, c.created_at, c.updated_at,
+                   COUNT(*) AS match_count, -MIN(h.score) AS rank, h.preview
+            FROM hits h
+            JOIN conversations c ON c.id = h.conversation_id
+            WHERE c.is_active = TRUE
+            GROUP BY c.id
+            ORDER BY rank DESC, match_count DESC, c.updated_at DESC
+            LIMIT ?
+        """
+        return query, (match, match, limit)
+
+    def timestamp(self, value):
+        """Adapt a datetime parameter to this backend"""
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class PostgresBackend:
+    """PostgreSQL/Supabase backend (requires psycopg 3).
+
+    Statements are server-side prepared per connection (see
+    DEFAULT_PG_PREPARE_THRESHOLD) and reused for the life of the pool.
+    """
+
+    name = "postgres"
+    json = "?::jsonb"
+    ts = "?::timestamp"
+    now = "CURRENT_TIMESTAMP"
+    for_update = " FOR UPDATE"
+
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE):
+        try:
+            import psycopg
+            from psycopg.rows import dict_row
+        except ImportError:
+            raise StoreError("PostgreSQL support requires psycopg: pip install 'psycopg[binary]'")
+
+        self.url = url
+        self._psycopg = psycopg
+        self._dict_row = dict_row
+        threshold = read_setting('HEYCHAT_PG_PREPARE_THRESHOLD', DEFAULT_PG_PREPARE_THRESHOLD)
+        self.prepare_threshold = None if threshold.lower() == 'none' else int(threshold)
+        self._cursor_ids = itertools.count(1)
+        self.pool = ConnectionPool(self._connect, size=pool_size)
+
+    def _connect(self):
+        return self._psycopg.connect(
+            self.url,
+            row_factory=self._dict_row,
+            prepare_threshold=self.prepare_threshold
+        )
+
+    def sql(self, query):
+        """Adapt a ?-placeholder query to this backend"""
+        return query.replace('?', '%s')
+
+    def executemany(self, conn, query, rows):
+        """Execute one statement for many parameter rows (pipelined by psycopg)"""
+        with conn.cursor() as cursor:
+            cursor.executemany(query, rows)
+
+    def insert_many(self, conn, table, columns, rows, json_columns=()):
+        """Insert rows (value tuples in ``columns`` order): COPY for large batches,
+        multi-row INSERT statements otherwise. Row triggers fire either way."""
+        names = ', '.join(columns)
+        if len(rows) >= PG_COPY_MIN_ROWS:
+            with conn.cursor() as cursor:
+                with cursor.copy(f"COPY {table} ({names}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            return
+
+        values = '(' + ', '.join(self.json if column in json_columns else '?' for column in columns) + ')'
+        chunk = PG_MAX_PARAMS // len(columns)
+        for start in range(0, len(rows), chunk):
+            batch = rows[start:start + chunk]
+            conn.execute(self.sql(f"INSERT INTO {table} ({names}) VALUES {', '.join([values] * len(batch))}"),
+                         [value for row in batch for value in row])
+
+    def stream(self, conn, query, params=(), batch_size=500):
+        """Yield query results in batches of dicts through a server-side cursor"""
+        with conn.cursor(name=f"heychat_stream_{next(self._cursor_ids)}",
+                         row_factory=self._dict_row) as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def search_query(self, search_term, limit):
+        """Ranked full-text search via search_conversations() in schema.sql"""
+        if not search_term.strip():
+            return None
+        return "SELECT * FROM search_conversations(?, ?)", (search_term, limit)
+
+    def timestamp(self, value):
+        """Adapt a datetime parameter to this backend"""
+        return value
+
+
+def create_backend(url, pool_size=DEFAULT_POOL_SIZE):
+    """Create a database backend from a database URL"""
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):], pool_size=pool_size)
+    if url.startswith(('postgres://', 'postgresql://')):
+        return PostgresBackend(url, pool_size=pool_size)
+    raise StoreError(f"Unsupported database URL: {url}")
+
+
+class ConversationStore:
+    """Read/write API over conversations and messages, returning plain dicts"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._write_listeners = []
+
+    def add_write_listener(self, listener):
+        """Register a callback invoked with the tags of every committed write.
+
+        Tags are ``conversation:<id>`` and ``session:<session_id>`` strings
+        naming what changed; listeners use them for cache invalidation.
+        """
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+
+    def notify_write(self, *tags):
+        """Tell write listeners that the tagged conversations changed"""
+        for listener in self._write_listeners:
+            listener(*tags)
+
+    def _query(self, conn, query, params=()):
+        """Execute a query and return all rows as dicts (empty for statements without results)"""
+        cursor = conn.execute(self.backend.sql(query), params)
+        if cursor.description is None:
+            return []
+        return [dict(row) for row in cursor.fetchall()]
+
+    def ping(self):
+        """Check that the database answers a trivial query"""
+        with self.backend.pool.connection() as conn:
+            return self._query(conn, "SELECT 1 AS ok")[0]['ok'] == 1
+
+    # Write path
+
+    def _create_conversation(self, conn, session_id, title, metadata):
+        """Insert a conversation if missing and return its id"""
+        if metadata is not None and not isinstance(metadata, str):
+            metadata = json.dumps(metadata)
+        self._query(conn, f"""
+            INSERT INTO conversations (session_id, title, metadata)
+            VALUES (?, ?, {self.backend.json})
+            ON CONFLICT (session_id) DO NOTHING
+        """, (session_id, title, metadata))
+        return self._query(conn, "SELECT id FROM conversations WHERE session_id = ?",
+                           (session_id,))[0]['id']
+
+    def create_conversation(self, session_id, title="Voice Conversation", metadata=None):
+        """Create a conversation (idempotent per session_id) and return its id"""
+        with self.backend.pool.connection() as conn:
+            conv_id = self._create_conversation(conn, session_id, title, metadata)
+        self.notify_write(f"conversation:{conv_id}", f"session:{session_id}")
+        return conv_id
+
+    def get_conversation_id(self, session_id):
+        """Get the id of an active conversation by session ID, or None"""
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, """
+                SELECT id FROM conversations WHERE session_id = ? AND is_active = TRUE
+            """, (session_id,))
+        return rows[0]['id'] if rows else None
+
+    def get_or_create_conversation(self, session_id, title="Voice Conversation", metadata=None):
+        """Get the conversation id for a session, creating the conversation if needed"""
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, "SELECT id FROM conversations WHERE session_id = ?",
+                               (session_id,))
+            if rows:
+                return rows[0]['id']
+            conv_id = self._create_conversation(conn, session_id, title, metadata)
+        self.notify_write(f"conversation:{conv_id}", f"session:{session_id}")
+        return conv_id
+
+    def add_message(self, conversation_id, timestamp_str, role, content,
+                    audio_file_path=None, confidence=None, metadata=None):
+        """Insert a message and return its id"""
+        if metadata is not None and not isinstance(metadata, str):
+            metadata = json.dumps(metadata)
+        with self.backend.pool.connection() as conn:
+            msg_id = self._query(conn, f"""
+                INSERT INTO messages (conversation_id, timestamp_str, role, content,
+                                      audio_file_path, transcription_confidence, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, {self.backend.json})
+                RETURNING id
+            """, (conversation_id, timestamp_str, role, content,
+                  audio_file_path, confidence, metadata))[0]['id']
+        self.notify_write(f"conversation:{conversation_id}")
+        return msg_id
+
+    def persist_messages(self, rows, skip_existing=False):
+        """Insert message rows, in order, in one transaction and return how many were written.
+
+        Rows are (conversation_id, timestamp_str, role, content, audio_file_path,
+        confidence, metadata) tuples, possibly for several conversations. With
+        ``skip_existing``, rows matching a stored message (same conversation,
+        timestamp, role and content) are left out, so replaying rows that may
+        already have been committed is harmless.
+        """
+        rows = [row[:6] + (row[6] if row[6] is None or isinstance(row[6], str) else json.dumps(row[6]),)
+                for row in rows]
+        with self.backend.pool.connection() as conn:
+            if skip_existing:
+                rows = [row for row in rows if not self._query(conn, """
+                    SELECT 1 FROM messages
+                    WHERE conversation_id = ? AND timestamp_str = ? AND role = ? AND content = ?
+                    LIMIT 1
+                """, row[:4])]
+            if rows:
+                self.backend.insert_many(conn, 'messages', MESSAGE_COLUMNS, rows, json_columns=('metadata',))
+        if rows:
+            self.notify_write(*sorted({f"conversation:{row[0]}" for row in rows}))
+        return len(rows)
+
+    def add_messages(self, conversation_id, rows):
+        """Insert messages into one conversation in one transaction and return their ids, in order.
+
+        Rows are (timestamp_str, role, content, audio_file_path, confidence,
+        metadata) tuples; the last three may be left out. The batch's seq
+        numbers are reserved with one counter update and inserted with the
+        rows. PostgreSQL loads large batches with COPY, smaller ones with
+        multi-row INSERTs; SQLite runs one prepared INSERT for every row.
+        """
+        conversation_id = int(conversation_id)
+        values = []
+        for row in rows:
+            row = tuple(row) + (None,) * (6 - len(row))
+            metadata = row[5] if row[5] is None or isinstance(row[5], str) else json.dumps(row[5])
+            values.append((conversation_id,) + row[:5] + (metadata,))
+        if not values:
+            return []
+
+        with self.backend.pool.connection() as conn:
+            # Reserve the seq range in one counter bump; the update holds the
+            # conversation (row lock or database lock) until commit
+            rows = self._query(conn, f"""
+                UPDATE conversations
+                SET last_seq = last_seq + ?,
+                    updated_at = CASE WHEN updated_at > {self.backend.now} THEN updated_at
+                                      ELSE {self.backend.now} END
+                WHERE id = ?
+                RETURNING last_seq
+            """, (len(values), conversation_id))
+            if not rows:
+                raise StoreError(f"Conversation {conversation_id} not found")
+            first_seq = rows[0]['last_seq'] - len(values) + 1
+            values = [row + (first_seq + i,) for i, row in enumerate(values)]
+            self.backend.insert_many(conn, 'messages', MESSAGE_COLUMNS + ('seq',), values,
+                                     json_columns=('metadata',))
+            ids = [row['id'] for row in self._query(conn, """
+                SELECT id FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq
+            """, (conversation_id, first_seq))]
+        self.notify_write(f"conversation:{conversation_id}")
+        return ids
+
+    def fuse_conversations(self, source_id, target_id, reason="Manual fusion"):
+        """Move all messages of source into target and retire source (see schema.sql)"""
+        self.fuse_many([source_id], target_id, reason)
+        return True
+
+    def fuse_many(self, source_ids, target_id, reason="Manual fusion"):
+        """Fuse several conversations into target in one transaction and return
+        how many messages moved.
+
+        The merged conversation is renumbered in time order; on ties the
+        target's messages come first, then each source's in the order given,
+        each keeping its own seq order. Earlier fusions into the sources now
+        resolve to the target (see resolve_conversation).
+        """
+        target_id = int(target_id)
+        source_ids = list(dict.fromkeys(int(source_id) for source_id in source_ids))
+        if not source_ids:
+            raise ValueError("No conversations to fuse")
+        if target_id in source_ids:
+            raise ValueError(f"Cannot fuse conversation {target_id} into itself")
+        marks = ', '.join('?' * len(source_ids))
+
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, f"SELECT last_seq FROM conversations WHERE id = ?{self.backend.for_update}",
+                               (target_id,))
+            if not rows:
+                raise StoreError(f"Conversation {target_id} not found")
+            last_seqs = {row['id']: row['last_seq'] for row in self._query(
+                conn, f"SELECT id, last_seq FROM conversations WHERE id IN ({marks})", source_ids)}
+            missing = [source_id for source_id in source_ids if source_id not in last_seqs]
+            if missing:
+                raise StoreError(f"Conversation {missing[0]} not found")
+
+            # Park every message at a distinct negative seq (target first, then
+            # each source after the previous one), then number them 1..n in
+            # order, so no two rows ever share a seq
+            base, cases, params = rows[0]['last_seq'], [], []
+            for source_id in source_ids:
+                cases.append("WHEN ? THEN CAST(? AS BIGINT)")
+                params.extend([source_id, base])
+                base += last_seqs[source_id]
+            self._query(conn, "UPDATE messages SET seq = -seq WHERE conversation_id = ?", (target_id,))
+            moved = conn.execute(self.backend.sql(f"""
+                UPDATE messages
+                SET seq = -(seq + CASE conversation_id {' '.join(cases)} END), conversation_id = ?
+                WHERE conversation_id IN ({marks})
+            """), (*params, target_id, *source_ids)).rowcount
+            self._query(conn, """
+                UPDATE messages SET seq = ordered.seq
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (ORDER BY timestamp_str, seq DESC) AS seq
+                    FROM messages WHERE conversation_id = ?
+                ) AS ordered
+                WHERE messages.id = ordered.id
+            """, (target_id,))
+            self._query(conn, """
+                UPDATE conversations
+                SET last_seq = (SELECT COUNT(*) FROM messages WHERE conversation_id = ?)
+                WHERE id = ?
+            """, (target_id, target_id))
+            refresh_summary(self.backend, conn, target_id)
+            self._query(conn, f"DELETE FROM conversation_summaries WHERE conversation_id IN ({marks})", source_ids)
+
+            self._query(conn, f"""
+                UPDATE conversation_fusions SET surviving_conversation_id = ?
+                WHERE surviving_conversation_id IN ({marks})
+            """, (target_id, *source_ids))
+            self.backend.executemany(conn, self.backend.sql("""
+                INSERT INTO conversation_fusions (source_conversation_id, target_conversation_id,
+                                                  fusion_reason, surviving_conversation_id)
+                VALUES (?, ?, ?, ?)
+            """), [(source_id, target_id, reason, target_id) for source_id in source_ids])
+            self._query(conn, f"UPDATE conversations SET is_active = FALSE WHERE id IN ({marks})", source_ids)
+            self._query(conn, f"UPDATE conversations SET updated_at = {self.backend.now} WHERE id = ?",
+                        (target_id,))
+        self.notify_write(*(f"conversation:{conv_id}" for conv_id in (*source_ids, target_id)))
+        return moved
+
+    def resolve_conversation(self, session_id):
+        """Find the conversation that now holds a session's messages.
+
+        Returns {"id", "session_id", "is_active"} for the session's own
+        conversation, or for the one it was (eventually) fused into; None if
+        the session is unknown. Two index lookups, however long the chain.
+        """
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, """
+                SELECT s.id, s.session_id, s.is_active
+                FROM conversations c
+                JOIN conversations s ON s.id = COALESCE((
+                    SELECT f.surviving_conversation_id
+                    FROM conversation_fusions f
+                    WHERE f.source_conversation_id = c.id
+                    ORDER BY f.id DESC
+                    LIMIT 1
+                ), c.id)
+                WHERE c.session_id = ?
+            """, (session_id,))
+        if not rows:
+            return None
+        return {"id": rows[0]['id'], "session_id": rows[0]['session_id'], "is_active": bool(rows[0]['is_active'])}
+
+    def update_conversation_metadata(self, conversation_id, values):
+        """Merge top-level keys into a conversation's metadata and return the result"""
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, f"SELECT metadata FROM conversations WHERE id = ?{self.backend.for_update}",
+                               (conversation_id,))
+            if not rows:
+                raise StoreError(f"Conversation {conversation_id} not found")
+            metadata = rows[0]['metadata'] or {}
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+            metadata.update(values)
+            self._query(conn, f"UPDATE conversations SET metadata = {self.backend.json} WHERE id = ?",
+                        (json.dumps(metadata), conversation_id))
+        self.notify_write(f"conversation:{conversation_id}")
+        return metadata
+
+    def get_history(self, conversation_id):
+        """Get a conversation's messages as chat API role/content pairs"""
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, """
+                SELECT role, content
+                FROM messages
+                WHERE conversation_id = ?
+                ORDER BY seq ASC
+            """, (conversation_id,))
+        return [{"role": row['role'], "content": row['content']} for row in rows]
+
+    # Read path
+
+    def _conversation_row(self, row):
+        duration = timedelta(seconds=row.get('duration_seconds') or 0)
+        return {
+            "id": row['id'],
+            "session_id": row['session_id'],
+            "title": row['title'],
+            "created_at": to_iso(row['created_at']),
+            "updated_at": to_iso(row['updated_at']),
+            "is_active": bool(row['is_active']),
+            "message_count": row.get('message_count') or 0,
+            "first_message_at": timestamp_to_iso(row.get('first_message')),
+            "last_message_at": timestamp_to_iso(row.get('last_message')),
+            "duration": format_timedelta(duration),
+            "last_message_preview": row.get('last_message_preview')
+        }
+
+    def list_conversations(self, limit=20, active_only=True):
+        """List the most recently updated conversations"""
+        return self.list_conversations_page(limit=limit, active_only=active_only)['conversations']
+
+    def list_conversations_page(self, limit=20, cursor=None, active_only=True):
+        """List one page of conversations, newest first, using keyset pagination.
+
+        Pages are keyed on (updated_at, id) so every page costs one index range
+        scan regardless of depth, plus one conversation_summaries lookup per
+        row. Pass the returned ``next_cursor`` to get the following page; it
+        is None on the last page. Raises ValueError if ``limit`` is below 1.
+        """
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        conditions = ["c.is_active = TRUE"] if active_only else []
+        params = []
+        if cursor:
+            updated_at, conv_id = decode_cursor(cursor)
+            conditions.append(f"(c.updated_at, c.id) < ({self.backend.ts}, ?)")
+            params.extend([updated_at, conv_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+            SELECT c.id, c.session_id, c.title, c.created_at, c.updated_at, c.is_active,
+                   s.message_count, s.first_message, s.last_message, s.duration_seconds,
+                   s.last_message_preview
+            FROM conversations c
+            LEFT JOIN conversation_summaries s ON s.conversation_id = c.id
+            {where}
+            ORDER BY c.updated_at DESC, c.id DESC
+            LIMIT ?
+        """
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, query, (*params, limit + 1))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['updated_at'], rows[-1]['id'])
+
+        return {
+            "conversations": [self._conversation_row(row) for row in rows],
+            "next_cursor": next_cursor
+        }
+
+    def get_conversation_header(self, session_id):
+        """Get a conversation without its messages, or None if missing"""
+        with self.backend.pool.connection() as conn:
+            conversations = self._query(conn, """
+                SELECT id, session_id, title, created_at, updated_at, is_active, metadata
+                FROM conversations
+                WHERE session_id = ?
+            """, (session_id,))
+        if not conversations:
+            return None
+
+        conversation = conversations[0]
+        return {
+            "id": conversation['id'],
+            "session_id": conversation['session_id'],
+            "title": conversation['title'],
+            "created_at": to_iso(conversation['created_at']),
+            "updated_at": to_iso(conversation['updated_at']),
+            "is_active": bool(conversation['is_active']),
+            "metadata": conversation['metadata']
+        }
+
+    def iter_messages(self, conversation_id, batch_size=500):
+        """Yield a conversation's messages in order, in batches, holding one pooled connection"""
+        query = self.backend.sql("""
+            SELECT id, seq, timestamp_str, role, content, audio_file_path,
+                   transcription_confidence, created_at
+            FROM messages
+            WHERE conversation_id = ?
+            ORDER BY seq ASC
+        """)
+        with self.backend.pool.connection() as conn:
+            for rows in self.backend.stream(conn, query, (conversation_id,), batch_size):
+                yield [self._message_row(row) for row in rows]
+
+    def iter_turn_traces(self, since=None, until=None, batch_size=500):
+        """Yield the per-turn latency traces (metadata.trace of assistant messages)
+        of messages created in [since, until)"""
+        conditions, params = ["role = 'assistant'", "metadata IS NOT NULL"], []
+        if since is not None:
+            conditions.append(f"created_at >= {self.backend.ts}")
+            params.append(self.backend.timestamp(since))
+        if until is not None:
+            conditions.append(f"created_at < {self.backend.ts}")
+            params.append(self.backend.timestamp(until))
+        query = self.backend.sql(f"SELECT metadata FROM messages WHERE {' AND '.join(conditions)}")
+        with self.backend.pool.connection() as conn:
+            for rows in self.backend.stream(conn, query, tuple(params), batch_size):
+                for row in rows:
+                    metadata = row['metadata']
+                    if isinstance(metadata, str):
+                        try:
+                            metadata = json.loads(metadata)
+                        except ValueError:
+                            continue
+                    trace = metadata.get('trace') if isinstance(metadata, dict) else None
+                    if isinstance(trace, dict):
+                        yield trace
+
+    def _message_row(self, msg):
+        return {
+            "id": msg['id'],
+            "seq": msg['seq'],
+            "timestamp_str": msg['timestamp_str'],
+            "timestamp": timestamp_to_iso(msg['timestamp_str']),
+            "role": msg['role'],
+            "content": msg['content'],
+            "audio_file_path": msg['audio_file_path'],
+            "confidence": to_number(msg['transcription_confidence'])
+        }
+
+    def get_conversation(self, session_id):
+        """Get a conversation with all of its messages, or None if missing"""
+        conversation = self.get_conversation_header(session_id)
+        if conversation is None:
+            return None
+
+        conversation['messages'] = [
+            msg for batch in self.iter_messages(conversation['id']) for msg in batch
+        ]
+        return conversation
+
+    def search_conversations(self, search_term, limit=50):
+        """Full-text search of active conversations by message content or title, best match first"""
+        search = self.backend.search_query(search_term, int(limit))
+        if search is None:
+            return []
+
+        with self.backend.pool.connection() as conn:
+            rows = self._query(conn, *search)
+
+        return [
+            {
+                "id": row['id'],
+                "session_id": row['session_id'],
+                "title": row['title'],
+                "created_at": to_iso(row['created_at']),
+                "updated_at": to_iso(row['updated_at']),
+                "match_count": row['match_count'],
+                "rank": round(float(row['rank']), 4),
+                "preview": (row['preview'] or '')[:200]
+            }
+            for row in rows
+        ]
+
+    def get_stats(self):
+        """Compute conversation statistics"""
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_start = today - timedelta(days=today.weekday())
+
+        with self.backend.pool.connection() as conn:
+            totals = self._query(conn, """
+                SELECT
+                    (SELECT COUNT(*) FROM conversations WHERE is_active = TRUE) AS total_conversations,
+                    (SELECT COALESCE(SUM(message_count), 0) FROM conversation_summaries) AS total_messages,
+                    (SELECT COUNT(*) FROM conversations
+                     WHERE is_active = TRUE AND created_at >= ?) AS conversations_today,
+                    (SELECT COUNT(*) FROM conversations
+                     WHERE is_active = TRUE AND created_at >= ?) AS conversations_this_week
+            """, (self.backend.timestamp(today), self.backend.timestamp(week_start)))[0]
+
+            spans = self._query(conn, """
+                SELECT COUNT(*) AS conversations,
+                       COALESCE(SUM(s.message_count), 0) AS messages,
+                       COALESCE(SUM(s.duration_seconds), 0) AS total_duration,
+                       COALESCE(MAX(s.duration_seconds), 0) AS longest_duration
+                FROM conversation_summaries s
+                JOIN conversations c ON s.conversation_id = c.id
+                WHERE c.is_active = TRUE AND s.message_count > 0
+            """)[0]
+
+            busiest = self._query(conn, """
+                SELECT DATE(created_at) AS day, COUNT(*) AS conversations
+                FROM conversations
+                WHERE is_active = TRUE
+                GROUP BY DATE(created_at)
+                ORDER BY conversations DESC
+                LIMIT 1
+            """)
+
+        return {
+            "total_conversations": totals['total_conversations'],
+            "total_messages": int(totals['total_messages']),
+            "conversations_today": totals['conversations_today'],
+            "conversations_this_week": totals['conversations_this_week'],
+            "avg_messages_per_conversation": (round(to_number(spans['messages']) / spans['conversations'], 1)
+                                              if spans['conversations'] else 0),
+            "total_duration": format_timedelta(timedelta(seconds=int(spans['total_duration']))),
+            "longest_conversation": format_timedelta(timedelta(seconds=int(spans['longest_duration']))),
+            "most_active_day": str(busiest[0]['day']) if busiest else None
+        }
+
+    def export_stream(self, session_id, format='json', batch_size=500):
+        """Stream a conversation export as text chunks, or return None if missing.
+
+        Messages are read from a database cursor in batches and rendered as
+        they arrive, so memory use does not grow with conversation length.
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {format}")
+
+        conversation = self.get_conversation_header(session_id)
+        if conversation is None:
+            return None
+
+        return _EXPORT_WRITERS[format](conversation, self.iter_messages(conversation['id'], batch_size))
+
+
+# Export formats and their MIME types
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'txt': 'text/plain'
+}
+
+
+def _export_message(msg):
+    return {
+        "timestamp": msg['timestamp'],
+        "role": msg['role'],
+        "content": msg['content'],
+        "audio_file_path": msg['audio_file_path'],
+        "confidence": msg['confidence']
+    }
+
+
+def _export_header(conversation):
+    return {
+        "session_id": conversation['session_id'],
+        "title": conversation['title'],
+        "created_at": conversation['created_at'],
+        "exported_at": datetime.now().isoformat()
+    }
+
+
+def _export_json(conversation, batches):
+    """One JSON document: header fields followed by a messages array"""
+    header = json.dumps(_export_header(conversation))
+    yield header[:-1] + ', "messages": [\n'
+    separator = ""
+    for batch in batches:
+        yield separator + ",\n".join(json.dumps(_export_message(msg)) for msg in batch)
+        separator = ",\n"
+    yield "\n]}\n"
+
+
+def _export_ndjson(conversation, batches):
+    """Newline-delimited records: one conversation record, then one per message"""
+    yield json.dumps({"type": "conversation", **_export_header(conversation)}) + "\n"
+    for batch in batches:
+        yield "".join(json.dumps({"type": "message", **_export_message(msg)}) + "\n" for msg in batch)
+
+
+def _export_txt(conversation, batches):
+    """Plain text transcript"""
+    yield (f"Conversation: {conversation['session_id']}\n"
+           f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+           + "=" * 50 + "\n\n")
+    for batch in batches:
+        yield "".join(f"[{msg['timestamp']}] {msg['role'].upper()}: {msg['content']}\n\n" for msg in batch)
+
+
+_EXPORT_WRITERS = {
+    'json': _export_json,
+    'ndjson': _export_ndjson,
+    'txt': _export_txt
+}
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(url=None):
+    """Get the shared ConversationStore for a database URL (one pool per process)"""
+    url = url or read_setting('HEYCHAT_DATABASE_URL', DEFAULT_DATABASE_URL)
+    with _stores_lock:
+        if url not in _stores:
+            pool_size = int(read_setting('HEYCHAT_DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+            _stores[url] = ConversationStore(create_backend(url, pool_size=pool_size))
+        return _stores[url]
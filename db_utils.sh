@@ -54,10 +54,42 @@ add_message() {
     execute_sql "$sql"
 }
 
+# Function to add many messages from a CSV file in one connection and transaction.
+# CSV columns (with a header line): timestamp_str,role,content,audio_file_path,transcription_confidence
+# Prints the new message ids in conversation order.
+add_messages() {
+    local conversation_id="$1"
+    local csv_file="$2"
+    local output
+    
+    if ! [[ "$conversation_id" =~ ^[0-9]+$ ]]; then
+        echo -e "${RED}Invalid conversation ID: $conversation_id${NC}" >&2
+        return 1
+    fi
+    if [ ! -f "$csv_file" ]; then
+        echo -e "${RED}CSV file not found: $csv_file${NC}" >&2
+        return 1
+    fi
+    
+    # The CSV is fed on stdin (\copy ... FROM pstdin), so the path never appears in a command.
+    # The new messages hold the conversation's last N seq numbers: RETURNING order is not guaranteed.
+    output=$(psql -d "$DB_NAME" -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -q -t -X \
+        --single-transaction -v ON_ERROR_STOP=1 \
+        -c "CREATE TEMP TABLE incoming_messages (line SERIAL, timestamp_str VARCHAR(14), role VARCHAR(20), content TEXT, audio_file_path VARCHAR(500), transcription_confidence DECIMAL(3,2)) ON COMMIT DROP;" \
+        -c "\\copy incoming_messages (timestamp_str, role, content, audio_file_path, transcription_confidence) FROM pstdin WITH (FORMAT csv, HEADER)" \
+        -c "INSERT INTO messages (conversation_id, timestamp_str, role, content, audio_file_path, transcription_confidence) SELECT $conversation_id, timestamp_str, role, content, audio_file_path, transcription_confidence FROM incoming_messages ORDER BY line;" \
+        -c "SELECT id FROM messages WHERE conversation_id = $conversation_id AND seq > (SELECT last_seq FROM conversations WHERE id = $conversation_id) - (SELECT COUNT(*) FROM incoming_messages) ORDER BY seq;" \
+        < "$csv_file") || {
+        echo -e "${RED}Bulk insert into conversation $conversation_id failed; nothing was written${NC}" >&2
+        return 1
+    }
+    echo "$output" | sed 's/^[[:space:]]*//;s/[[:space:]]*$//;/^$/d'
+}
+
 # Function to get conversation history for API
 get_conversation_history() {
     local conversation_id="$1"
-    local sql="SELECT json_agg(json_build_object('role', role, 'content', content)) FROM (SELECT role, content FROM messages WHERE conversation_id = $conversation_id ORDER BY timestamp_str ASC) as msgs;"
+    local sql="SELECT json_agg(json_build_object('role', role, 'content', content)) FROM (SELECT role, content FROM messages WHERE conversation_id = $conversation_id ORDER BY seq ASC) as msgs;"
     execute_sql "$sql"
 }
 
@@ -70,7 +102,7 @@ list_conversations() {
 # Function to get conversation details
 get_conversation_details() {
     local conversation_id="$1"
-    local sql="SELECT c.id, c.session_id, c.title, c.created_at, c.updated_at, c.metadata, COUNT(m.id) as message_count FROM conversations c LEFT JOIN messages m ON c.id = m.conversation_id WHERE c.id = $conversation_id GROUP BY c.id, c.session_id, c.title, c.created_at, c.updated_at, c.metadata;"
+    local sql="SELECT c.id, c.session_id, c.title, c.created_at, c.updated_at, c.metadata, COALESCE(s.message_count, 0) as message_count, s.duration_seconds, s.last_message_at, s.last_message_preview FROM conversations c LEFT JOIN conversation_summaries s ON s.conversation_id = c.id WHERE c.id = $conversation_id;"
     execute_sql "$sql"
 }
 
@@ -84,17 +116,47 @@ fuse_conversations() {
     execute_sql "$sql"
 }
 
+# Function to fuse several conversations into one (comma-separated source ids)
+fuse_many_conversations() {
+    local target_id="$1"
+    local source_ids="$2"
+    local reason="${3:-Manual fusion}"
+    
+    if ! [[ "$target_id" =~ ^[0-9]+$ ]] || ! [[ "$source_ids" =~ ^[0-9]+(,[0-9]+)*$ ]]; then
+        echo -e "${RED}Usage: fuse-many <target_id> <id,id,...> [reason] (numeric ids)${NC}" >&2
+        return 1
+    fi
+    reason=$(echo "$reason" | sed "s/'/''/g")
+    
+    # Prints the number of messages moved
+    local sql="SELECT fuse_conversations_many(ARRAY[$source_ids]::INTEGER[], $target_id, '$reason');"
+    execute_sql "$sql"
+}
+
+# Function to find the conversation holding a session's messages (follows fusions)
+resolve_conversation() {
+    local session_id="$1"
+    # Escape single quotes in session ID
+    session_id=$(echo "$session_id" | sed "s/'/''/g")
+    local sql="SELECT id, session_id, is_active FROM resolve_conversation('$session_id');"
+    execute_sql "$sql"
+}
+
 # Function to search conversations
 search_conversations() {
     local search_term="$1"
-    local sql="SELECT DISTINCT c.id, c.session_id, c.title, c.created_at FROM conversations c JOIN messages m ON c.id = m.conversation_id WHERE c.is_active = TRUE AND (m.content ILIKE '%$search_term%' OR c.title ILIKE '%$search_term%') ORDER BY c.updated_at DESC;"
+    # Escape single quotes in search term
+    search_term=$(echo "$search_term" | sed "s/'/''/g")
+    
+    # Ranked full-text search over the GIN indexes (see search_conversations() in schema.sql)
+    local sql="SELECT id, session_id, title, created_at, match_count, rank FROM search_conversations('$search_term');"
     execute_sql "$sql"
 }
 
 # Function to get recent messages
 get_recent_messages() {
     local limit="${1:-10}"
-    local sql="SELECT m.timestamp_str, m.role, LEFT(m.content, 100) as content_preview, c.title FROM messages m JOIN conversations c ON m.conversation_id = c.id WHERE c.is_active = TRUE ORDER BY m.timestamp_str DESC LIMIT $limit;"
+    local sql="SELECT m.timestamp_str, m.role, LEFT(m.content, 100) as content_preview, c.title FROM messages m JOIN conversations c ON m.conversation_id = c.id WHERE c.is_active = TRUE ORDER BY m.created_at DESC LIMIT $limit;"
     execute_sql "$sql"
 }
 
@@ -142,10 +204,8 @@ save_conversation() {
     # Add user message
     add_message "$conv_id" "$timestamp" "user" "$user_message" "$audio_file_path" "$confidence"
     
-    # Add assistant message (with slight delay to ensure different timestamp)
-    sleep 1
-    local timestamp_assistant=$(date +%Y%m%d%H%M%S)
-    add_message "$conv_id" "$timestamp_assistant" "assistant" "$assistant_message"
+    # Add assistant message (messages.seq keeps it after the user message)
+    add_message "$conv_id" "$timestamp" "assistant" "$assistant_message"
     
     echo "$conv_id"
 }
@@ -178,6 +238,9 @@ main() {
         "add-message")
             add_message "$2" "$3" "$4" "$5" "$6" "$7"
             ;;
+        "add-messages")
+            add_messages "$2" "$3"
+            ;;
         "get-history")
             get_conversation_history "$2"
             ;;
@@ -190,6 +253,12 @@ main() {
         "fuse")
             fuse_conversations "$2" "$3" "$4"
             ;;
+        "fuse-many")
+            fuse_many_conversations "$2" "$3" "$4"
+            ;;
+        "resolve")
+            resolve_conversation "$2"
+            ;;
         "search")
             search_conversations "$2"
             ;;
@@ -222,10 +291,13 @@ main() {
             echo "  create <session_id> [title] [metadata]  - Create new conversation"
             echo "  get-id <session_id>                     - Get conversation ID"
             echo "  add-message <conv_id> <timestamp> <role> <content> [audio_path] [confidence]"
+            echo "  add-messages <conv_id> <file.csv>       - Add messages from CSV in one transaction"
             echo "  get-history <conv_id>                   - Get conversation history"
             echo "  list                                    - List active conversations"
             echo "  details <conv_id>                       - Get conversation details"
             echo "  fuse <source_id> <target_id> [reason]   - Fuse conversations"
+            echo "  fuse-many <target_id> <id,id,...> [reason] - Fuse several conversations in one transaction"
+            echo "  resolve <session_id>                    - Conversation now holding a session (after fusions)"
             echo "  search <term>                           - Search conversations"
             echo "  recent [limit]                          - Get recent messages"
             echo "  session-id                              - Generate session ID"
@@ -4,36 +4,177 @@ HeyChat Web Server - Modern HTTP frontend for HeyChat voice conversation system
 Provides REST API and web interface for all HeyChat functions
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+import os
+
+# Server mode: 'threading' runs the Werkzeug development server; 'gevent' or
+# 'eventlet' run on an async worker model where socket, subprocess and psycopg
+# I/O yield instead of blocking a thread. SQLite calls cannot yield and block
+# the event loop, so async modes are meant for the PostgreSQL backend. Async
+# modes must monkey-patch the standard library before anything else is imported.
+SERVER_MODE = os.environ.get('HEYCHAT_SERVER_MODE', 'threading')
+if SERVER_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif SERVER_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, g, render_template, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import subprocess
 import threading
-import os
 import json
+import platform
 import time
 from datetime import datetime
 from pathlib import Path
 import signal
+from functools import wraps
+from inspect import signature
+
+from conversation_store import EXPORT_FORMATS, get_store, read_setting
+from conversation_archive import ACTIVITY_FILTERS, import_archive, iter_gzip, iter_ndjson
+from server_metrics import CONTENT_TYPE, DURATION_BUCKETS, MetricsRegistry
+from ttl_cache import TTLCache
+
+# Largest page /api/conversations/list serves; bigger limits are capped
+MAX_PAGE_SIZE = 100
+
+# Prometheus metrics, exposed at /api/metrics
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    'heychat_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+http_latency = metrics.histogram(
+    'heychat_http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+http_in_flight = metrics.gauge(
+    'heychat_http_requests_in_flight', 'HTTP requests currently being served')
+socket_event_latency = metrics.histogram(
+    'heychat_socketio_event_duration_seconds', 'Socket.IO event handler latency', ('event',))
+socket_emits = metrics.counter(
+    'heychat_socketio_emits_total', 'Socket.IO events emitted to clients', ('event',))
+processes_started = metrics.counter(
+    'heychat_processes_started_total', 'Child processes started', ('process_id',))
+processes_exited = metrics.counter(
+    'heychat_processes_exited_total', 'Child processes exited, by outcome', ('process_id', 'outcome'))
+process_duration = metrics.histogram(
+    'heychat_process_duration_seconds', 'Child process run time', ('process_id',),
+    buckets=DURATION_BUCKETS)
+
+class InstrumentedSocketIO(SocketIO):
+    """SocketIO that times event handlers and counts emits"""
+    def on(self, message, namespace=None):
+        register = super().on(message, namespace)
+
+        def decorator(handler):
+            params = signature(handler)
+
+            @wraps(handler)
+            def timed(*args, **kwargs):
+                # Let mismatched calls (connect without auth) fail before timing
+                params.bind(*args, **kwargs)
+                with socket_event_latency.time(message):
+                    return handler(*args, **kwargs)
+            return register(timed)
+        return decorator
+
+    def emit(self, event, *args, **kwargs):
+        socket_emits.inc(event)
+        return super().emit(event, *args, **kwargs)
 
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = InstrumentedSocketIO(app, cors_allowed_origins="*", async_mode=SERVER_MODE)
 
 # Global state
 current_processes = {}
-conversation_cache = []
+
+# Response cache for the conversation endpoints, invalidated by the tags of
+# the conversations a write touched. Single conversations and list pages
+# after the first are tagged with the conversations they show: a write moves
+# its conversation to the head of the list, so it can only change the pages
+# that held it. The first list page, search results and stats can change with
+# a write to any conversation; they carry ALL_CONVERSATIONS, which every write
+# drops. Writes from other processes (the voice scripts) are bounded by the TTL.
+conversation_cache = TTLCache(
+    maxsize=int(read_setting('HEYCHAT_CACHE_SIZE', 256)),
+    ttl=float(read_setting('HEYCHAT_CACHE_TTL', 10))
+)
+ALL_CONVERSATIONS = 'conversations:*'
 
 # Configuration
 BASE_DIR = Path(__file__).parent
 LOG_DIR = Path.home() / ".config/voice-chatgpt/logs"
 ENV_FILE = Path.home() / ".config/voice-chatgpt/.env"
 
+# Child output is coalesced into one 'process_output' frame per window or per
+# max-bytes of output, whichever comes first
+OUTPUT_BATCH_WINDOW = float(read_setting('HEYCHAT_OUTPUT_BATCH_MS', 50)) / 1000
+OUTPUT_BATCH_MAX_BYTES = int(read_setting('HEYCHAT_OUTPUT_BATCH_BYTES', 64 * 1024))
+
+class OutputBatcher:
+    """Coalesce output lines into batches handed to emit() from one flusher thread.
+
+    A batch is flushed ``window`` seconds after its first line arrives, or as
+    soon as it holds ``max_bytes`` of text. All emits happen on the flusher
+    thread, so batches are delivered in order.
+    """
+    def __init__(self, emit, window=OUTPUT_BATCH_WINDOW, max_bytes=OUTPUT_BATCH_MAX_BYTES):
+        self._emit = emit
+        self.window = window
+        self.max_bytes = max_bytes
+        self._lines = []
+        self._size = 0
+        self._first_at = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, line):
+        """Queue a line for the next batch"""
+        with self._cond:
+            self._lines.append(line)
+            self._size += len(line)
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+                self._cond.notify()
+            elif self._size >= self.max_bytes:
+                self._cond.notify()
+
+    def close(self):
+        """Flush anything pending and stop the flusher thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._lines and not self._closed:
+                    self._cond.wait()
+                while self._lines and not self._closed and self._size < self.max_bytes:
+                    remaining = self._first_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                lines = self._lines
+                done = self._closed
+                self._lines, self._size, self._first_at = [], 0, None
+
+            if lines:
+                self._emit(lines)
+            if done:
+                return
+
 class ProcessManager:
     """Manage background processes"""
     def __init__(self):
         self.processes = {}
         self.output_threads = {}
+        metrics.gauge('heychat_processes_running', 'Child processes currently running',
+                      collect=self.running_count)
 
     def start_process(self, process_id, command, description):
         """Start a new background process"""
@@ -52,11 +193,12 @@ class ProcessManager:
             )
 
             self.processes[process_id] = process
+            processes_started.inc(process_id)
 
             # Start output monitoring thread
             thread = threading.Thread(
                 target=self._monitor_output,
-                args=(process_id, process, description),
+                args=(process_id, process, description, time.monotonic()),
                 daemon=True
             )
             thread.start()
@@ -67,18 +209,23 @@ class ProcessManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def _monitor_output(self, process_id, process, description):
-        """Monitor process output and emit via WebSocket"""
+    def _monitor_output(self, process_id, process, description, started_at):
+        """Monitor process output and emit it in batches via WebSocket"""
+        batcher = OutputBatcher(lambda lines: socketio.emit('process_output', {
+            'process_id': process_id,
+            'lines': lines,
+            'timestamp': datetime.now().isoformat()
+        }))
+
         try:
             for line in iter(process.stdout.readline, ''):
                 if line:
-                    socketio.emit('process_output', {
-                        'process_id': process_id,
-                        'output': line,
-                        'timestamp': datetime.now().isoformat()
-                    })
+                    batcher.add(line)
 
             process.wait()
+            batcher.close()
+            process_duration.observe(time.monotonic() - started_at, process_id)
+            processes_exited.inc(process_id, 'success' if process.returncode == 0 else 'failure')
 
             socketio.emit('process_complete', {
                 'process_id': process_id,
@@ -88,6 +235,8 @@ class ProcessManager:
             })
 
         except Exception as e:
+            batcher.close()
+            processes_exited.inc(process_id, 'error')
             socketio.emit('process_error', {
                 'process_id': process_id,
                 'error': str(e),
@@ -128,8 +277,45 @@ class ProcessManager:
             "return_code": process.returncode if not is_running else None
         }
 
+    def running_count(self):
+        """Number of child processes still running"""
+        return sum(1 for process in list(self.processes.values()) if process.poll() is None)
+
 process_manager = ProcessManager()
 
+def invalidate_conversation_cache(*tags):
+    """Drop cached responses affected by a write to the given conversations"""
+    conversation_cache.invalidate(ALL_CONVERSATIONS, *tags)
+
+def conversation_store():
+    """Get the shared conversation store, wired to the response cache"""
+    store = get_store()
+    store.add_write_listener(invalidate_conversation_cache)
+    return store
+
+# Request metrics
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    http_in_flight.inc()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exc):
+    """Count and time every request; streamed responses are timed until the stream ends"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    http_in_flight.dec()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if exc else g.get('response_status', 500)
+    http_requests.inc(request.method, route, str(status))
+    http_latency.observe(time.perf_counter() - started, request.method, route)
+
 # Web Routes
 @app.route('/')
 def index():
@@ -181,27 +367,20 @@ def voice_status(process_id):
 # Database Endpoints
 @app.route('/api/conversations/list')
 def list_conversations():
-    """List recent conversations"""
+    """List recent conversations, one keyset page at a time"""
     try:
-        limit = request.args.get('limit', 20, type=int)
-        result = subprocess.run(
-            f'python3 view_conversations.py list --limit {limit} --format json',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
+        limit = min(request.args.get('limit', 20, type=int), MAX_PAGE_SIZE)
+        cursor = request.args.get('cursor') or None
+        page = conversation_cache.get_or_compute(
+            ('list', limit, cursor),
+            lambda: conversation_store().list_conversations_page(limit=limit, cursor=cursor),
+            tags=lambda page: tuple(f"conversation:{conv['id']}" for conv in page['conversations'])
+                              + (() if cursor else (ALL_CONVERSATIONS,))
         )
+        return jsonify({"success": True, **page})
 
-        if result.returncode == 0:
-            try:
-                data = json.loads(result.stdout)
-                return jsonify({"success": True, "conversations": data})
-            except json.JSONDecodeError:
-                return jsonify({"success": True, "conversations": [], "raw_output": result.stdout})
-        else:
-            return jsonify({"success": False, "error": result.stderr})
-
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -213,23 +392,12 @@ def search_conversations():
         if not search_term:
             return jsonify({"success": False, "error": "Search term required"})
 
-        result = subprocess.run(
-            f'python3 view_conversations.py search --search "{search_term}" --format json',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
+        results = conversation_cache.get_or_compute(
+            ('search', search_term),
+            lambda: conversation_store().search_conversations(search_term),
+            tags=(ALL_CONVERSATIONS,)
         )
-
-        if result.returncode == 0:
-            try:
-                data = json.loads(result.stdout)
-                return jsonify({"success": True, "results": data})
-            except json.JSONDecodeError:
-                return jsonify({"success": True, "results": [], "raw_output": result.stdout})
-        else:
-            return jsonify({"success": False, "error": result.stderr})
+        return jsonify({"success": True, "results": results})
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
@@ -238,23 +406,15 @@ def search_conversations():
 def show_conversation(session_id):
     """Show specific conversation"""
     try:
-        result = subprocess.run(
-            f'python3 view_conversations.py show --session-id {session_id} --format json',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
+        conversation = conversation_cache.get_or_compute(
+            ('show', session_id),
+            lambda: conversation_store().get_conversation(session_id),
+            tags=lambda conv: (f"session:{session_id}",) + ((f"conversation:{conv['id']}",) if conv else ())
         )
+        if conversation is None:
+            return jsonify({"success": False, "error": "Conversation not found"}), 404
 
-        if result.returncode == 0:
-            try:
-                data = json.loads(result.stdout)
-                return jsonify({"success": True, "conversation": data})
-            except json.JSONDecodeError:
-                return jsonify({"success": True, "conversation": {}, "raw_output": result.stdout})
-        else:
-            return jsonify({"success": False, "error": result.stderr})
+        return jsonify({"success": True, "conversation": conversation})
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
@@ -263,55 +423,88 @@ def show_conversation(session_id):
 def conversation_stats():
     """Get database statistics"""
     try:
-        result = subprocess.run(
-            'python3 view_conversations.py stats --format json',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
+        stats = conversation_cache.get_or_compute(
+            ('stats',),
+            lambda: conversation_store().get_stats(),
+            tags=(ALL_CONVERSATIONS,)
         )
-
-        if result.returncode == 0:
-            try:
-                data = json.loads(result.stdout)
-                return jsonify({"success": True, "stats": data})
-            except json.JSONDecodeError:
-                return jsonify({"success": True, "stats": {}, "raw_output": result.stdout})
-        else:
-            return jsonify({"success": False, "error": result.stderr})
+        return jsonify({"success": True, "stats": stats})
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/conversations/export/<session_id>')
 def export_conversation(session_id):
-    """Export conversation"""
+    """Export conversation as a chunked stream (json, ndjson or txt)"""
     try:
         format_type = request.args.get('format', 'json')
-        output_file = f'/tmp/conversation_{session_id}.{format_type}'
-
-        result = subprocess.run(
-            f'python3 view_conversations.py export --session-id {session_id} --format {format_type} --output {output_file}',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
+        if format_type not in EXPORT_FORMATS:
+            return jsonify({"success": False, "error": f"Unsupported format: {format_type}"}), 400
+
+        chunks = conversation_store().export_stream(session_id, format_type)
+        if chunks is None:
+            return jsonify({"success": False, "error": "Conversation not found"}), 404
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[format_type],
+            headers={"Content-Disposition": f'attachment; filename="conversation_{session_id}.{format_type}"'}
         )
 
-        if result.returncode == 0 and os.path.exists(output_file):
-            return send_file(
-                output_file,
-                as_attachment=True,
-                download_name=f'conversation_{session_id}.{format_type}'
-            )
-        else:
-            return jsonify({"success": False, "error": result.stderr})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/conversations/archive')
+def archive_conversations():
+    """Bulk export conversations as a gzip-compressed NDJSON stream"""
+    try:
+        since = request.args.get('since')
+        until = request.args.get('until')
+        activity = request.args.get('activity', 'all')
+        if activity not in ACTIVITY_FILTERS:
+            return jsonify({"success": False, "error": f"Unknown activity filter: {activity}"}), 400
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+
+        chunks = iter_gzip(iter_ndjson(conversation_store(), since, until, activity))
+        filename = f"heychat_archive_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
+        return Response(
+            stream_with_context(chunks),
+            mimetype='application/gzip',
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
 
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/conversations/import', methods=['POST'])
+def import_conversations():
+    """Load a gzip-compressed NDJSON archive (request body or multipart 'file')"""
+    try:
+        upload = request.files.get('file')
+        source = upload.stream if upload else request.stream
+        stats = import_archive(conversation_store(), source)
+        # Imported conversations keep their old updated_at, so they can land on any list page
+        conversation_cache.clear()
+        return jsonify({"success": True, "imported": stats})
+
+    except (ValueError, OSError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/metrics')
+def prometheus_metrics():
+    """Request, Socket.IO and child process metrics in Prometheus text format"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Get response cache hit/miss counters"""
+    return jsonify({"success": True, "cache": conversation_cache.stats()})
+
 # System Endpoints
 @app.route('/api/system/info')
 def system_info():
@@ -322,7 +515,8 @@ def system_info():
         "log_dir_exists": LOG_DIR.exists(),
         "env_file": str(ENV_FILE),
         "env_file_exists": ENV_FILE.exists(),
-        "python_version": subprocess.run(['python3', '--version'], capture_output=True, text=True).stdout.strip(),
+        "python_version": f"Python {platform.python_version()}",
+        "server_mode": SERVER_MODE,
         "timestamp": datetime.now().isoformat()
     }
     return jsonify(info)
@@ -352,19 +546,13 @@ def get_logs():
 def test_connection():
     """Test database connection"""
     try:
-        result = subprocess.run(
-            'python3 supabase_viewer.py info',
-            shell=True,
-            capture_output=True,
-            text=True,
-            cwd=BASE_DIR,
-            timeout=10
-        )
+        store = conversation_store()
+        store.ping()
 
         return jsonify({
-            "success": result.returncode == 0,
-            "output": result.stdout,
-            "error": result.stderr if result.returncode != 0 else None
+            "success": True,
+            "output": f"Database connection successful ({store.backend.name})",
+            "error": None
         })
 
     except Exception as e:
@@ -408,11 +596,15 @@ def main():
     📡 API: http://localhost:{port}/api
     🎨 Web UI: http://localhost:{port}
     🔌 WebSocket: ws://localhost:{port}/socket.io
+    ⚙️  Mode: {SERVER_MODE}
 
     Press Ctrl+C to stop
     """)
 
-    socketio.run(app, host='0.0.0.0', port=port, debug=False, allow_unsafe_werkzeug=True)
+    if SERVER_MODE == 'threading':
+        socketio.run(app, host='0.0.0.0', port=port, debug=False, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, host='0.0.0.0', port=port, debug=False)
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,13 @@
 #!/bin/bash
 # HeyChat Web Server Launcher
 # Starts the Flask web server for HeyChat
+#
+# Usage: ./launch_web_server.sh [--mode threading|gevent|eventlet]
+#   threading - Werkzeug development server, one thread per request (default)
+#   gevent    - Async worker model for many concurrent HTTP/WebSocket clients
+#   eventlet  - Alternative async worker model
+# The async modes only pay off with PostgreSQL: SQLite queries cannot yield,
+# so under gevent/eventlet each one blocks every other client while it runs.
 
 set -e
 
@@ -14,6 +21,34 @@ YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m' # No Color
 
+# Parse arguments
+SERVER_MODE="${HEYCHAT_SERVER_MODE:-threading}"
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --mode)
+            SERVER_MODE="$2"
+            shift 2
+            ;;
+        --mode=*)
+            SERVER_MODE="${1#--mode=}"
+            shift
+            ;;
+        *)
+            echo -e "${RED}Unknown option: $1${NC}"
+            echo "Usage: $0 [--mode threading|gevent|eventlet]"
+            exit 1
+            ;;
+    esac
+done
+
+case "$SERVER_MODE" in
+    threading|gevent|eventlet) ;;
+    *)
+        echo -e "${RED}Error: unknown server mode '$SERVER_MODE' (use threading, gevent or eventlet)${NC}"
+        exit 1
+        ;;
+esac
+
 echo -e "${BLUE}╔════════════════════════════════════════════╗${NC}"
 echo -e "${BLUE}║   HeyChat Web Server Launcher              ║${NC}"
 echo -e "${BLUE}║   Voice AI Assistant - HTTP Interface      ║${NC}"
@@ -52,6 +87,15 @@ else
     pip install -q flask flask-cors flask-socketio python-socketio python-engineio werkzeug
 fi
 
+# Async worker dependencies
+if [ "$SERVER_MODE" = "gevent" ]; then
+    pip install -q gevent gevent-websocket
+    echo -e "${GREEN}✓${NC} gevent installed"
+elif [ "$SERVER_MODE" = "eventlet" ]; then
+    pip install -q eventlet
+    echo -e "${GREEN}✓${NC} eventlet installed"
+fi
+
 # Check if environment file exists
 ENV_FILE="$HOME/.config/voice-chatgpt/.env"
 if [ ! -f "$ENV_FILE" ]; then
@@ -59,6 +103,18 @@ if [ ! -f "$ENV_FILE" ]; then
     echo "Some features may not work without proper configuration."
 fi
 
+# SQLite calls block the event loop in the async modes
+if [ "$SERVER_MODE" != "threading" ]; then
+    DATABASE_URL="${HEYCHAT_DATABASE_URL:-$(grep -s '^HEYCHAT_DATABASE_URL=' "$ENV_FILE" | tail -n 1 | cut -d= -f2- | tr -d "\"'")}"
+    case "$DATABASE_URL" in
+        postgresql://*|postgres://*) ;;
+        *)
+            echo -e "${YELLOW}⚠${NC}  $SERVER_MODE mode with the SQLite backend: every query blocks all other clients while it runs"
+            echo "   Set HEYCHAT_DATABASE_URL=postgresql://... or use --mode threading."
+            ;;
+    esac
+fi
+
 # Make scripts executable
 chmod +x voice-chatgpt.sh 2>/dev/null || true
 chmod +x quick-ask.sh 2>/dev/null || true
@@ -80,10 +136,11 @@ echo -e "${BLUE}━━━━━━━━━━━━━━━━━━━━━
 echo -e "${GREEN}🌐 Web UI:${NC}      http://localhost:5000"
 echo -e "${GREEN}📡 API:${NC}         http://localhost:5000/api"
 echo -e "${GREEN}🔌 WebSocket:${NC}   ws://localhost:5000/socket.io"
+echo -e "${GREEN}⚙️  Mode:${NC}        $SERVER_MODE"
 echo -e "${BLUE}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━${NC}"
 echo ""
 echo -e "${YELLOW}Press Ctrl+C to stop the server${NC}"
 echo ""
 
 # Start server
-python3 heychat_web_server.py
+HEYCHAT_SERVER_MODE="$SERVER_MODE" python3 heychat_web_server.py
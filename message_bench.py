@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+HeyChat Message Insert Benchmark
+Times the per-row write path (``add_message``, one transaction per message)
+against the batched one (``add_messages``: COPY or multi-row INSERTs on
+PostgreSQL, one prepared INSERT per row on SQLite, one transaction per
+batch) for synthetic conversations of the given sizes.
+
+By default every run uses a throwaway SQLite database in a temporary
+directory. With --database-url each run writes a new conversation there and
+deletes it afterwards (message triggers, summaries and indexes included).
+
+Usage:
+    python3 message_bench.py
+    python3 message_bench.py --rows 1000 100000 1000000 --batch-size 10000
+    python3 message_bench.py --database-url postgresql://localhost/heychat_bench
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from conversation_store import StoreError, get_store
+
+DEFAULT_ROWS = (1000, 100_000, 1_000_000)
+DEFAULT_BATCH_SIZE = 10_000
+METHODS = ('per-row', 'batched')
+
+
+def synthetic_messages(count, started=datetime(2025, 1, 1)):
+    """Alternating user/assistant rows for add_messages, one second apart"""
+    for i in range(count):
+        role = 'user' if i % 2 == 0 else 'assistant'
+        yield ((started + timedelta(seconds=i)).strftime("%Y%m%d%H%M%S"), role,
+               f"Benchmark message {i}: the quick brown fox jumps over the lazy dog.",
+               None, 0.95 if role == 'user' else None, None)
+
+
+def run(store, method, count, batch_size):
+    """Insert ``count`` messages into a new conversation; returns (seconds, ids)"""
+    conv_id = store.create_conversation(f"bench_{uuid.uuid4().hex[:12]}", "Insert benchmark")
+    ids = []
+    try:
+        started = time.perf_counter()
+        if method == 'per-row':
+            for row in synthetic_messages(count):
+                ids.append(store.add_message(conv_id, *row))
+        else:
+            batch = []
+            for row in synthetic_messages(count):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    ids.extend(store.add_messages(conv_id, batch))
+                    batch.clear()
+            ids.extend(store.add_messages(conv_id, batch))
+        return time.perf_counter() - started, ids
+    finally:
+        with store.backend.pool.connection() as conn:
+            conn.execute(store.backend.sql("DELETE FROM conversations WHERE id = ?"), (conv_id,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat message insert benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS),
+                        help=f'Conversation sizes to time (default: {" ".join(map(str, DEFAULT_ROWS))})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Messages per add_messages call (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=list(METHODS),
+                        help='Write paths to time (default: both)')
+    parser.add_argument('--database-url', help='Database to write to (default: a throwaway SQLite file)')
+
+    args = parser.parse_args()
+
+    print("⏱️  Message Insert Benchmark")
+    print("=" * 30)
+    print(f"{'rows':>10}{'method':>10}{'seconds':>10}{'rows/s':>12}{'speedup':>9}")
+    try:
+        with tempfile.TemporaryDirectory(prefix='heychat_bench_') as tmp:
+            for count in args.rows:
+                baseline = None
+                for method in args.methods:
+                    url = args.database_url or f"sqlite:///{Path(tmp) / f'{method}_{count}.db'}"
+                    store = get_store(url)
+                    try:
+                        seconds, ids = run(store, method, count, args.batch_size)
+                    finally:
+                        store.backend.pool.close()
+                    if len(ids) != count or len(set(ids)) != count:
+                        raise StoreError(f"{method} returned {len(set(ids))} distinct ids for {count} rows")
+                    baseline = baseline or seconds
+                    print(f"{count:>10,}{method:>10}{seconds:>10.2f}{count / seconds:>12,.0f}"
+                          f"{baseline / seconds:>8.1f}x")
+    except StoreError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+HeyChat Message Partitions (PostgreSQL)
+Maintenance and retention for the monthly partitions of ``messages`` (see
+schema.sql): creates future partitions, and detaches months older than the
+retention window, archives each one to a gzip-compressed CSV file and drops
+it. Conversation summaries of the affected conversations are rebuilt when a
+month is detached.
+
+A detached month that has not been archived yet (e.g. the previous run was
+interrupted) is archived on the next run.
+
+Usage:
+    python3 message_partitions.py list
+    python3 message_partitions.py maintain --months-ahead 3
+    python3 message_partitions.py retain --keep-months 12 --archive-dir ~/heychat-archive
+    python3 message_partitions.py retain --keep-months 12 --dry-run
+
+Restoring an archived month (psql):
+    CREATE TABLE messages_2024_01 (LIKE messages INCLUDING DEFAULTS INCLUDING GENERATED);
+    \\copy messages_2024_01 (id, conversation_id, ...) FROM PROGRAM 'gunzip -c messages_2024_01.csv.gz' CSV HEADER
+    ALTER TABLE messages ATTACH PARTITION messages_2024_01
+        FOR VALUES FROM ('2024-01-01') TO ('2024-02-01');
+    SELECT refresh_conversation_summary(conversation_id)
+    FROM (SELECT DISTINCT conversation_id FROM messages_2024_01) restored;
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from conversation_archive import COMPRESS_LEVEL
+from conversation_store import CONFIG_DIR, StoreError, get_store, read_setting
+
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_KEEP_MONTHS = 12
+DEFAULT_ARCHIVE_DIR = CONFIG_DIR / 'archive'
+ARCHIVE_COLUMNS = ('id', 'conversation_id', 'seq', 'timestamp_str', 'role', 'content', 'audio_file_path',
+                   'transcription_confidence', 'created_at', 'metadata')
+_PARTITION_NAME = re.compile(r"^messages_(\d{4})_(\d{2})$")
+
+
+def month_of(name):
+    """First day of the month a messages_YYYY_MM partition holds, or None"""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def months_before(day, months):
+    """First day of the month ``months`` months before ``day``'s month"""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionManager:
+    """Monthly partition maintenance over a PostgreSQL conversation store"""
+
+    def __init__(self, store):
+        if store.backend.name != 'postgres':
+            raise StoreError("Message partitions need the PostgreSQL backend (HEYCHAT_DATABASE_URL=postgresql://...)")
+        self.store = store
+        self.backend = store.backend
+
+    def partitions(self):
+        """Monthly partition tables, oldest first, attached or not"""
+        with self.backend.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT c.relname AS name, i.inhparent IS NOT NULL AS attached,
+                       GREATEST(c.reltuples, 0)::BIGINT AS estimated_rows,
+                       pg_total_relation_size(c.oid) AS bytes
+                FROM pg_class c
+                LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+                WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace
+                  AND c.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+                ORDER BY c.relname
+            """).fetchall()
+        return [dict(row, month=month_of(row['name'])) for row in rows]
+
+    def maintain(self, months_ahead=DEFAULT_MONTHS_AHEAD):
+        """Create missing partitions up to ``months_ahead`` months out; returns how many"""
+        with self.backend.pool.connection() as conn:
+            return conn.execute(self.backend.sql("SELECT maintain_message_partitions(?) AS created"),
+                                (months_ahead,)).fetchone()['created']
+
+    def expired(self, keep_months=DEFAULT_KEEP_MONTHS, today=None):
+        """Partitions entirely older than the last ``keep_months`` months"""
+        cutoff = months_before(today or date.today(), keep_months - 1)
+        return [partition for partition in self.partitions() if partition['month'] < cutoff]
+
+    def detach(self, name):
+        """Detach a partition and rebuild the summaries of the conversations it held"""
+        with self.backend.pool.connection() as conn:
+            conn.execute(f'ALTER TABLE messages DETACH PARTITION "{name}"')
+            rows = conn.execute(f"""
+                SELECT conversation_id, refresh_conversation_summary(conversation_id)
+                FROM (SELECT DISTINCT conversation_id FROM "{name}") detached
+            """).fetchall()
+        self.store.notify_write(*(f"conversation:{row['conversation_id']}" for row in rows))
+
+    def archive(self, name, archive_dir):
+        """Copy a detached partition to <archive_dir>/<name>.csv.gz and drop it; returns (path, rows)"""
+        archive_dir = Path(archive_dir).expanduser()
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f"{name}.csv.gz"
+        temp = path.with_suffix('.tmp')
+        columns = ', '.join(ARCHIVE_COLUMNS)
+
+        with self.backend.pool.connection() as conn:
+            with open(temp, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=COMPRESS_LEVEL) as f:
+                    with conn.cursor().copy(f'COPY (SELECT {columns} FROM "{name}" ORDER BY conversation_id, seq) '
+                                            'TO STDOUT (FORMAT csv, HEADER)') as copy:
+                        for data in copy:
+                            f.write(data)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temp, path)
+            rows = conn.execute(f'SELECT COUNT(*) AS messages FROM "{name}"').fetchone()['messages']
+            # Only dropped once the archive is safely on disk
+            conn.execute(f'DROP TABLE "{name}"')
+        return path, rows
+
+
+def _format_bytes(size):
+    size = float(size)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat message partition maintenance and retention (PostgreSQL)')
+    parser.add_argument('command', choices=['list', 'maintain', 'retain'])
+    parser.add_argument('--months-ahead', type=int, default=DEFAULT_MONTHS_AHEAD,
+                        help=f'Partitions to keep ready beyond this month (default: {DEFAULT_MONTHS_AHEAD})')
+    parser.add_argument('--keep-months', type=int,
+                        default=int(read_setting('HEYCHAT_RETENTION_MONTHS', DEFAULT_KEEP_MONTHS)),
+                        help='Months of messages to keep online, this one included '
+                             f'(HEYCHAT_RETENTION_MONTHS, default: {DEFAULT_KEEP_MONTHS})')
+    parser.add_argument('--archive-dir', default=read_setting('HEYCHAT_ARCHIVE_DIR', str(DEFAULT_ARCHIVE_DIR)),
+                        help=f'Where archived months go (HEYCHAT_ARCHIVE_DIR, default: {DEFAULT_ARCHIVE_DIR})')
+    parser.add_argument('--dry-run', action='store_true', help='Show what retain would archive')
+
+    args = parser.parse_args()
+    if args.keep_months < 1:
+        parser.error("--keep-months must be at least 1")
+
+    try:
+        manager = PartitionManager(get_store())
+
+        if args.command == 'list':
+            for partition in manager.partitions():
+                state = "attached" if partition['attached'] else "detached, not archived"
+                print(f"📅 {partition['name']}: ~{partition['estimated_rows']:,} rows, "
+                      f"{_format_bytes(partition['bytes'])} ({state})")
+            return
+
+        if args.command == 'maintain' or not args.dry_run:
+            created = manager.maintain(args.months_ahead)
+            print(f"🗓️  Created {created} message partition(s)")
+        if args.command == 'maintain':
+            return
+
+        expired = manager.expired(args.keep_months)
+        if not expired:
+            print(f"✅ Nothing older than {args.keep_months} month(s) to archive")
+            return
+        for partition in expired:
+            if args.dry_run:
+                print(f"🔍 Would archive {partition['name']} (~{partition['estimated_rows']:,} rows, "
+                      f"{_format_bytes(partition['bytes'])})")
+                continue
+            started = time.perf_counter()
+            if partition['attached']:
+                manager.detach(partition['name'])
+            path, rows = manager.archive(partition['name'], args.archive_dir)
+            print(f"📦 Archived {partition['name']}: {rows:,} messages → {path} "
+                  f"({_format_bytes(path.stat().st_size)}) in {time.perf_counter() - started:.1f}s")
+    except StoreError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+HeyChat OpenAI Client
+Minimal client for the transcription and chat completion endpoints that keeps
+one HTTP keep-alive connection per thread, so turns after the first skip the
+TCP and TLS handshakes. Standard library only.
+
+Point it at a local stub server with OPENAI_BASE_URL (e.g. http://127.0.0.1:8089/v1).
+"""
+
+import http.client
+import json
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from conversation_store import read_setting
+
+DEFAULT_API_BASE = 'https://api.openai.com/v1'
+DEFAULT_CHAT_MODEL = 'gpt-4o-mini'
+DEFAULT_TRANSCRIBE_MODEL = 'whisper-1'
+
+# Errors that mean the server closed an idle keep-alive connection; the
+# request is retried once on a fresh connection
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError
+)
+
+
+class OpenAIError(Exception):
+    """API request failed (HTTP error or unexpected response)"""
+
+
+class OpenAIClient:
+    """OpenAI REST client over persistent per-thread connections"""
+
+    def __init__(self, api_key=None, base_url=None, timeout=60):
+        self.api_key = api_key if api_key is not None else read_setting('OPENAI_API_KEY', '')
+        self.base_url = (base_url or read_setting('OPENAI_BASE_URL', DEFAULT_API_BASE)).rstrip('/')
+        self.timeout = timeout
+
+        parts = urlsplit(self.base_url)
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path
+        self._local = threading.local()
+        self.connections_opened = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connection_class(self._host, self._port, timeout=self.timeout)
+            self._local.conn = conn
+            self.connections_opened += 1
+        return conn
+
+    def _reset_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, method, path, body=None, headers=None, timing=None):
+        """Send a request and return the open HTTPResponse.
+
+        The caller must read the response to the end before the next request
+        on this thread, so the connection can be reused. If ``timing`` is a
+        dict, the seconds spent sending the request are added to its 'upload'.
+        """
+        request_headers = {"Authorization": f"Bearer {self.api_key}"}
+        request_headers.update(headers or {})
+
+        for attempt in range(2):
+            conn = self._connection()
+            started = time.perf_counter()
+            try:
+                conn.request(method, self._path + path, body=body, headers=request_headers)
+                if timing is not None:
+                    timing['upload'] = timing.get('upload', 0.0) + time.perf_counter() - started
+                return conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                self._reset_connection()
+                if attempt:
+                    raise
+            except (OSError, http.client.HTTPException):
+                self._reset_connection()
+                raise
+
+    def _json_response(self, response):
+        data = response.read()
+        if response.status >= 400:
+            try:
+                message = json.loads(data)['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = data.decode('utf-8', 'replace')[:200]
+            raise OpenAIError(f"HTTP {response.status}: {message}")
+        try:
+            return json.loads(data)
+        except ValueError:
+            raise OpenAIError("Invalid JSON response")
+
+    def transcribe(self, audio, filename='audio.wav', content_type='audio/wav',
+                   model=DEFAULT_TRANSCRIBE_MODEL, timing=None):
+        """Transcribe audio bytes with Whisper and return the text.
+
+        ``timing`` (a dict) receives the seconds spent sending the audio
+        ('upload') and waiting for the transcript ('transcribe').
+        """
+        boundary = uuid.uuid4().hex
+        body = b''.join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="model"\r\n\r\n{model}\r\n'.encode(),
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode(),
+            audio,
+            f'\r\n--{boundary}--\r\n'.encode()
+        ])
+        started = time.perf_counter()
+        sent = {}
+        response = self.request('POST', '/audio/transcriptions', body, {
+            "Content-Type": f"multipart/form-data; boundary={boundary}"
+        }, timing=sent)
+        result = self._json_response(response)
+        if timing is not None:
+            upload = sent.get('upload', 0.0)
+            timing['upload'] = timing.get('upload', 0.0) + upload
+            timing['transcribe'] = (timing.get('transcribe', 0.0)
+                                    + time.perf_counter() - started - upload)
+        return (result.get('text') or '').strip()
+
+    def chat(self, messages, model=None, **params):
+        """Run a chat completion and return the assistant's reply"""
+        body = json.dumps({"model": model or default_chat_model(), "messages": messages, **params})
+        response = self.request('POST', '/chat/completions', body.encode('utf-8'), {
+            "Content-Type": "application/json"
+        })
+        result = self._json_response(response)
+        try:
+            return result['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            raise OpenAIError("Unexpected chat completion response")
+
+    def chat_stream(self, messages, model=None, **params):
+        """Run a streaming chat completion, yielding content deltas as they arrive.
+
+        Consumes the server-sent event stream to the end so the connection
+        can be reused.
+        """
+        body = json.dumps({"model": model or default_chat_model(), "messages": messages,
+                           "stream": True, **params})
+        response = self.request('POST', '/chat/completions', body.encode('utf-8'), {
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        })
+        if response.status >= 400:
+            self._json_response(response)
+
+        try:
+            for line in response:
+                line = line.strip()
+                if not line.startswith(b'data:'):
+                    continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                try:
+                    choice = json.loads(data)['choices'][0]
+                except (ValueError, KeyError, IndexError):
+                    raise OpenAIError("Malformed chat completion stream")
+                content = (choice.get('delta') or {}).get('content')
+                if content:
+                    yield content
+            response.read()
+        except BaseException:
+            # Abandoned or broken mid-stream: the connection can't be reused
+            self._reset_connection()
+            raise
+
+    def close(self):
+        """Close this thread's connection"""
+        self._reset_connection()
+
+
+def default_chat_model():
+    """Chat model from CHATGPT_MODEL, as the voice scripts use"""
+    return read_setting('CHATGPT_MODEL', DEFAULT_CHAT_MODEL)
@@ -19,20 +19,31 @@ mkdir -p "$LOG_DIR"
 # Record 5 seconds
 rec "$AUDIO" trim 0 5 2>/dev/null
 
+# Trim silence, downsample to 16 kHz and compress (FLAC by default) before
+# uploading; prints the bytes saved. Falls back to the raw recording.
+UPLOAD=$(python3 "$(dirname "$0")/audio_prep.py" "$AUDIO" \
+  --codec "${HEYCHAT_UPLOAD_CODEC:-flac}" --output "$LOG_DIR/q_${TIMESTAMP}_upload") || UPLOAD="$AUDIO"
+
 TRANSCRIPT=$(curl -s https://api.openai.com/v1/audio/transcriptions \
   -H "Authorization: Bearer $OPENAI_API_KEY" \
-  -F file="@$AUDIO" \
+  -F file="@$UPLOAD" \
   -F model="whisper-1" | jq -r '.text')
 
 echo "You: $TRANSCRIPT"
 
-RESPONSE=$(curl -s https://api.openai.com/v1/chat/completions \
-  -H "Authorization: Bearer $OPENAI_API_KEY" \
-  -H "Content-Type: application/json" \
-  -d "{\"model\":\"$CHATGPT_MODEL\",\"messages\":[{\"role\":\"user\",\"content\":\"$TRANSCRIPT\"}]}" | \
-  jq -r '.choices[0].message.content')
+if [ "${HEYCHAT_ANSWER_CACHE:-0}" = "1" ]; then
+    # Reuse answers to repeated questions (see answer_cache.py); prints hit rate and time saved
+    export OPENAI_API_KEY CHATGPT_MODEL
+    RESPONSE=$(python3 "$(dirname "$0")/answer_cache.py" ask "$TRANSCRIPT")
+else
+    RESPONSE=$(curl -s https://api.openai.com/v1/chat/completions \
+      -H "Authorization: Bearer $OPENAI_API_KEY" \
+      -H "Content-Type: application/json" \
+      -d "{\"model\":\"$CHATGPT_MODEL\",\"messages\":[{\"role\":\"user\",\"content\":\"$TRANSCRIPT\"}]}" | \
+      jq -r '.choices[0].message.content')
+fi
 
 echo "$RESPONSE"
 say "$RESPONSE"
 
-rm "$AUDIO"
\ No newline at end of file
+rm -f "$AUDIO" "$UPLOAD"
\ No newline at end of file
@@ -4,7 +4,19 @@
 -- Create the database (run this separately)
 -- CREATE DATABASE heychat;
 
--- Connect to heychat database and create tables
+-- Connect to heychat database and create tables. Upgrading an existing
+-- install moves its messages into a partitioned table; run the file as one
+-- transaction so a failure leaves the old tables untouched:
+--   psql --single-transaction -v ON_ERROR_STOP=1 -d heychat -f schema.sql
+
+-- Partitioned messages with BEFORE row triggers need PostgreSQL 13 or newer
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::INTEGER < 130000 THEN
+        RAISE EXCEPTION 'HeyChat needs PostgreSQL 13 or newer (this server is %)',
+            current_setting('server_version');
+    END IF;
+END $$;
 
 -- Conversations table - represents distinct conversation sessions
 CREATE TABLE IF NOT EXISTS conversations (
@@ -14,20 +26,176 @@ CREATE TABLE IF NOT EXISTS conversations (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT TRUE,          -- Whether conversation is still active
-    metadata JSONB                           -- Additional metadata (TTS settings, etc.)
+    metadata JSONB,                          -- Additional metadata (TTS settings, etc.)
+    last_seq BIGINT NOT NULL DEFAULT 0       -- Highest messages.seq handed out
 );
 
--- Messages table - stores individual messages within conversations
+-- Messages table - stores individual messages within conversations.
+-- Range-partitioned by month of created_at (messages_YYYY_MM tables, created
+-- ahead of time by maintain_message_partitions() below), so old months can be
+-- detached and archived whole (message_partitions.py retain) and queries
+-- bounded by created_at only touch recent partitions. PostgreSQL requires the
+-- partition key in every unique index, hence the (id, created_at) primary key.
+CREATE SEQUENCE IF NOT EXISTS messages_id_seq;
+
+-- Upgrade existing installs: an unpartitioned messages table is set aside
+-- here and its rows are copied into the partitions further down
+DO $$
+DECLARE
+    idx RECORD;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('messages') AND relkind = 'r') THEN
+        ALTER TABLE messages RENAME TO messages_unpartitioned;
+        ALTER SEQUENCE messages_id_seq OWNED BY NONE;
+        FOR idx IN SELECT indexname FROM pg_indexes
+                   WHERE schemaname = current_schema() AND tablename = 'messages_unpartitioned' LOOP
+            EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.indexname, idx.indexname || '_unpartitioned');
+        END LOOP;
+    END IF;
+END $$;
+
 CREATE TABLE IF NOT EXISTS messages (
-    id SERIAL PRIMARY KEY,
+    id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
     conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    seq BIGINT NOT NULL,                     -- Position in the conversation (1, 2, ...), set on insert
     timestamp_str VARCHAR(14) NOT NULL,      -- yyyymmddhhmmss format as requested
     role VARCHAR(20) NOT NULL,               -- 'user' or 'assistant'
     content TEXT NOT NULL,                   -- The actual message content
     audio_file_path VARCHAR(500),            -- Path to audio file if available
     transcription_confidence DECIMAL(3,2),   -- Confidence score from Whisper
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    metadata JSONB                           -- Additional message metadata
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Partition key
+    metadata JSONB,                          -- Additional message metadata
+    content_tsv TSVECTOR                     -- Full-text search vector, maintained by PostgreSQL
+        GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+ALTER SEQUENCE messages_id_seq OWNED BY messages.id;
+
+-- Catches rows outside every monthly partition (e.g. imported history);
+-- maintain_message_partitions() moves them into partitions of their own
+CREATE TABLE IF NOT EXISTS messages_default PARTITION OF messages DEFAULT;
+
+-- Function to create the partition for the month containing month_start,
+-- moving any of that month's rows out of messages_default first
+CREATE OR REPLACE FUNCTION create_message_partition(month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    lower_bound DATE := date_trunc('month', month_start)::DATE;
+    upper_bound DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'messages_' || to_char(month_start, 'YYYY_MM');
+    column_list TEXT := 'id, conversation_id, seq, timestamp_str, role, content, audio_file_path, '
+                    'transcription_confidence, created_at, metadata';
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM messages_default WHERE created_at >= lower_bound AND created_at < upper_bound) THEN
+        EXECUTE format('CREATE TABLE %I (LIKE messages INCLUDING DEFAULTS INCLUDING GENERATED)', partition_name);
+        EXECUTE format('WITH moved AS (DELETE FROM messages_default WHERE created_at >= %L AND created_at < %L '
+                       'RETURNING %s) INSERT INTO %I (%s) SELECT %s FROM moved',
+                       lower_bound, upper_bound, column_list, partition_name, column_list, column_list);
+        EXECUTE format('ALTER TABLE messages ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, lower_bound, upper_bound);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                       partition_name, lower_bound, upper_bound);
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to create partitions for this month and the next months_ahead
+-- months, plus any month stranded in messages_default; returns how many
+-- were created. Run it at least monthly (pg_cron job below, or
+-- `python3 message_partitions.py maintain`).
+CREATE OR REPLACE FUNCTION maintain_message_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    created INTEGER := 0;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', created_at)::DATE FROM messages_default
+        UNION
+        SELECT generate_series(date_trunc('month', CURRENT_DATE),
+                               date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+                               INTERVAL '1 month')::DATE
+    LOOP
+        IF to_regclass('messages_' || to_char(month_start, 'YYYY_MM')) IS NULL THEN
+            PERFORM create_message_partition(month_start);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT maintain_message_partitions();
+
+-- Copy the rows of a set-aside unpartitioned messages table (see the upgrade
+-- above) and drop it once every row is accounted for. This runs before the
+-- message triggers are created, so seq numbers are carried over untouched;
+-- messages from before seq existed are numbered after the conversation's
+-- highest seq in their old (timestamp, id) order.
+DO $$
+DECLARE
+    expected BIGINT;
+    copied BIGINT;
+BEGIN
+    IF to_regclass('messages_unpartitioned') IS NOT NULL THEN
+        ALTER TABLE messages_unpartitioned ADD COLUMN IF NOT EXISTS seq BIGINT;
+        PERFORM create_message_partition(months.month_start)
+        FROM (SELECT DISTINCT date_trunc('month', COALESCE(created_at, CURRENT_TIMESTAMP))::DATE AS month_start
+              FROM messages_unpartitioned) months;
+        SELECT COUNT(*) INTO expected FROM messages_unpartitioned;
+        INSERT INTO messages (id, conversation_id, seq, timestamp_str, role, content, audio_file_path,
+                              transcription_confidence, created_at, metadata)
+        SELECT id, conversation_id,
+               COALESCE(seq, COALESCE(MAX(seq) OVER (PARTITION BY conversation_id), 0)
+                             + ROW_NUMBER() OVER (PARTITION BY conversation_id, seq IS NULL
+                                                  ORDER BY timestamp_str, id)),
+               timestamp_str, role, content, audio_file_path, transcription_confidence,
+               COALESCE(created_at, CURRENT_TIMESTAMP), metadata
+        FROM messages_unpartitioned;
+        GET DIAGNOSTICS copied = ROW_COUNT;
+        IF copied <> expected THEN
+            RAISE EXCEPTION 'Copied % of % messages into the partitioned table; messages_unpartitioned kept',
+                copied, expected;
+        END IF;
+        DROP TABLE messages_unpartitioned;
+        RAISE NOTICE 'Moved % messages into the partitioned messages table', copied;
+    END IF;
+END $$;
+
+-- Create future partitions daily where pg_cron is installed
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('heychat-message-partitions', '15 3 * * *',
+                              'SELECT maintain_message_partitions()');
+    END IF;
+END $$;
+
+-- Upgrade existing installs to the full-text search column
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+-- Upgrade existing installs to per-conversation message sequence numbers
+-- (counters catch up with the copied messages further down)
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS last_seq BIGINT NOT NULL DEFAULT 0;
+
+-- Conversation summaries - one row per conversation with messages, kept up
+-- to date by the message insert trigger and fusion so that listings and
+-- statistics never aggregate over messages
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    conversation_id INTEGER PRIMARY KEY REFERENCES conversations(id) ON DELETE CASCADE,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    first_message VARCHAR(14),               -- Earliest message timestamp_str
+    last_message VARCHAR(14),                -- Latest message timestamp_str
+    duration_seconds BIGINT NOT NULL DEFAULT 0,  -- last_message - first_message
+    last_message_preview TEXT,               -- First 200 characters of the newest message
+    last_message_at TIMESTAMP                -- created_at of the newest message
 );
 
 -- Conversation fusions table - tracks when conversations are merged
@@ -37,21 +205,45 @@ CREATE TABLE IF NOT EXISTS conversation_fusions (
     target_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
     fused_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     fusion_reason TEXT,                      -- Why the conversations were fused
-    metadata JSONB
+    metadata JSONB,
+    surviving_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE
+                                             -- Where the source's messages live now (follows later fusions)
 );
 
+-- Upgrade existing installs to fusion lineage (filled in further down)
+ALTER TABLE conversation_fusions ADD COLUMN IF NOT EXISTS surviving_conversation_id INTEGER
+    REFERENCES conversations(id) ON DELETE CASCADE;
+
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_conversations_session_id ON conversations(session_id);
 CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations(created_at);
 CREATE INDEX IF NOT EXISTS idx_conversations_active ON conversations(is_active);
+-- Keyset pagination: ORDER BY updated_at DESC, id DESC with (updated_at, id) < cursor
+CREATE INDEX IF NOT EXISTS idx_conversations_updated_id ON conversations(updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_active_updated_id ON conversations(is_active, updated_at DESC, id DESC);
 
 CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
+-- History loads: WHERE conversation_id = ? ORDER BY seq is an index range
+-- scan per partition, merged in order, no sort. role is carried in the index;
+-- content is not, since a btree entry is capped at ~2.7 kB and replies are
+-- often longer. Not UNIQUE: unique indexes must include the partition key.
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_seq ON messages(conversation_id, seq) INCLUDE (role);
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp_str ON messages(timestamp_str);
 CREATE INDEX IF NOT EXISTS idx_messages_role ON messages(role);
+-- Newest-first scans (recent messages) read the newest partitions first and stop early
 CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
 
+-- Full-text search: GIN indexes over message content and conversation titles
+CREATE INDEX IF NOT EXISTS idx_messages_content_tsv ON messages USING GIN (content_tsv);
+CREATE INDEX IF NOT EXISTS idx_conversations_title_tsv ON conversations
+    USING GIN (to_tsvector('english', coalesce(title, '')));
+
+-- Statistics: duration totals over active conversations
+CREATE INDEX IF NOT EXISTS idx_conversation_summaries_duration ON conversation_summaries(duration_seconds);
+
 CREATE INDEX IF NOT EXISTS idx_fusions_source ON conversation_fusions(source_conversation_id);
 CREATE INDEX IF NOT EXISTS idx_fusions_target ON conversation_fusions(target_conversation_id);
+CREATE INDEX IF NOT EXISTS idx_fusions_surviving ON conversation_fusions(surviving_conversation_id);
 
 -- Function to update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -62,11 +254,120 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
--- Trigger to automatically update updated_at
-CREATE TRIGGER update_conversations_updated_at 
-    BEFORE UPDATE ON conversations 
+-- Trigger to automatically update updated_at (not for last_seq bumps)
+DROP TRIGGER IF EXISTS update_conversations_updated_at ON conversations;
+CREATE TRIGGER update_conversations_updated_at
+    BEFORE UPDATE OF session_id, title, is_active, metadata ON conversations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Function to number messages within their conversation (a BEFORE row
+-- trigger on the partitioned table, hence PostgreSQL 13+). Bumping the
+-- conversation's counter locks its row, so concurrent writers to one
+-- conversation get consecutive numbers in commit order. updated_at follows
+-- the newest message (imported history keeps its original times). Bulk
+-- inserts (ConversationStore.add_messages) reserve a range of numbers under
+-- the same lock and insert them with the rows: bumping one row thousands of
+-- times in a transaction slows every bump down.
+CREATE OR REPLACE FUNCTION assign_message_seq()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.seq IS NOT NULL THEN
+        RETURN NEW;
+    END IF;
+    UPDATE conversations
+    SET last_seq = last_seq + 1,
+        updated_at = GREATEST(updated_at, NEW.created_at)
+    WHERE id = NEW.conversation_id
+    RETURNING last_seq INTO NEW.seq;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Function to convert a yyyymmddhhmmss timestamp_str to epoch seconds (NULL if malformed)
+CREATE OR REPLACE FUNCTION timestamp_str_epoch(ts VARCHAR)
+RETURNS BIGINT AS $$
+    SELECT CASE WHEN ts ~ '^[0-9]{14}$'
+                THEN EXTRACT(EPOCH FROM to_timestamp(ts, 'YYYYMMDDHH24MISS'))::BIGINT
+           END;
+$$ LANGUAGE sql STABLE;
+
+-- Function to fold the messages of one INSERT or COPY statement into their
+-- conversations' summaries: one upsert per conversation per statement
+CREATE OR REPLACE FUNCTION update_conversation_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO conversation_summaries AS s (conversation_id, message_count, first_message, last_message,
+                                             duration_seconds, last_message_preview, last_message_at)
+    SELECT batch.conversation_id, batch.message_count, batch.first_message, batch.last_message,
+           COALESCE(timestamp_str_epoch(batch.last_message) - timestamp_str_epoch(batch.first_message), 0),
+           LEFT(newest.content, 200), newest.created_at
+    FROM (SELECT conversation_id, COUNT(*) AS message_count,
+                 MIN(timestamp_str) AS first_message, MAX(timestamp_str) AS last_message
+          FROM inserted GROUP BY conversation_id) batch
+    JOIN (SELECT DISTINCT ON (conversation_id) conversation_id, content, created_at
+          FROM inserted ORDER BY conversation_id, seq DESC) newest USING (conversation_id)
+    ON CONFLICT (conversation_id) DO UPDATE SET
+        message_count = s.message_count + EXCLUDED.message_count,
+        first_message = LEAST(s.first_message, EXCLUDED.first_message),
+        last_message = GREATEST(s.last_message, EXCLUDED.last_message),
+        duration_seconds = COALESCE(
+            timestamp_str_epoch(GREATEST(s.last_message, EXCLUDED.last_message))
+            - timestamp_str_epoch(LEAST(s.first_message, EXCLUDED.first_message)), 0),
+        last_message_preview = EXCLUDED.last_message_preview,
+        last_message_at = EXCLUDED.last_message_at;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Function to rebuild one conversation's summary from its messages (after
+-- fusion or retention); a conversation left without messages loses its row
+CREATE OR REPLACE FUNCTION refresh_conversation_summary(conv_id INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO conversation_summaries (conversation_id, message_count, first_message, last_message,
+                                        duration_seconds, last_message_preview, last_message_at)
+    SELECT conv_id, COUNT(*), MIN(m.timestamp_str), MAX(m.timestamp_str),
+           COALESCE(timestamp_str_epoch(MAX(m.timestamp_str)) - timestamp_str_epoch(MIN(m.timestamp_str)), 0),
+           (SELECT LEFT(content, 200) FROM messages WHERE conversation_id = conv_id ORDER BY seq DESC LIMIT 1),
+           (SELECT created_at FROM messages WHERE conversation_id = conv_id ORDER BY seq DESC LIMIT 1)
+    FROM messages m
+    WHERE m.conversation_id = conv_id
+    HAVING COUNT(*) > 0
+    ON CONFLICT (conversation_id) DO UPDATE SET
+        message_count = EXCLUDED.message_count,
+        first_message = EXCLUDED.first_message,
+        last_message = EXCLUDED.last_message,
+        duration_seconds = EXCLUDED.duration_seconds,
+        last_message_preview = EXCLUDED.last_message_preview,
+        last_message_at = EXCLUDED.last_message_at;
+    IF NOT FOUND THEN
+        DELETE FROM conversation_summaries WHERE conversation_id = conv_id;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS assign_messages_seq ON messages;
+CREATE TRIGGER assign_messages_seq
+    BEFORE INSERT ON messages
+    FOR EACH ROW EXECUTE FUNCTION assign_message_seq();
+
+DROP TRIGGER IF EXISTS update_messages_summary ON messages;
+CREATE TRIGGER update_messages_summary
+    AFTER INSERT ON messages
+    REFERENCING NEW TABLE AS inserted
+    FOR EACH STATEMENT EXECUTE FUNCTION update_conversation_summary();
+
+-- Bring conversation counters up to the messages copied in by an upgrade
+UPDATE conversations c SET last_seq = numbered.last_seq
+FROM (SELECT conversation_id, MAX(seq) AS last_seq FROM messages GROUP BY conversation_id) numbered
+WHERE c.id = numbered.conversation_id AND c.last_seq < numbered.last_seq;
+
+-- Summarize conversations whose messages predate conversation_summaries
+SELECT refresh_conversation_summary(c.id)
+FROM conversations c
+WHERE NOT EXISTS (SELECT 1 FROM conversation_summaries s WHERE s.conversation_id = c.id)
+  AND EXISTS (SELECT 1 FROM messages m WHERE m.conversation_id = c.id);
+
 -- Function to generate session ID
 CREATE OR REPLACE FUNCTION generate_session_id()
 RETURNS VARCHAR(50) AS $$
@@ -76,6 +377,68 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to fuse several conversations into one in a single transaction.
+-- The merged conversation is renumbered in time order (on ties: target
+-- first, then the sources in the order given, each in its own seq order).
+-- Both steps go through negative numbers so no two rows ever share a seq.
+CREATE OR REPLACE FUNCTION fuse_conversations_many(
+    source_ids INTEGER[],
+    target_id INTEGER,
+    reason TEXT DEFAULT 'Manual fusion'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    target_last BIGINT;
+    moved INTEGER;
+BEGIN
+    IF target_id = ANY(source_ids) THEN
+        RAISE EXCEPTION 'Cannot fuse conversation % into itself', target_id;
+    END IF;
+    SELECT last_seq INTO target_last FROM conversations WHERE id = target_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Conversation % not found', target_id;
+    END IF;
+
+    UPDATE messages SET seq = -seq WHERE conversation_id = target_id;
+    UPDATE messages m
+    SET conversation_id = target_id, seq = -(m.seq + offsets.base)
+    FROM (
+        SELECT c.id, target_last + SUM(c.last_seq) OVER (ORDER BY s.ord) - c.last_seq AS base
+        FROM unnest(source_ids) WITH ORDINALITY AS s(id, ord)
+        JOIN conversations c ON c.id = s.id
+    ) offsets
+    WHERE m.conversation_id = offsets.id;
+    GET DIAGNOSTICS moved = ROW_COUNT;
+
+    UPDATE messages m SET seq = ordered.seq
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY timestamp_str, seq DESC) AS seq
+        FROM messages WHERE conversation_id = target_id
+    ) ordered
+    WHERE m.id = ordered.id;
+    UPDATE conversations
+    SET last_seq = (SELECT COUNT(*) FROM messages WHERE conversation_id = target_id)
+    WHERE id = target_id;
+    PERFORM refresh_conversation_summary(target_id);
+    DELETE FROM conversation_summaries WHERE conversation_id = ANY(source_ids);
+
+    -- Record the fusions; earlier fusions into the sources now resolve to the target
+    UPDATE conversation_fusions
+    SET surviving_conversation_id = target_id
+    WHERE surviving_conversation_id = ANY(source_ids);
+    INSERT INTO conversation_fusions (source_conversation_id, target_conversation_id,
+                                      fusion_reason, surviving_conversation_id)
+    SELECT s.id, target_id, reason, target_id
+    FROM unnest(source_ids) WITH ORDINALITY AS s(id, ord)
+    ORDER BY s.ord;
+
+    UPDATE conversations SET is_active = FALSE WHERE id = ANY(source_ids);
+    UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = target_id;
+
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to fuse conversations
 CREATE OR REPLACE FUNCTION fuse_conversations(
     source_id INTEGER,
@@ -84,29 +447,52 @@ CREATE OR REPLACE FUNCTION fuse_conversations(
 )
 RETURNS BOOLEAN AS $$
 BEGIN
-    -- Update all messages from source conversation to target conversation
-    UPDATE messages 
-    SET conversation_id = target_id 
-    WHERE conversation_id = source_id;
-    
-    -- Record the fusion
-    INSERT INTO conversation_fusions (source_conversation_id, target_conversation_id, fusion_reason)
-    VALUES (source_id, target_id, reason);
-    
-    -- Mark source conversation as inactive
-    UPDATE conversations 
-    SET is_active = FALSE 
-    WHERE id = source_id;
-    
-    -- Update target conversation timestamp
-    UPDATE conversations 
-    SET updated_at = CURRENT_TIMESTAMP 
-    WHERE id = target_id;
-    
+    PERFORM fuse_conversations_many(ARRAY[source_id], target_id, reason);
     RETURN TRUE;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to find the conversation that now holds a session's messages:
+-- the session's own conversation, or the one it was (eventually) fused into.
+-- Two index lookups, however long the fusion chain.
+CREATE OR REPLACE FUNCTION resolve_conversation(session VARCHAR)
+RETURNS TABLE(
+    id INTEGER,
+    session_id VARCHAR(50),
+    is_active BOOLEAN
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT s.id, s.session_id, s.is_active
+    FROM conversations c
+    LEFT JOIN LATERAL (
+        SELECT f.surviving_conversation_id
+        FROM conversation_fusions f
+        WHERE f.source_conversation_id = c.id
+        ORDER BY f.id DESC
+        LIMIT 1
+    ) f ON TRUE
+    JOIN conversations s ON s.id = COALESCE(f.surviving_conversation_id, c.id)
+    WHERE c.session_id = session;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fill in lineage for fusions recorded before surviving_conversation_id
+-- existed by replaying them in order
+DO $$
+DECLARE
+    f RECORD;
+BEGIN
+    IF EXISTS (SELECT 1 FROM conversation_fusions WHERE surviving_conversation_id IS NULL) THEN
+        FOR f IN SELECT cf.id, cf.source_conversation_id, cf.target_conversation_id
+                 FROM conversation_fusions cf ORDER BY cf.id LOOP
+            UPDATE conversation_fusions
+            SET surviving_conversation_id = f.target_conversation_id
+            WHERE id = f.id OR (id < f.id AND surviving_conversation_id = f.source_conversation_id);
+        END LOOP;
+    END IF;
+END $$;
+
 -- Function to get conversation history for API
 CREATE OR REPLACE FUNCTION get_conversation_messages(conv_id INTEGER)
 RETURNS TABLE(
@@ -119,10 +505,62 @@ BEGIN
     SELECT m.role, m.content, m.timestamp_str
     FROM messages m
     WHERE m.conversation_id = conv_id
-    ORDER BY m.timestamp_str ASC;
+    ORDER BY m.seq ASC;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to search conversations with the full-text indexes, best match first.
+-- Cost is proportional to the number of matching messages, not the table size.
+CREATE OR REPLACE FUNCTION search_conversations(
+    search_term TEXT,
+    max_results INTEGER DEFAULT 50
+)
+RETURNS TABLE(
+    id INTEGER,
+    session_id VARCHAR(50),
+    title VARCHAR(255),
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    match_count BIGINT,
+    rank REAL,
+    preview TEXT
+) AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_term) AS query
+    ),
+    hits AS (
+        SELECT m.conversation_id, m.id AS message_id, ts_rank(m.content_tsv, q.query) AS score
+        FROM messages m, q
+        WHERE m.content_tsv @@ q.query
+        UNION ALL
+        SELECT c.id, NULL::INTEGER, ts_rank(to_tsvector('english', coalesce(c.title, '')), q.query)
+        FROM conversations c, q
+        WHERE to_tsvector('english', coalesce(c.title, '')) @@ q.query
+    ),
+    ranked AS (
+        SELECT h.conversation_id,
+               COUNT(*) AS match_count,
+               MAX(h.score) AS rank,
+               (array_agg(h.message_id ORDER BY h.score DESC)
+                   FILTER (WHERE h.message_id IS NOT NULL))[1] AS best_message_id
+        FROM hits h
+        GROUP BY h.conversation_id
+    )
+    SELECT c.id, c.session_id, c.title, c.created_at, c.updated_at, r.match_count, r.rank,
+           COALESCE(ts_headline('english', m.content, q.query, 'MaxWords=20, MinWords=5'), c.title::TEXT)
+    FROM ranked r
+    JOIN conversations c ON c.id = r.conversation_id
+    LEFT JOIN messages m ON m.id = r.best_message_id
+    CROSS JOIN q
+    WHERE c.is_active = TRUE
+    ORDER BY r.rank DESC, r.match_count DESC, c.updated_at DESC
+    LIMIT max_results;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
 -- Sample data for testing
 INSERT INTO conversations (session_id, title, metadata) VALUES 
     (generate_session_id(), 'Test Conversation 1', '{"tts_enabled": true, "model": "gpt-4"}'),
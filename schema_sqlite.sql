@@ -0,0 +1,150 @@
+-- HeyChat Database Schema (embedded SQLite backend)
+-- Mirrors schema.sql for tests and single-node installs.
+-- Applied automatically by conversation_store.py on first connection.
+
+-- Conversations table - represents distinct conversation sessions
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id VARCHAR(50) UNIQUE NOT NULL,  -- Unique identifier for each session
+    title VARCHAR(255),                      -- Optional conversation title
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    is_active BOOLEAN DEFAULT 1,             -- Whether conversation is still active
+    metadata TEXT,                           -- Additional metadata as JSON
+    last_seq INTEGER NOT NULL DEFAULT 0      -- Highest messages.seq handed out
+);
+
+-- Messages table - stores individual messages within conversations
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    seq INTEGER,                             -- Position in the conversation (1, 2, ...), set on insert
+    timestamp_str VARCHAR(14) NOT NULL,      -- yyyymmddhhmmss format
+    role VARCHAR(20) NOT NULL,               -- 'user' or 'assistant'
+    content TEXT NOT NULL,                   -- The actual message content
+    audio_file_path VARCHAR(500),            -- Path to audio file if available
+    transcription_confidence DECIMAL(3,2),   -- Confidence score from Whisper
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    metadata TEXT                            -- Additional message metadata as JSON
+);
+
+-- Conversation summaries - one row per conversation with messages, kept up
+-- to date by the message insert trigger and fusion (see schema.sql)
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    conversation_id INTEGER PRIMARY KEY REFERENCES conversations(id) ON DELETE CASCADE,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    first_message VARCHAR(14),               -- Earliest message timestamp_str
+    last_message VARCHAR(14),                -- Latest message timestamp_str
+    duration_seconds INTEGER NOT NULL DEFAULT 0,  -- last_message - first_message
+    last_message_preview TEXT,               -- First 200 characters of the newest message
+    last_message_at TIMESTAMP                -- created_at of the newest message
+);
+
+-- Conversation fusions table - tracks when conversations are merged
+CREATE TABLE IF NOT EXISTS conversation_fusions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    target_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    fused_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    fusion_reason TEXT,                      -- Why the conversations were fused
+    metadata TEXT,
+    surviving_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE
+                                             -- Where the source's messages live now (follows later fusions)
+);
+
+-- Indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_conversations_session_id ON conversations(session_id);
+CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations(created_at);
+CREATE INDEX IF NOT EXISTS idx_conversations_active ON conversations(is_active);
+-- Keyset pagination: ORDER BY updated_at DESC, id DESC with (updated_at, id) < cursor
+CREATE INDEX IF NOT EXISTS idx_conversations_updated_id ON conversations(updated_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_active_updated_id ON conversations(is_active, updated_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
+-- History loads: WHERE conversation_id = ? ORDER BY seq is one index range scan, no sort
+CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_conversation_seq ON messages(conversation_id, seq);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp_str ON messages(timestamp_str);
+CREATE INDEX IF NOT EXISTS idx_messages_role ON messages(role);
+CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_summaries_duration ON conversation_summaries(duration_seconds);
+
+CREATE INDEX IF NOT EXISTS idx_fusions_source ON conversation_fusions(source_conversation_id);
+CREATE INDEX IF NOT EXISTS idx_fusions_target ON conversation_fusions(target_conversation_id);
+CREATE INDEX IF NOT EXISTS idx_fusions_surviving ON conversation_fusions(surviving_conversation_id);
+
+-- Full-text search (FTS5) over message content and conversation titles.
+-- External-content tables: the text lives in messages/conversations and the
+-- triggers below keep the indexes in sync.
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+    title, content='conversations', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (NEW.id, NEW.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+    INSERT INTO messages_fts(rowid, content) VALUES (NEW.id, NEW.content);
+END;
+
+-- Number messages within their conversation (SQLite cannot set NEW.seq
+-- before the insert, so the new row is updated right after it); updated_at
+-- follows the newest message. Bulk inserts (ConversationStore.add_messages)
+-- reserve their numbers up front and insert them with the rows.
+DROP TRIGGER IF EXISTS messages_assign_seq;
+CREATE TRIGGER messages_assign_seq AFTER INSERT ON messages WHEN NEW.seq IS NULL BEGIN
+    UPDATE conversations
+    SET last_seq = last_seq + 1,
+        updated_at = MAX(updated_at, COALESCE(NEW.created_at, updated_at))
+    WHERE id = NEW.conversation_id;
+    UPDATE messages SET seq = (SELECT last_seq FROM conversations WHERE id = NEW.conversation_id)
+    WHERE id = NEW.id;
+END;
+
+-- Fold each new message into its conversation's summary
+CREATE TRIGGER IF NOT EXISTS messages_summary_insert AFTER INSERT ON messages BEGIN
+    INSERT OR IGNORE INTO conversation_summaries (conversation_id) VALUES (NEW.conversation_id);
+    UPDATE conversation_summaries
+    SET message_count = message_count + 1,
+        first_message = MIN(COALESCE(first_message, NEW.timestamp_str), NEW.timestamp_str),
+        last_message = MAX(COALESCE(last_message, NEW.timestamp_str), NEW.timestamp_str),
+        last_message_preview = substr(NEW.content, 1, 200),
+        last_message_at = NEW.created_at
+    WHERE conversation_id = NEW.conversation_id;
+    -- timestamp_str is yyyymmddhhmmss; malformed values give a zero duration
+    UPDATE conversation_summaries
+    SET duration_seconds = COALESCE(
+        strftime('%s', substr(last_message, 1, 4) || '-' || substr(last_message, 5, 2) || '-' ||
+                       substr(last_message, 7, 2) || ' ' || substr(last_message, 9, 2) || ':' ||
+                       substr(last_message, 11, 2) || ':' || substr(last_message, 13, 2))
+      - strftime('%s', substr(first_message, 1, 4) || '-' || substr(first_message, 5, 2) || '-' ||
+                       substr(first_message, 7, 2) || ' ' || substr(first_message, 9, 2) || ':' ||
+                       substr(first_message, 11, 2) || ':' || substr(first_message, 13, 2)), 0)
+    WHERE conversation_id = NEW.conversation_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+    INSERT INTO conversations_fts(rowid, title) VALUES (NEW.id, NEW.title);
+END;
+CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+    INSERT INTO conversations_fts(conversations_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+END;
+CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF title ON conversations BEGIN
+    INSERT INTO conversations_fts(conversations_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+    INSERT INTO conversations_fts(rowid, title) VALUES (NEW.id, NEW.title);
+END;
+
+-- Trigger to automatically update updated_at
+CREATE TRIGGER IF NOT EXISTS update_conversations_updated_at
+    AFTER UPDATE OF session_id, title, is_active, metadata ON conversations
+    FOR EACH ROW
+BEGIN
+    UPDATE conversations SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+END;
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+HeyChat Server Metrics
+Minimal, thread-safe Prometheus metrics (counters, gauges, histograms) and
+the text exposition format, without extra dependencies.
+
+Updates are a dict lookup and a few additions under one lock, so they are
+cheap enough for every request; sorting for quantiles happens only when
+metrics are scraped.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Latency buckets in seconds, from cache hits to slow exports
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Child process run times in seconds, from quick asks to long voice chats
+DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+QUANTILES = (0.5, 0.95, 0.99)
+# Samples kept per label set for the quantile summary
+QUANTILE_WINDOW = 1024
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for a metric family keyed by label values"""
+    type = 'untyped'
+
+    def __init__(self, registry, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = registry._lock
+        self._values = {}
+        registry.register(self)
+
+    def _header(self, name=None, type=None):
+        name = name or self.name
+        return [f"# HELP {name} {self.help}", f"# TYPE {name} {type or self.type}"]
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, values)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from ``collect`` at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, registry, name, help, labels=(), collect=None):
+        super().__init__(registry, name, help, labels)
+        self._collect = collect
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        if self._collect is not None:
+            collected = self._collect()
+            if not isinstance(collected, dict):
+                collected = {(): collected}
+            with self._lock:
+                self._values = dict(collected)
+        return super().render()
+
+
+class Histogram(Metric):
+    """Bucketed distribution, plus p50/p95/p99 over recent samples.
+
+    The buckets are exported as a Prometheus histogram under ``name``; the
+    quantiles of the last ``window`` observations are exported as a summary
+    under ``summary_name`` (``name`` with ``_seconds`` replaced by
+    ``_quantile_seconds`` by default).
+    """
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labels=(), buckets=LATENCY_BUCKETS,
+                 window=QUANTILE_WINDOW, summary_name=None):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.summary_name = summary_name or name.replace('_seconds', '_quantile_seconds')
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "recent": deque(maxlen=self.window)
+                }
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["recent"].append(value)
+
+    def time(self, *labels):
+        """Context manager observing the elapsed time of its block"""
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted(
+                (values, list(series["counts"]), series["sum"], sorted(series["recent"]))
+                for values, series in self._values.items()
+            )
+
+        lines = self._header()
+        for values, counts, total, _ in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {cumulative}")
+
+        lines.extend(self._header(self.summary_name, 'summary'))
+        for values, counts, total, recent in items:
+            for q in QUANTILES:
+                quantile = f'quantile="{q}"'
+                value = recent[max(0, math.ceil(q * len(recent)) - 1)] if recent else math.nan
+                lines.append(f"{self.summary_name}{_labels(self.label_names, values, quantile)} {_number(value)}")
+            lines.append(f"{self.summary_name}_sum{_labels(self.label_names, values)} {_number(total)}")
+            lines.append(f"{self.summary_name}_count{_labels(self.label_names, values)} {sum(counts)}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def counter(self, name, help, labels=()):
+        return Counter(self, name, help, labels)
+
+    def gauge(self, name, help, labels=(), collect=None):
+        return Gauge(self, name, help, labels, collect)
+
+    def histogram(self, name, help, labels=(), **kwargs):
+        return Histogram(self, name, help, labels, **kwargs)
+
+    def render(self):
+        """Prometheus text exposition of every registered metric"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+HeyChat Session Journal
+Append-only, one-JSON-object-per-line log of a voice session's history.
+
+Each message costs one short write regardless of how long the session is
+(instead of rewriting the whole conversation file), and the in-memory
+history is rebuilt by replaying the journal on restart.
+
+Record types:
+    {"type": "message", "seq": 1, "role": "user", "content": "...", "timestamp": "..."}
+    {"type": "summary", "text": "...", "covers": 12, "tokens": 80}
+                           -- context summary of the first ``covers`` messages
+    {"type": "clear"}      -- history cleared; earlier messages are dropped on replay
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+class SessionJournal:
+    """Append-only history journal for one session"""
+
+    def __init__(self, path, fsync=False):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.history = []
+        self.summary = None
+        self.seq = 0
+        self.replayed = 0
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._torn_tail():
+            # Start on a fresh line so the next record isn't glued to the torn one
+            self._file.write("\n")
+            self._file.flush()
+
+    def _torn_tail(self):
+        """True if the journal ends mid-line (a crash during the last write)"""
+        if not self.path.stat().st_size:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def _replay(self):
+        """Rebuild history and the sequence counter from the journal"""
+        try:
+            f = open(self.path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    continue
+                self.replayed += 1
+                kind = record.get('type')
+                if kind == 'message':
+                    self.history.append({"role": record['role'], "content": record['content']})
+                    self.seq = max(self.seq, record.get('seq', self.seq + 1))
+                elif kind == 'summary':
+                    self.summary = {key: record[key] for key in ('text', 'covers', 'tokens')}
+                elif kind == 'clear':
+                    self.history = []
+                    self.summary = None
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, role, content, timestamp=None):
+        """Record a message and return its per-session sequence number"""
+        self.seq += 1
+        self._write({"type": "message", "seq": self.seq, "role": role,
+                     "content": content, "timestamp": timestamp})
+        self.history.append({"role": role, "content": content})
+        return self.seq
+
+    def extend(self, messages):
+        """Seed the journal with existing role/content messages (e.g. loaded from the database)"""
+        for message in messages:
+            self.append(message['role'], message['content'])
+
+    def set_summary(self, summary):
+        """Record the context summary (dict with text, covers, tokens)"""
+        self._write({"type": "summary", **summary})
+        self.summary = summary
+
+    def clear(self):
+        """Drop the history without rewriting the file"""
+        self._write({"type": "clear"})
+        self.history = []
+        self.summary = None
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+HeyChat Stub API Server
+Local stand-in for the OpenAI transcription and chat completion endpoints,
+for running the voice engine without an API key or network. Speaks
+HTTP/1.1 with keep-alive, like the real API, and counts connections and
+requests so reuse is visible.
+
+    POST /v1/audio/transcriptions  multipart upload; answers the next scripted
+                                   transcript ({"text": ...}), the last one repeats
+    POST /v1/chat/completions      echoes the last user message as the reply;
+                                   with "stream": true as server-sent events
+                                   (one chunk per word, then [DONE])
+
+Usage:
+    python3 stub_api_server.py                                  # http://127.0.0.1:8089/v1
+    python3 stub_api_server.py --port 9000 --transcript "hello" --transcript "quit"
+    OPENAI_API_KEY=stub ./voice-chatgpt.sh --no-tts --input-wav hello.wav --api-base http://127.0.0.1:8089/v1
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8089
+DEFAULT_TRANSCRIPT = "Hello there."
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.count('requests')
+        if self.path == '/v1/audio/transcriptions':
+            self.transcription(body)
+        elif self.path == '/v1/chat/completions':
+            self.chat_completion(body)
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    def transcription(self, body):
+        match = re.search(rb'filename="([^"]*)"', body)
+        self.server.uploads.append({"filename": match.group(1).decode() if match else None,
+                                    "bytes": len(body)})
+        self.server.count('transcriptions')
+        self.send_json(200, {"text": self.server.next_transcript()})
+
+    def chat_completion(self, body):
+        try:
+            request = json.loads(body)
+            messages = request['messages']
+        except (ValueError, KeyError):
+            self.send_json(400, {"error": {"message": "Invalid chat completion request"}})
+            return
+        self.server.count('completions')
+        self.server.chats.append(messages)
+        said = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        reply = f"You said: {said}"
+
+        if not request.get('stream'):
+            self.send_json(200, {"object": "chat.completion", "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}
+            ]})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for word in re.findall(r'\S+\s*', reply):
+            self.send_chunk({"object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": {"content": word}}]})
+            time.sleep(self.server.token_delay)
+        self.send_chunk("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def send_chunk(self, event):
+        data = f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n".encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Threaded stub server; ``stats`` counts connections, requests, transcriptions and completions"""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, transcripts=None, token_delay=0.0,
+                 verbose=False):
+        super().__init__((host, port), StubAPIHandler)
+        self.transcripts = list(transcripts or [DEFAULT_TRANSCRIPT])
+        self.token_delay = token_delay
+        self.verbose = verbose
+        self.stats = {"connections": 0, "requests": 0, "transcriptions": 0, "completions": 0}
+        self.uploads = []
+        self.chats = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def next_transcript(self):
+        with self._lock:
+            return self.transcripts.pop(0) if len(self.transcripts) > 1 else self.transcripts[0]
+
+    def start(self):
+        """Serve on a background thread; returns self"""
+        threading.Thread(target=self.serve_forever, name='stub-api', daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat stub OpenAI API server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--transcript', action='append', dest='transcripts',
+                        help='Transcript for the next upload; repeat for later turns (the last one repeats)')
+    parser.add_argument('--token-delay-ms', type=float, default=20.0,
+                        help='Pause between streamed words (default: 20)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    server = StubAPIServer(args.host, args.port, args.transcripts, args.token_delay_ms / 1000, args.verbose)
+    print(f"🧪 Stub API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {server.stats['connections']} connection(s), {server.stats['requests']} request(s): "
+              f"{server.stats['transcriptions']} transcription(s), {server.stats['completions']} completion(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 HeyChat Supabase Integration
-Provides database operations for conversation management using Supabase MCP connector
+Provides database operations for conversation management on top of conversation_store
+(embedded SQLite or PostgreSQL/Supabase, selected by HEYCHAT_DATABASE_URL)
 """
 
 import json
@@ -11,9 +12,12 @@ from datetime import datetime
 import hashlib
 import random
 
+from conversation_store import get_store
+
 class HeyChatSupabase:
-    def __init__(self):
+    def __init__(self, store=None):
         self.db_name = "heychat"
+        self.store = store or get_store()
         
     def generate_session_id(self):
         """Generate a unique session ID"""
@@ -25,54 +29,79 @@ class HeyChatSupabase:
         """Create a new conversation"""
         if metadata is None:
             metadata = {}
-            
-        # This would use the Supabase MCP connector in a real implementation
-        # For now, we'll return a placeholder
-        conv_id = f"conv_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
+        
+        conv_id = self.store.create_conversation(session_id, title, metadata)
         
         print(f"Creating conversation: {session_id} -> {conv_id}", file=sys.stderr)
         return conv_id
     
     def get_conversation_id(self, session_id):
         """Get conversation ID by session ID"""
-        # This would query Supabase in a real implementation
         print(f"Getting conversation ID for: {session_id}", file=sys.stderr)
-        return f"conv_placeholder_{hash(session_id) % 10000}"
+        return self.store.get_conversation_id(session_id)
+    
+    def resolve_conversation_id(self, conversation_ref):
+        """Resolve a conversation ID or session ID to a conversation ID, creating the conversation if needed"""
+        if isinstance(conversation_ref, int) or str(conversation_ref).isdigit():
+            return int(conversation_ref)
+        return self.store.get_or_create_conversation(conversation_ref)
     
     def add_message(self, conversation_id, timestamp_str, role, content, audio_file_path=None, confidence=None):
-        """Add a message to a conversation"""
+        """Add a message to a conversation (accepts a conversation ID or session ID)"""
         print(f"Adding message to conversation {conversation_id}: [{role}] {content[:50]}...", file=sys.stderr)
         
-        # This would insert into Supabase in a real implementation
-        msg_id = f"msg_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
-        return msg_id
+        conv_id = self.resolve_conversation_id(conversation_id)
+        if confidence in (None, ''):
+            confidence = None
+        else:
+            confidence = float(confidence)
+        
+        return self.store.add_message(conv_id, timestamp_str, role, content, audio_file_path or None, confidence)
+    
+    def add_messages(self, conversation_id, rows):
+        """Add many messages to a conversation in one transaction and return their ids.
+
+        Rows are (timestamp_str, role, content[, audio_file_path[, confidence[, metadata]]])
+        tuples or dicts with those keys.
+        """
+        conv_id = self.resolve_conversation_id(conversation_id)
+        values = []
+        for row in rows:
+            if isinstance(row, dict):
+                row = (row['timestamp_str'], row['role'], row['content'], row.get('audio_file_path'),
+                       row.get('confidence'), row.get('metadata'))
+            row = tuple(row) + (None,) * (6 - len(row))
+            confidence = None if row[4] in (None, '') else float(row[4])
+            values.append(row[:3] + (row[3] or None, confidence, row[5]))
+        
+        print(f"Adding {len(values)} messages to conversation {conv_id}", file=sys.stderr)
+        return self.store.add_messages(conv_id, values)
     
     def get_conversation_history(self, conversation_id):
         """Get conversation history as JSON for API"""
         print(f"Getting conversation history for: {conversation_id}", file=sys.stderr)
-        
-        # This would query Supabase and return JSON in a real implementation
-        # For now, return empty array
-        return "[]"
+        return json.dumps(self.store.get_history(int(conversation_id)))
     
     def save_conversation(self, session_id, user_message, assistant_message, audio_file_path=None, confidence=None):
         """Save a complete conversation exchange"""
         print(f"Saving conversation: {session_id}", file=sys.stderr)
         
         # Get or create conversation
-        conv_id = self.get_conversation_id(session_id)
+        conv_id = self.store.get_or_create_conversation(session_id)
         
         # Generate timestamp
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        
-        # Add user message
-        self.add_message(conv_id, timestamp, "user", user_message, audio_file_path, confidence)
-        
-        # Add assistant message (with slight delay to ensure different timestamp)
-        import time
-        time.sleep(1)
-        timestamp_assistant = datetime.now().strftime("%Y%m%d%H%M%S")
-        self.add_message(conv_id, timestamp_assistant, "assistant", assistant_message)
+        if confidence in (None, ''):
+            confidence = None
+        else:
+            confidence = float(confidence)
+        
+        # Both messages in one transaction; insertion order (messages.seq) keeps the
+        # reply after the question, so they can share the timestamp
+        self.store.persist_messages([
+            (conv_id, timestamp, "user", user_message, audio_file_path or None, confidence, None),
+            (conv_id, timestamp, "assistant", assistant_message, None, None, None)
+        ])
         
         return conv_id
     
@@ -83,7 +112,7 @@ class HeyChatSupabase:
         # Get conversation ID
         conv_id = self.get_conversation_id(session_id)
         
-        if not conv_id or conv_id.startswith("conv_placeholder"):
+        if not conv_id:
             return "[]"
         
         # Get conversation history
@@ -98,7 +127,8 @@ def main():
         print("Commands:")
         print("  create <session_id> [title] [metadata]  - Create new conversation")
         print("  get-id <session_id>                     - Get conversation ID")
-        print("  add-message <conv_id> <timestamp> <role> <content> [audio_path] [confidence]")
+        print("  add-message <conv_id|session_id> <timestamp> <role> <content> [audio_path] [confidence]")
+        print("  add-messages <conv_id|session_id> [file] - Add NDJSON messages (file or stdin) in one transaction")
         print("  get-history <conv_id>                   - Get conversation history")
         print("  save <session_id> <user_msg> <assistant_msg> [audio_path] [confidence]")
         print("  load <session_id>                       - Load conversation for API")
@@ -119,7 +149,7 @@ def main():
     elif command == "get-id":
         session_id = sys.argv[2]
         result = db.get_conversation_id(session_id)
-        print(result)
+        print(result if result is not None else "")
         
     elif command == "add-message":
         conv_id = sys.argv[2]
@@ -131,6 +161,14 @@ def main():
         result = db.add_message(conv_id, timestamp, role, content, audio_path, confidence)
         print(result)
         
+    elif command == "add-messages":
+        conv_id = sys.argv[2]
+        source = open(sys.argv[3], encoding='utf-8') if len(sys.argv) > 3 and sys.argv[3] != '-' else sys.stdin
+        with source:
+            rows = [json.loads(line) for line in source if line.strip()]
+        for msg_id in db.add_messages(conv_id, rows):
+            print(msg_id)
+        
     elif command == "get-history":
         conv_id = sys.argv[2]
         result = db.get_conversation_history(conv_id)
@@ -155,9 +193,11 @@ def main():
         print(result)
         
     elif command == "test":
-        print("Supabase MCP connector is available!")
-        print("Note: This is a placeholder implementation.")
-        print("In production, this would use the Supabase MCP connector directly.")
+        if db.store.ping():
+            print(f"Database connection successful! ({db.store.backend.name})")
+        else:
+            print("Database connection failed!")
+            sys.exit(1)
         
     else:
         print(f"Unknown command: {command}")
@@ -86,10 +86,8 @@ save_conversation() {
     # Add user message
     add_message "$conv_id" "$timestamp" "user" "$user_message" "$audio_file_path" "$confidence"
     
-    # Add assistant message (with slight delay to ensure different timestamp)
-    sleep 1
-    local timestamp_assistant=$(date +%Y%m%d%H%M%S)
-    add_message "$conv_id" "$timestamp_assistant" "assistant" "$assistant_message"
+    # Add assistant message (messages.seq keeps it after the user message)
+    add_message "$conv_id" "$timestamp" "assistant" "$assistant_message"
     
     echo "$conv_id"
 }
@@ -41,12 +41,13 @@ class SupabaseViewer:
             c.created_at,
             c.updated_at,
             c.is_active,
-            COUNT(m.id) as message_count
+            COALESCE(s.message_count, 0) as message_count,
+            s.duration_seconds,
+            s.last_message_preview
         FROM conversations c
-        LEFT JOIN messages m ON c.id = m.conversation_id
+        LEFT JOIN conversation_summaries s ON s.conversation_id = c.id
         WHERE c.is_active = TRUE
-        GROUP BY c.id, c.session_id, c.title, c.created_at, c.updated_at, c.is_active
-        ORDER BY c.updated_at DESC
+        ORDER BY c.updated_at DESC, c.id DESC
         LIMIT %s;
         """ % limit
         
@@ -74,7 +75,7 @@ class SupabaseViewer:
         FROM messages m
         JOIN conversations c ON m.conversation_id = c.id
         WHERE c.session_id = '{session_id}'
-        ORDER BY m.timestamp_str ASC;
+        ORDER BY m.seq ASC;
         """
         
         print(f"SQL Query: {sql_query}")
@@ -89,19 +90,10 @@ class SupabaseViewer:
         print(f"🔍 Search Results for: '{search_term}'")
         print("=" * 50)
         
-        # Example SQL query for search
+        # Example SQL query for search (ranked full-text search, see schema.sql)
         sql_query = f"""
-        SELECT DISTINCT
-            c.id,
-            c.session_id,
-            c.title,
-            c.created_at,
-            m.content as preview
-        FROM conversations c
-        JOIN messages m ON c.id = m.conversation_id
-        WHERE c.is_active = TRUE
-        AND (m.content ILIKE '%{search_term}%' OR c.title ILIKE '%{search_term}%')
-        ORDER BY c.updated_at DESC;
+        SELECT id, session_id, title, created_at, match_count, rank, preview
+        FROM search_conversations('{search_term}');
         """
         
         print(f"SQL Query: {sql_query}")
@@ -119,15 +111,18 @@ class SupabaseViewer:
         # Example SQL queries for statistics
         queries = {
             "Total Conversations": "SELECT COUNT(*) FROM conversations WHERE is_active = TRUE;",
-            "Total Messages": "SELECT COUNT(*) FROM messages;",
+            "Total Messages": "SELECT SUM(message_count) FROM conversation_summaries;",
             "Average Messages per Conversation": """
-                SELECT AVG(message_count) FROM (
-                    SELECT COUNT(*) as message_count 
-                    FROM messages m 
-                    JOIN conversations c ON m.conversation_id = c.id 
-                    WHERE c.is_active = TRUE 
-                    GROUP BY c.id
-                ) as counts;
+                SELECT AVG(s.message_count)
+                FROM conversation_summaries s
+                JOIN conversations c ON s.conversation_id = c.id
+                WHERE c.is_active = TRUE;
+            """,
+            "Longest Conversation": """
+                SELECT MAX(s.duration_seconds) * INTERVAL '1 second'
+                FROM conversation_summaries s
+                JOIN conversations c ON s.conversation_id = c.id
+                WHERE c.is_active = TRUE;
             """,
             "Most Active Day": """
                 SELECT DATE(created_at) as day, COUNT(*) as conversations
@@ -167,7 +162,7 @@ class SupabaseViewer:
                     'content', m.content,
                     'audio_file_path', m.audio_file_path,
                     'confidence', m.transcription_confidence
-                ) ORDER BY m.timestamp_str
+                ) ORDER BY m.seq
             ) as messages
         FROM conversations c
         LEFT JOIN messages m ON c.id = m.conversation_id
@@ -198,7 +193,8 @@ class SupabaseViewer:
         tables = [
             ("conversations", "Stores conversation sessions"),
             ("messages", "Stores individual messages"),
-            ("conversation_fusions", "Tracks conversation merges")
+            ("conversation_summaries", "Per-conversation message counts and durations"),
+            ("conversation_fusions", "Tracks conversation merges and where each source ended up")
         ]
         
         for table_name, description in tables:
@@ -209,6 +205,9 @@ class SupabaseViewer:
         functions = [
             ("generate_session_id()", "Generates unique session IDs"),
             ("fuse_conversations()", "Merges two conversations"),
+            ("fuse_conversations_many()", "Merges several conversations in one transaction"),
+            ("resolve_conversation()", "Finds the conversation now holding a session"),
+            ("search_conversations()", "Ranked full-text search"),
             ("get_conversation_history_json()", "Gets conversation as JSON")
         ]
         
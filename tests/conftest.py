@@ -0,0 +1,67 @@
+"""Shared fixtures: an embedded SQLite store per test, the web server app on top of it,
+and a store on a scratch PostgreSQL database when HEYCHAT_TEST_DATABASE_URL is set"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conversation_store import BASE_DIR, ConversationStore, PostgresBackend, SQLiteBackend  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ConversationStore(SQLiteBackend(tmp_path / 'heychat.db'))
+    yield store
+    store.backend.pool.close()
+
+
+def pin_updated_at(store, conv_id, value):
+    """Set a conversation's updated_at (the updated_at trigger ignores direct updates)"""
+    with store.backend.pool.connection() as conn:
+        conn.execute("UPDATE conversations SET updated_at = ? WHERE id = ?", (value, conv_id))
+
+
+@pytest.fixture
+def pg_store():
+    """Store on HEYCHAT_TEST_DATABASE_URL with schema.sql applied and every table emptied.
+
+    Skipped when the variable is unset; point it at a throwaway database.
+    """
+    url = os.environ.get('HEYCHAT_TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("HEYCHAT_TEST_DATABASE_URL not set")
+    psycopg = pytest.importorskip('psycopg')
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute((BASE_DIR / 'schema.sql').read_text())
+        conn.execute("TRUNCATE conversations, messages, conversation_fusions, conversation_summaries "
+                     "RESTART IDENTITY CASCADE")
+    store = ConversationStore(PostgresBackend(url))
+    yield store
+    store.backend.pool.close()
+
+
+@pytest.fixture
+def set_updated_at(store):
+    return lambda conv_id, value: pin_updated_at(store, conv_id, value)
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """Flask test client of heychat_web_server backed by a fresh SQLite store"""
+    url = f"sqlite:///{tmp_path / 'web.db'}"
+    monkeypatch.setenv('HEYCHAT_DATABASE_URL', url)
+    import heychat_web_server
+    heychat_web_server.conversation_cache.clear()
+    store = heychat_web_server.conversation_store()
+    yield heychat_web_server.app.test_client(), store
+    heychat_web_server.conversation_cache.clear()
+    store.backend.pool.close()
+
+
+@pytest.fixture
+def set_web_updated_at(web):
+    return lambda conv_id, value: pin_updated_at(web[1], conv_id, value)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Regenerate the WAV fixtures used by the VAD and audio preparation tests.
+Deterministic (fixed seed), 16 kHz mono int16:
+
+    silence.wav       1.0s of very quiet room noise
+    noise.wav         2.0s of steady fan-like noise, no speech
+    speech_pause.wav  0.5s room noise, 1.6s voiced sound, 0.5s pause,
+                      1.0s voiced sound, 1.0s room noise
+
+Usage:
+    python3 tests/fixtures/make_fixtures.py
+"""
+
+import wave
+from pathlib import Path
+
+import numpy as np
+
+RATE = 16000
+FIXTURES = Path(__file__).resolve().parent
+
+rng = np.random.default_rng(16)
+
+
+def room(seconds, level=30):
+    return rng.normal(0, level, int(seconds * RATE))
+
+
+def voiced(seconds, pitch=140):
+    """Harmonic tone with a 4 Hz syllable-like swell, over room noise"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    tone = sum(np.sin(2 * np.pi * pitch * n * t) / n for n in range(1, 6))
+    envelope = 0.65 + 0.35 * np.sin(2 * np.pi * 4 * t)
+    return tone * envelope * 5000 + room(seconds)
+
+
+def fan(seconds):
+    """Low-passed noise with a steady hum"""
+    white = rng.normal(0, 900, int(seconds * RATE))
+    smoothed = np.convolve(white, np.ones(8) / 8, mode='same')
+    t = np.arange(len(white)) / RATE
+    return smoothed + 200 * np.sin(2 * np.pi * 120 * t)
+
+
+def write(name, samples):
+    with wave.open(str(FIXTURES / name), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(np.clip(np.round(samples), -32768, 32767).astype('<i2').tobytes())
+
+
+def main():
+    write('silence.wav', room(1.0, level=8))
+    write('noise.wav', fan(2.0))
+    write('speech_pause.wav', np.concatenate([room(0.5), voiced(1.6), room(0.5), voiced(1.0), room(1.0)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Batched inserts: reserved seq ranges, ids in order, summaries, on both backends"""
+
+import threading
+
+import pytest
+
+from conversation_store import StoreError
+
+
+@pytest.fixture(params=['store', 'pg_store'])
+def any_store(request):
+    return request.getfixturevalue(request.param)
+
+
+def rows(prefix, count, start=0):
+    return [(f"202501011200{n:02d}", 'user' if n % 2 == 0 else 'assistant', f"{prefix}{n}")
+            for n in range(start, start + count)]
+
+
+def test_ids_come_back_in_row_order(any_store):
+    conv_id = any_store.create_conversation('batch')
+
+    ids = any_store.add_messages(conv_id, rows('m', 5))
+
+    messages = any_store.get_conversation('batch')['messages']
+    assert ids == [msg['id'] for msg in messages]
+    assert [(msg['seq'], msg['content']) for msg in messages] == [(n + 1, f"m{n}") for n in range(5)]
+
+
+def test_batches_and_single_inserts_share_one_sequence(any_store):
+    conv_id = any_store.create_conversation('mixed')
+
+    any_store.add_message(conv_id, '20250101115900', 'user', 'single 1')
+    any_store.add_messages(conv_id, rows('batch a', 3))
+    any_store.add_message(conv_id, '20250101115901', 'assistant', 'single 2')
+    any_store.add_messages(conv_id, rows('batch b', 2))
+
+    messages = any_store.get_conversation('mixed')['messages']
+    assert [msg['seq'] for msg in messages] == list(range(1, 8))
+    assert [msg['content'] for msg in messages] == [
+        'single 1', 'batch a0', 'batch a1', 'batch a2', 'single 2', 'batch b0', 'batch b1'
+    ]
+    any_store.add_message(conv_id, '20250101115902', 'user', 'after')
+    assert any_store.get_conversation('mixed')['messages'][-1]['seq'] == 8
+
+
+def test_summary_counts_the_whole_batch(any_store):
+    conv_id = any_store.create_conversation('summary')
+    any_store.add_message(conv_id, '20250101115000', 'user', 'first')
+
+    any_store.add_messages(conv_id, rows('m', 4))
+
+    conv = next(conv for conv in any_store.list_conversations(limit=100) if conv['session_id'] == 'summary')
+    assert conv['message_count'] == 5
+    assert conv['duration'] == '0:10:03'
+    assert conv['last_message_preview'] == 'm3'
+
+
+def test_concurrent_batches_get_disjoint_ranges(any_store):
+    conv_id = any_store.create_conversation('concurrent')
+    results = {}
+
+    def write(name):
+        results[name] = any_store.add_messages(conv_id, rows(name, 20))
+
+    threads = [threading.Thread(target=write, args=(f"t{n}-",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    messages = any_store.get_conversation('concurrent')['messages']
+    assert [msg['seq'] for msg in messages] == list(range(1, 81))
+    by_id = {msg['id']: msg['content'] for msg in messages}
+    for name, ids in results.items():
+        assert [by_id[message_id] for message_id in ids] == [f"{name}{n}" for n in range(20)]
+
+
+def test_missing_conversation_writes_nothing(any_store):
+    with pytest.raises(StoreError, match="not found"):
+        any_store.add_messages(9999, rows('m', 2))
+
+    assert any_store.get_stats()['total_messages'] == 0
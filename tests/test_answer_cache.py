@@ -0,0 +1,141 @@
+"""Answer cache: exact and similar hits, TTL, LRU eviction, persistence and the CLI"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from answer_cache import DEFAULT_TTL, VOLATILE_TTL, AnswerCache, ask, normalize
+from stub_api_server import StubAPIServer
+
+REPO = Path(__file__).resolve().parent.parent
+MODEL = 'gpt-4o-mini'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingClient:
+    def __init__(self):
+        self.questions = []
+
+    def chat(self, messages, model=None, **params):
+        self.questions.append(messages[-1]['content'])
+        return f"answer {len(self.questions)}"
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def cache_at(tmp_path, clock, **options):
+    return AnswerCache(tmp_path / 'answers.json', clock=clock, **options)
+
+
+def test_normalized_repeats_hit(tmp_path, clock):
+    cache = cache_at(tmp_path, clock)
+    client = CountingClient()
+
+    assert ask(cache, client, "What is 5 miles in km?", MODEL) == "answer 1"
+    assert ask(cache, client, "  what is 5 MILES in km ", MODEL) == "answer 1"
+    assert ask(cache, client, "What is 5 miles in km?", 'other-model') == "answer 2"
+
+    assert len(client.questions) == 2
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 2
+    assert normalize("Héllo,  WORLD!") == "héllo world"
+
+
+def test_entries_expire_and_volatile_questions_expire_sooner(tmp_path, clock):
+    cache = cache_at(tmp_path, clock)
+    cache.put("what is the capital of france", MODEL, "Paris", 1.0)
+    cache.put("what is the weather today", MODEL, "Sunny", 1.0)
+
+    clock.now += VOLATILE_TTL + 1
+    assert cache.get("what is the weather today", MODEL) is None
+    assert cache.get("what is the capital of france", MODEL)['answer'] == "Paris"
+
+    clock.now += DEFAULT_TTL
+    assert cache.get("what is the capital of france", MODEL) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted(tmp_path, clock):
+    cache = cache_at(tmp_path, clock, maxsize=2)
+    cache.put("one", MODEL, "1", 0.1)
+    cache.put("two", MODEL, "2", 0.1)
+    cache.get("one", MODEL)
+    cache.put("three", MODEL, "3", 0.1)
+
+    assert cache.get("two", MODEL) is None
+    assert cache.get("one", MODEL) and cache.get("three", MODEL)
+
+
+def test_similar_questions_hit_only_with_the_same_numbers(tmp_path, clock):
+    cache = cache_at(tmp_path, clock, similarity=0.7)
+    cache.put("what is 5 miles in kilometers", MODEL, "8.05 km", 1.5)
+
+    assert cache.get("what's 5 miles in kilometers", MODEL)['answer'] == "8.05 km"
+    assert cache.get("what is 6 miles in kilometers", MODEL) is None
+    assert cache.get("tell me a joke about cats", MODEL) is None
+    assert cache.stats['similar_hits'] == 1
+    assert cache.stats['saved_seconds'] == 1.5
+
+
+def test_exact_only_without_similarity(tmp_path, clock):
+    cache = cache_at(tmp_path, clock)
+    cache.put("what is 5 miles in kilometers", MODEL, "8.05 km", 1.5)
+
+    assert cache.get("what's 5 miles in kilometers", MODEL) is None
+
+
+def test_cache_and_stats_persist(tmp_path, clock):
+    cache = cache_at(tmp_path, clock)
+    cache.put("stay", MODEL, "here", 2.0)
+    cache.put("what time is it", MODEL, "noon", 2.0)
+    cache.get("stay", MODEL)
+    cache.save()
+
+    clock.now += VOLATILE_TTL + 1
+    reopened = cache_at(tmp_path, clock)
+
+    assert len(reopened) == 1
+    assert reopened.get("stay", MODEL)['answer'] == "here"
+    assert reopened.stats['hits'] == 2 and reopened.stats['saved_seconds'] == 4.0
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path, clock, capsys):
+    (tmp_path / 'answers.json').write_text('{not json')
+
+    assert len(cache_at(tmp_path, clock)) == 0
+    assert "Ignoring unreadable answer cache" in capsys.readouterr().err
+
+
+def test_cli_asks_once_then_answers_from_the_cache(tmp_path):
+    server = StubAPIServer(port=0).start()
+    env = {**os.environ, 'OPENAI_API_KEY': 'test', 'OPENAI_BASE_URL': server.base_url,
+           'HEYCHAT_ANSWER_CACHE_FILE': str(tmp_path / 'answers.json')}
+
+    def cli(*args):
+        return subprocess.run([sys.executable, str(REPO / 'answer_cache.py'), *args],
+                              capture_output=True, text=True, cwd=tmp_path, env=env)
+
+    try:
+        first = cli('ask', 'ping?')
+        second = cli('ask', 'Ping')
+    finally:
+        server.shutdown()
+        server.server_close()
+    stats = cli('stats')
+
+    assert first.stdout == second.stdout == "You said: ping?\n"
+    assert "🌐 Answered" in first.stderr and "⚡ Cached answer" in second.stderr
+    assert server.stats['completions'] == 1
+    assert "hit rate 50% (1/2" in stats.stdout
@@ -0,0 +1,96 @@
+"""Upload encoding: encoder selection, WAV fallback and the CLI"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import audio_prep
+from audio_prep import encode, prepare, resample
+from audio_stream import read_wav
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+REPO = Path(__file__).resolve().parent.parent
+
+FAILING = [sys.executable, '-c', 'import sys; sys.exit(1)']
+SILENT = [sys.executable, '-c', 'import sys; sys.stdin.buffer.read()']
+# Writes "fLaC" and the sample rate argument, ignoring the audio
+FAKE_FLAC = [sys.executable, '-c', 'import sys; sys.stdin.buffer.read(); '
+             'sys.stdout.write("fLaC " + sys.argv[1])', '{rate}']
+
+
+@pytest.fixture
+def encoders(monkeypatch):
+    """Replace the FLAC encoder commands; resets the one-time warning"""
+    monkeypatch.setattr(audio_prep, '_warned', set())
+
+    def use(*commands):
+        monkeypatch.setitem(audio_prep.FORMATS, 'flac', ('flac', 'audio/flac', list(commands)))
+    return use
+
+
+def tone(seconds=0.5, rate=16000, hz=440):
+    t = np.arange(int(seconds * rate)) / rate
+    return (np.sin(2 * np.pi * hz * t) * 8000).astype(np.int16)
+
+
+def test_first_working_encoder_is_used(encoders):
+    encoders(FAILING, SILENT, FAKE_FLAC)
+
+    data, codec = encode(tone(), 16000, 'flac')
+
+    assert (data, codec) == (b'fLaC 16000', 'flac')
+
+
+def test_missing_encoders_fall_back_to_wav_with_one_warning(encoders, monkeypatch, capsys):
+    encoders(['no-such-encoder-binary', '-'], FAILING)
+
+    first = prepare(tone(), 16000, 'flac', trim=False)
+    second = prepare(tone(), 16000, 'flac', trim=False)
+
+    assert first.codec == second.codec == 'wav'
+    assert first.content_type == 'audio/wav' and first.filename('turn') == 'turn.wav'
+    assert first.data[:4] == b'RIFF'
+    assert capsys.readouterr().err.count("No working flac encoder") == 1
+
+
+def test_wav_never_warns(capsys):
+    data, codec = encode(tone(), 16000, 'wav')
+
+    assert codec == 'wav' and data[:4] == b'RIFF'
+    assert capsys.readouterr().err == ''
+
+
+def test_resampling_keeps_the_pitch():
+    down, rate = resample(tone(rate=48000, hz=1000), 48000)
+
+    spectrum = np.abs(np.fft.rfft(down))
+    assert rate == 16000
+    assert np.argmax(spectrum) * rate / len(down) == pytest.approx(1000, abs=5)
+
+
+def test_cli_writes_the_upload(tmp_path):
+    result = subprocess.run(
+        [sys.executable, str(REPO / 'audio_prep.py'), str(FIXTURES / 'speech_pause.wav'),
+         '--codec', 'wav', '--output', str(tmp_path / 'upload')],
+        capture_output=True, text=True, cwd=REPO
+    )
+
+    assert result.returncode == 0
+    assert result.stdout.strip() == str(tmp_path / 'upload.wav')
+    assert "📦 Upload:" in result.stderr
+    samples, rate = read_wav(tmp_path / 'upload.wav')
+    assert rate == 16000 and 3.3 <= len(samples) / rate <= 3.5
+
+
+def test_cli_rejects_a_non_wav(tmp_path):
+    bogus = tmp_path / 'notes.wav'
+    bogus.write_text('not audio')
+
+    result = subprocess.run([sys.executable, str(REPO / 'audio_prep.py'), str(bogus)],
+                            capture_output=True, text=True, cwd=REPO)
+
+    assert result.returncode == 1
+    assert "❌ Could not prepare" in result.stderr
@@ -0,0 +1,115 @@
+"""Token-budgeted chat context: window selection, compaction and caching"""
+
+from context_window import MESSAGE_OVERHEAD, ContextWindow, approximate_tokens, summary_request
+
+
+def words(text):
+    return len(text.split())
+
+
+def turns(count, size=10):
+    """``count`` alternating user/assistant messages of ``size`` words each"""
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": " ".join([f"w{i}"] * size)}
+            for i in range(count)]
+
+
+def test_window_keeps_the_latest_messages_that_fit():
+    history = turns(10)
+    window = ContextWindow(budget=50, counter=words)
+
+    messages = window.messages(history)
+
+    per_message = 10 + MESSAGE_OVERHEAD
+    assert messages == history[-(50 // per_message):]
+    assert window.sent_tokens == len(messages) * per_message
+    assert window.tokens(history) == 10 * per_message
+
+
+def test_latest_message_is_sent_even_if_over_budget():
+    history = turns(1, size=100)
+
+    assert ContextWindow(budget=10, counter=words).messages(history) == history
+
+
+def test_messages_are_counted_once():
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return words(text)
+
+    window = ContextWindow(budget=1000, counter=counter)
+    history = turns(4)
+    window.messages(history)
+    history.extend(turns(2))
+    window.messages(history)
+    window.tokens(history)
+
+    assert len(calls) == 6
+
+
+def test_compaction_folds_old_turns_into_the_summary():
+    history = turns(12)
+    window = ContextWindow(budget=100, counter=words, keep_recent=4)
+    folded = []
+
+    def summarize(previous, messages):
+        folded.append((previous, [m['content'] for m in messages]))
+        return "the earlier chat"
+
+    assert window.needs_compaction(history)
+    summary = window.compact(history, summarize)
+
+    cut = summary['covers']
+    assert cut % 2 == 0  # starts on a user turn
+    assert cut <= len(history) - 4
+    assert folded == [('', [m['content'] for m in history[:cut]])]
+    assert summary['tokens'] == 3 + MESSAGE_OVERHEAD
+    assert window.tokens(history) <= 100 * 0.6 + summary['tokens']
+    messages = window.messages(history)
+    assert messages[0] == {"role": "system", "content": "Summary of the earlier conversation: the earlier chat"}
+    assert messages[1:] == history[cut:]
+    assert not window.needs_compaction(history)
+
+
+def test_compaction_without_summarizer_drops_old_turns():
+    history = turns(12)
+    window = ContextWindow(budget=100, counter=words)
+
+    summary = window.compact(history)
+
+    assert summary['text'] == '' and summary['tokens'] == 0
+    assert window.messages(history) == history[summary['covers']:]
+
+
+def test_no_compaction_under_budget_or_with_only_recent_turns():
+    window = ContextWindow(budget=1000, counter=words)
+    assert window.compact(turns(6)) is None
+
+    window = ContextWindow(budget=10, counter=words, keep_recent=4)
+    assert window.compact(turns(4)) is None
+
+
+def test_cleared_history_resets_counts():
+    window = ContextWindow(budget=1000, counter=words)
+    window.tokens(turns(6))
+    history = turns(2)
+
+    assert window.tokens(history) == 2 * (10 + MESSAGE_OVERHEAD)
+
+
+def test_restored_summary_skips_covered_messages():
+    history = turns(6)
+    window = ContextWindow(budget=1000, counter=words)
+    window.reset({"text": "before", "covers": 4, "tokens": 5})
+
+    assert window.tokens(history) == 5 + 2 * (10 + MESSAGE_OVERHEAD)
+    assert window.messages(history)[1:] == history[4:]
+
+
+def test_approximate_tokens_and_summary_request():
+    assert approximate_tokens("") == 1
+    assert approximate_tokens("x" * 400) == 101
+    request = summary_request("", turns(2, size=1))
+    assert request[0]['role'] == 'system'
+    assert "(none)" in request[1]['content'] and "user: w0" in request[1]['content']
@@ -0,0 +1,154 @@
+"""Archive export/import round trips, fusion records included"""
+
+import gzip
+import io
+import json
+
+import pytest
+
+import conversation_archive
+from conversation_archive import import_archive, iter_gzip, iter_ndjson, open_archive_events, write_archive
+from conversation_store import ConversationStore, SQLiteBackend
+
+
+@pytest.fixture
+def restored(tmp_path):
+    store = ConversationStore(SQLiteBackend(tmp_path / 'restored.db'))
+    yield store
+    store.backend.pool.close()
+
+
+@pytest.fixture
+def fused_store(store):
+    """a -> b -> c fusion chain plus an unrelated conversation d"""
+    a, b, c, d = (store.create_conversation(name, f"Conversation {name}") for name in 'abcd')
+    store.add_message(a, '20250101120000', 'user', 'from a', metadata={'lang': 'en'})
+    store.add_message(b, '20250101120001', 'user', 'from b')
+    store.add_message(c, '20250101120002', 'assistant', 'from c', confidence=0.9)
+    store.add_message(d, '20250101120003', 'user', 'from d')
+    store.fuse_conversations(a, b, reason='first')
+    store.fuse_conversations(b, c, reason='second')
+    return store
+
+
+def contents(store, session_id):
+    return [msg['content'] for msg in store.get_conversation(session_id)['messages']]
+
+
+@pytest.mark.parametrize('format', ['ndjson', 'parquet'])
+def test_round_trip_restores_messages_and_lineage(fused_store, restored, tmp_path, format):
+    if format == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / f"archive.{'ndjson.gz' if format == 'ndjson' else 'parquet'}"
+
+    exported = write_archive(fused_store, path, format)
+    stats = import_archive(restored, path)
+
+    assert (exported['conversations'], exported['messages'], exported['fusions']) == (4, 4, 2)
+    assert (stats['conversations'], stats['messages'], stats['fusions']) == (4, 4, 2)
+    assert contents(restored, 'c') == ['from a', 'from b', 'from c']
+    assert restored.get_conversation('a')['messages'] == []
+    for session_id in 'abc':
+        assert restored.resolve_conversation(session_id)['session_id'] == 'c'
+    assert restored.resolve_conversation('d')['session_id'] == 'd'
+    assert restored.get_conversation_id('a') is None
+
+
+def test_reimport_is_a_no_op(fused_store, restored, tmp_path):
+    path = tmp_path / 'archive.ndjson.gz'
+    write_archive(fused_store, path)
+    import_archive(restored, path)
+
+    again = import_archive(restored, path)
+
+    assert (again['conversations'], again['messages'], again['fusions']) == (0, 0, 0)
+    assert again['skipped_conversations'] == 4
+    assert contents(restored, 'c') == ['from a', 'from b', 'from c']
+
+
+def test_fusions_into_conversations_outside_the_archive_are_skipped(fused_store, restored, tmp_path):
+    path = tmp_path / 'inactive.ndjson.gz'
+    exported = write_archive(fused_store, path, activity='inactive')
+
+    stats = import_archive(restored, path)
+
+    assert exported['conversations'] == 2 and exported['fusions'] == 2
+    assert stats['fusions'] == 0 and stats['skipped_fusions'] == 2
+
+
+def test_fusions_into_conversations_already_restored_are_linked(fused_store, restored, tmp_path):
+    active, inactive = tmp_path / 'active.ndjson.gz', tmp_path / 'inactive.ndjson.gz'
+    write_archive(fused_store, active, activity='active')
+    write_archive(fused_store, inactive, activity='inactive')
+
+    import_archive(restored, active)
+    stats = import_archive(restored, inactive)
+
+    assert stats['fusions'] == 2
+    assert restored.resolve_conversation('a')['session_id'] == 'c'
+
+
+def test_ndjson_stream_ends_with_fusion_records(fused_store):
+    data = gzip.decompress(b''.join(iter_gzip(iter_ndjson(fused_store))))
+    records = [json.loads(line) for line in data.decode().splitlines()]
+
+    assert records[0]['type'] == 'archive' and records[0]['version'] == 2
+    fusions = [record for record in records if record['type'] == 'fusion']
+    assert records[-2:] == fusions
+    assert [(f['source_session_id'], f['target_session_id'], f['surviving_session_id'], f['reason'])
+            for f in fusions] == [('a', 'b', 'c', 'first'), ('b', 'c', 'c', 'second')]
+
+
+def test_import_from_file_object(fused_store, restored):
+    archive = io.BytesIO(b''.join(iter_gzip(iter_ndjson(fused_store))))
+
+    stats = import_archive(restored, archive)
+
+    assert stats['conversations'] == 4 and stats['fusions'] == 2
+
+
+@pytest.mark.parametrize('format', ['ndjson', 'parquet'])
+def test_conversations_spanning_batches_are_counted_once(fused_store, tmp_path, format):
+    if format == 'parquet':
+        pytest.importorskip('pyarrow')
+    fused_store.add_message(fused_store.get_conversation_id('d'), '20250101120004', 'assistant', 'more d')
+
+    exported = write_archive(fused_store, tmp_path / f"archive.{format}", format, batch_size=1)
+
+    assert (exported['conversations'], exported['messages']) == (4, 5)
+
+
+@pytest.fixture
+def opened_files(monkeypatch):
+    """Every file gzip.open hands to the archive reader"""
+    files = []
+    real_open = gzip.open
+
+    def tracking_open(*args, **kwargs):
+        files.append(real_open(*args, **kwargs))
+        return files[-1]
+    monkeypatch.setattr(conversation_archive.gzip, 'open', tracking_open)
+    return files
+
+
+def test_failed_import_closes_the_archive(fused_store, restored, tmp_path, opened_files):
+    path = tmp_path / 'broken.ndjson.gz'
+    data = b''.join(iter_gzip(iter_ndjson(fused_store)))
+    path.write_bytes(data + gzip.compress(b'{"type": "message", "session_id": \n'))
+
+    with pytest.raises(ValueError):
+        import_archive(restored, path)
+
+    assert [f.closed for f in opened_files] == [True]
+    assert restored.list_conversations(active_only=False) == []
+
+
+def test_abandoned_event_stream_closes_the_archive(fused_store, tmp_path, opened_files):
+    path = tmp_path / 'archive.ndjson.gz'
+    write_archive(fused_store, path)
+
+    events = open_archive_events(path)
+    assert next(events)[0] == 'conversation'
+    events.close()
+
+    assert [f.closed for f in opened_files] == [True]
@@ -0,0 +1,233 @@
+"""ConversationStore on the SQLite backend: keyset pagination, seq ordering, fusion"""
+
+import pytest
+
+from conversation_store import StoreError, decode_cursor, encode_cursor
+
+
+def make_conversations(store, set_updated_at, count):
+    """Create conversations conv_0..conv_<count-1>, conv_<n> updated at second n"""
+    ids = []
+    for n in range(count):
+        conv_id = store.create_conversation(f"conv_{n}", f"Conversation {n}")
+        set_updated_at(conv_id, f"2025-01-01 00:00:{n:02d}")
+        ids.append(conv_id)
+    return ids
+
+
+def collect_pages(store, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = store.list_conversations_page(limit=limit, cursor=cursor, **kwargs)
+        pages.append([conv['session_id'] for conv in page['conversations']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('2025-01-01 00:00:05', 42)
+    assert decode_cursor(cursor) == ('2025-01-01 00:00:05', 42)
+
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', '', '!!!', encode_cursor('x', 1)[:-3]])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_pages_walk_every_conversation_once_newest_first(store, set_updated_at):
+    make_conversations(store, set_updated_at, 7)
+
+    pages = collect_pages(store, limit=3)
+
+    assert pages == [['conv_6', 'conv_5', 'conv_4'], ['conv_3', 'conv_2', 'conv_1'], ['conv_0']]
+
+
+def test_exact_last_page_has_no_cursor(store, set_updated_at):
+    make_conversations(store, set_updated_at, 4)
+
+    assert collect_pages(store, limit=2) == [['conv_3', 'conv_2'], ['conv_1', 'conv_0']]
+
+
+def test_ties_on_updated_at_break_by_id(store, set_updated_at):
+    ids = [store.create_conversation(f"tie_{n}") for n in range(5)]
+    for conv_id in ids:
+        set_updated_at(conv_id, '2025-01-01 00:00:00')
+
+    pages = collect_pages(store, limit=2)
+
+    assert sum(pages, []) == [f"tie_{n}" for n in reversed(range(5))]
+
+
+def test_write_during_paging_does_not_skip_or_repeat(store, set_updated_at):
+    ids = make_conversations(store, set_updated_at, 6)
+    first = store.list_conversations_page(limit=3)
+
+    # conv_0 moves to the head of the list; the rest of the walk is unaffected
+    set_updated_at(ids[0], '2025-01-02 00:00:00')
+    rest = store.list_conversations_page(limit=3, cursor=first['next_cursor'])
+
+    assert [conv['session_id'] for conv in first['conversations']] == ['conv_5', 'conv_4', 'conv_3']
+    assert [conv['session_id'] for conv in rest['conversations']] == ['conv_2', 'conv_1']
+    assert rest['next_cursor'] is None
+
+
+def test_inactive_conversations_are_listed_only_on_request(store, set_updated_at):
+    source, target = make_conversations(store, set_updated_at, 2)
+    store.fuse_conversations(source, target)
+
+    assert collect_pages(store, limit=5) == [['conv_1']]
+    assert sorted(collect_pages(store, limit=5, active_only=False)[0]) == ['conv_0', 'conv_1']
+
+
+def test_bad_cursor_is_a_value_error(store):
+    with pytest.raises(ValueError):
+        store.list_conversations_page(cursor='bogus')
+
+
+@pytest.mark.parametrize('limit', [0, -1, -3])
+def test_limit_below_one_is_a_value_error(store, limit):
+    for n in range(4):
+        store.create_conversation(f"conv_{n}")
+
+    with pytest.raises(ValueError, match="limit"):
+        store.list_conversations_page(limit=limit)
+
+
+def test_seq_numbers_messages_in_insert_order(store):
+    conv_id = store.create_conversation('seq')
+    # Same timestamp for every row: only seq keeps them apart
+    for n in range(5):
+        store.add_message(conv_id, '20250101120000', 'user' if n % 2 == 0 else 'assistant', f"m{n}")
+
+    conversation = store.get_conversation('seq')
+
+    assert [msg['seq'] for msg in conversation['messages']] == [1, 2, 3, 4, 5]
+    assert [msg['content'] for msg in store.get_history(conv_id)] == [f"m{n}" for n in range(5)]
+
+
+def test_seq_is_per_conversation(store):
+    first = store.create_conversation('first')
+    second = store.create_conversation('second')
+    store.add_message(first, '20250101120000', 'user', 'a')
+    store.add_message(second, '20250101120001', 'user', 'b')
+    store.add_message(first, '20250101120002', 'assistant', 'c')
+
+    assert [msg['seq'] for msg in store.get_conversation('first')['messages']] == [1, 2]
+    assert [msg['seq'] for msg in store.get_conversation('second')['messages']] == [1]
+
+
+def test_fusion_moves_messages_and_renumbers_in_time_order(store):
+    source = store.create_conversation('source')
+    target = store.create_conversation('target')
+    store.add_message(target, '20250101120000', 'user', 't1')
+    store.add_message(source, '20250101120001', 'user', 's1')
+    store.add_message(target, '20250101120002', 'assistant', 't2')
+    store.add_message(source, '20250101120003', 'assistant', 's2')
+
+    assert store.fuse_conversations(source, target, reason='Same chat') is True
+
+    fused = store.get_conversation('target')
+    assert [msg['content'] for msg in fused['messages']] == ['t1', 's1', 't2', 's2']
+    assert [msg['seq'] for msg in fused['messages']] == [1, 2, 3, 4]
+    assert store.get_conversation('source')['messages'] == []
+    assert store.get_conversation_id('source') is None
+
+
+def test_fusion_keeps_seq_counter_and_summary_consistent(store):
+    source = store.create_conversation('source')
+    target = store.create_conversation('target')
+    store.add_message(source, '20250101120000', 'user', 's1')
+    store.add_message(target, '20250101120001', 'user', 't1')
+    store.fuse_conversations(source, target)
+
+    store.add_message(target, '20250101120002', 'assistant', 'after')
+
+    assert [msg['seq'] for msg in store.get_conversation('target')['messages']] == [1, 2, 3]
+    listed = {conv['session_id']: conv for conv in store.list_conversations(active_only=False)}
+    assert listed['target']['message_count'] == 3
+    assert not listed['source']['message_count']
+
+
+def test_fuse_many_reports_moved_messages(store):
+    target = store.create_conversation('target')
+    sources = [store.create_conversation(f"source_{n}") for n in range(3)]
+    for n, source in enumerate(sources):
+        store.add_message(source, f"2025010112000{n}", 'user', f"s{n}")
+
+    assert store.fuse_many(sources, target) == 3
+    assert [msg['content'] for msg in store.get_conversation('target')['messages']] == ['s0', 's1', 's2']
+
+
+def test_resolve_follows_fusion_chain(store):
+    a, b, c = (store.create_conversation(name) for name in 'abc')
+    store.fuse_conversations(a, b)
+    store.fuse_conversations(b, c)
+
+    assert store.resolve_conversation('a')['session_id'] == 'c'
+    assert store.resolve_conversation('b')['session_id'] == 'c'
+    assert store.resolve_conversation('c') == {'id': c, 'session_id': 'c', 'is_active': True}
+    assert store.resolve_conversation('missing') is None
+
+
+def test_fuse_missing_conversation_fails_cleanly(store):
+    target = store.create_conversation('target')
+    store.add_message(target, '20250101120000', 'user', 'kept')
+
+    with pytest.raises(StoreError):
+        store.fuse_conversations(9999, target)
+
+    assert [msg['content'] for msg in store.get_conversation('target')['messages']] == ['kept']
+
+
+def test_fuse_many_breaks_timestamp_ties_target_first_then_sources_in_order(store):
+    target = store.create_conversation('target')
+    first = store.create_conversation('first')
+    second = store.create_conversation('second')
+    same = '20250101120000'
+    store.add_message(second, same, 'user', 'second.1')
+    store.add_message(target, same, 'user', 'target.1')
+    store.add_message(first, same, 'user', 'first.1')
+    store.add_message(first, same, 'assistant', 'first.2')
+    store.add_message(target, '20250101115959', 'user', 'target.0')
+
+    assert store.fuse_many([second, first, second], target) == 3
+
+    messages = store.get_conversation('target')['messages']
+    assert [msg['content'] for msg in messages] == ['target.0', 'target.1', 'second.1', 'first.1', 'first.2']
+    assert [msg['seq'] for msg in messages] == [1, 2, 3, 4, 5]
+
+
+def test_fuse_many_records_one_fusion_per_source_and_repoints_lineage(store):
+    old, a, b, target = (store.create_conversation(name) for name in ('old', 'a', 'b', 'target'))
+    store.fuse_conversations(old, a, reason='earlier')
+
+    store.fuse_many([a, b], target, reason='cleanup')
+
+    with store.backend.pool.connection() as conn:
+        rows = conn.execute("""
+            SELECT source_conversation_id, target_conversation_id, surviving_conversation_id, fusion_reason
+            FROM conversation_fusions ORDER BY id
+        """).fetchall()
+    assert [tuple(row) for row in rows] == [(old, a, target, 'earlier'), (a, target, target, 'cleanup'),
+                                           (b, target, target, 'cleanup')]
+    assert {name: store.resolve_conversation(name)['session_id'] for name in ('old', 'a', 'b')} == \
+        dict.fromkeys(('old', 'a', 'b'), 'target')
+    assert not any(conv['is_active'] for conv in store.list_conversations(active_only=False)
+                   if conv['session_id'] != 'target')
+
+
+@pytest.mark.parametrize('sources, target, error', [
+    ([], 1, ValueError), ([1, 2], 1, ValueError), ([2, 9999], 1, StoreError)
+])
+def test_fuse_many_rejects_bad_input_without_changes(store, sources, target, error):
+    for name in ('target', 'source'):
+        conv_id = store.create_conversation(name)
+        store.add_message(conv_id, '20250101120000', 'user', name)
+
+    with pytest.raises(error):
+        store.fuse_many(sources, target)
+
+    assert [msg['content'] for msg in store.get_conversation('source')['messages']] == ['source']
+    assert store.resolve_conversation('source')['session_id'] == 'source'
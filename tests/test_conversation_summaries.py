@@ -0,0 +1,99 @@
+"""conversation_summaries stays equal to what the messages table says"""
+
+from conversation_store import refresh_summary
+
+
+def summary_row(store, conv_id):
+    with store.backend.pool.connection() as conn:
+        row = conn.execute("SELECT * FROM conversation_summaries WHERE conversation_id = ?",
+                           (conv_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def rebuilt_row(store, conv_id):
+    """The row refresh_summary computes from scratch, rolled back afterwards"""
+    with store.backend.pool.connection() as conn:
+        conn.execute("SAVEPOINT rebuild")
+        refresh_summary(store.backend, conn, conv_id)
+        row = conn.execute("SELECT * FROM conversation_summaries WHERE conversation_id = ?",
+                           (conv_id,)).fetchone()
+        conn.execute("ROLLBACK TO rebuild")
+        conn.execute("RELEASE rebuild")
+    return dict(row) if row else None
+
+
+def listed(store, session_id):
+    return next(conv for conv in store.list_conversations(limit=100, active_only=False)
+                if conv['session_id'] == session_id)
+
+
+def test_summary_tracks_inserts(store):
+    conv_id = store.create_conversation('chat')
+    store.add_message(conv_id, '20250101120000', 'user', 'first question')
+    store.add_message(conv_id, '20250101120130', 'assistant', 'x' * 500)
+
+    conv = listed(store, 'chat')
+
+    assert conv['message_count'] == 2
+    assert conv['duration'] == '0:01:30'
+    assert conv['first_message_at'].startswith('2025-01-01T12:00:00')
+    assert conv['last_message_preview'] == 'x' * 200
+    assert summary_row(store, conv_id) == rebuilt_row(store, conv_id)
+
+
+def test_out_of_order_timestamps_and_batches_match_a_rebuild(store):
+    conv_id = store.create_conversation('batch')
+    store.add_message(conv_id, '20250101120500', 'user', 'late clock')
+    store.add_messages(conv_id, [
+        ('20250101120000', 'user', 'early'),
+        ('20250101121000', 'assistant', 'latest timestamp'),
+        ('20250101120200', 'user', 'newest message'),
+    ])
+
+    row = summary_row(store, conv_id)
+
+    assert row['message_count'] == 4
+    assert (row['first_message'], row['last_message']) == ('20250101120000', '20250101121000')
+    assert row['duration_seconds'] == 600
+    # The preview is the newest message by seq, not by timestamp
+    assert row['last_message_preview'] == 'newest message'
+    assert row == rebuilt_row(store, conv_id)
+
+
+def test_fusion_moves_the_summary(store):
+    source = store.create_conversation('source')
+    target = store.create_conversation('target')
+    store.add_message(source, '20250101100000', 'user', 'from the source')
+    store.add_message(target, '20250101110000', 'user', 'from the target')
+
+    store.fuse_conversations(source, target)
+
+    assert summary_row(store, source) is None
+    row = summary_row(store, target)
+    assert row['message_count'] == 2 and row['duration_seconds'] == 3600
+    assert row == rebuilt_row(store, target)
+
+
+def test_stats_sum_the_summaries(store):
+    for n, count in enumerate((1, 3)):
+        conv_id = store.create_conversation(f"conv_{n}")
+        store.add_messages(conv_id, [(f"2025010112000{i}", 'user', f"m{i}") for i in range(count)])
+    store.create_conversation('empty')
+
+    stats = store.get_stats()
+
+    assert stats['total_messages'] == 4
+    assert stats['total_conversations'] == 3
+    assert stats['avg_messages_per_conversation'] == 2.0
+    assert stats['longest_conversation'] == '0:00:02'
+
+
+def test_deleting_a_conversation_drops_its_summary(store):
+    conv_id = store.create_conversation('gone')
+    store.add_message(conv_id, '20250101120000', 'user', 'bye')
+
+    with store.backend.pool.connection() as conn:
+        conn.execute("DELETE FROM conversations WHERE id = ?", (conv_id,))
+
+    assert summary_row(store, conv_id) is None
+    assert store.get_stats()['total_messages'] == 0
@@ -0,0 +1,76 @@
+"""Streaming conversation exports from the store and the export endpoint"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def chat(store):
+    conv_id = store.create_conversation('chat', 'Export me')
+    for n in range(7):
+        store.add_message(conv_id, f"2025010112000{n}", 'user' if n % 2 == 0 else 'assistant', f"message {n}")
+    return store
+
+
+def text(chunks):
+    return ''.join(chunks)
+
+
+def test_json_export_is_one_document_across_batches(chat):
+    chunks = list(chat.export_stream('chat', 'json', batch_size=3))
+
+    document = json.loads(text(chunks))
+    assert document['session_id'] == 'chat' and document['title'] == 'Export me'
+    assert [msg['content'] for msg in document['messages']] == [f"message {n}" for n in range(7)]
+    # Header, three message batches, closing bracket
+    assert len(chunks) == 5
+
+
+def test_ndjson_export(chat):
+    records = [json.loads(line) for line in text(chat.export_stream('chat', 'ndjson', batch_size=2)).splitlines()]
+
+    assert records[0]['type'] == 'conversation'
+    assert [record['content'] for record in records[1:]] == [f"message {n}" for n in range(7)]
+    assert {record['type'] for record in records[1:]} == {'message'}
+
+
+def test_txt_export(chat):
+    lines = text(chat.export_stream('chat', 'txt')).splitlines()
+
+    assert any('message 0' in line for line in lines)
+    assert [n for n in range(7) if any(f"message {n}" in line for line in lines)] == list(range(7))
+
+
+def test_empty_conversation_exports_valid_json(store):
+    store.create_conversation('empty')
+
+    assert json.loads(text(store.export_stream('empty', 'json')))['messages'] == []
+
+
+def test_missing_conversation_and_bad_format(chat):
+    assert chat.export_stream('missing') is None
+    with pytest.raises(ValueError):
+        chat.export_stream('chat', 'xml')
+
+
+def test_export_endpoint_streams_attachment(web):
+    client, store = web
+    conv_id = store.create_conversation('web')
+    store.add_message(conv_id, '20250101120000', 'user', 'hello')
+
+    response = client.get('/api/conversations/export/web?format=ndjson')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'conversation_web.ndjson' in response.headers['Content-Disposition']
+    assert json.loads(response.get_data(as_text=True).splitlines()[1])['content'] == 'hello'
+
+
+def test_export_endpoint_errors(web):
+    client, store = web
+    store.create_conversation('web')
+
+    assert client.get('/api/conversations/export/web?format=xml').status_code == 400
+    assert client.get('/api/conversations/export/missing').status_code == 404
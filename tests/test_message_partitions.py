@@ -0,0 +1,85 @@
+"""Monthly message partitions: naming helpers, and retention on PostgreSQL"""
+
+import csv
+import gzip
+import io
+from datetime import date
+
+import pytest
+
+from conversation_store import StoreError
+from message_partitions import ARCHIVE_COLUMNS, PartitionManager, _format_bytes, month_of, months_before
+
+
+def test_month_of_partition_names():
+    assert month_of('messages_2024_01') == date(2024, 1, 1)
+    assert month_of('messages_default') is None
+    assert month_of('messages_2024_1') is None
+
+
+@pytest.mark.parametrize('day, months, expected', [
+    (date(2025, 6, 15), 0, date(2025, 6, 1)),
+    (date(2025, 6, 15), 11, date(2024, 7, 1)),
+    (date(2025, 1, 31), 1, date(2024, 12, 1)),
+    (date(2025, 3, 1), 26, date(2023, 1, 1)),
+])
+def test_months_before(day, months, expected):
+    assert months_before(day, months) == expected
+
+
+def test_format_bytes():
+    assert _format_bytes(512) == "512.0 B"
+    assert _format_bytes(3 * 1024 * 1024) == "3.0 MB"
+    assert _format_bytes(5 * 1024 ** 4) == "5120.0 GB"
+
+
+def test_sqlite_store_is_rejected(store):
+    with pytest.raises(StoreError, match="PostgreSQL"):
+        PartitionManager(store)
+
+
+@pytest.fixture
+def old_month(pg_store):
+    """Two conversations with messages in January 2024 and one recent message"""
+    with pg_store.backend.pool.connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS messages_2024_01")
+    ids = [pg_store.create_conversation(name) for name in ('old', 'mixed')]
+    with pg_store.backend.pool.connection() as conn:
+        for conv_id, content in ((ids[0], 'january one'), (ids[0], 'january two'), (ids[1], 'january three')):
+            conn.execute("INSERT INTO messages (conversation_id, timestamp_str, role, content, created_at) "
+                         "VALUES (%s, '20240115120000', 'user', %s, '2024-01-15 12:00:00')", (conv_id, content))
+    pg_store.add_message(ids[1], '20251001120000', 'user', 'recent')
+    yield ids
+    with pg_store.backend.pool.connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS messages_2024_01")
+
+
+def message_count(store, session_id):
+    conv = next(conv for conv in store.list_conversations(limit=100, active_only=False)
+                if conv['session_id'] == session_id)
+    return conv['message_count']
+
+
+def test_retention_detaches_archives_and_drops_old_months(pg_store, old_month, tmp_path):
+    manager = PartitionManager(pg_store)
+
+    assert manager.maintain(0) >= 1
+    expired = manager.expired(keep_months=12, today=date(2025, 6, 15))
+    assert [partition['name'] for partition in expired] == ['messages_2024_01']
+
+    manager.detach('messages_2024_01')
+    assert message_count(pg_store, 'old') == 0
+    assert message_count(pg_store, 'mixed') == 1
+    detached = {partition['name']: partition['attached'] for partition in manager.partitions()}
+    assert detached['messages_2024_01'] is False
+
+    path, rows = manager.archive('messages_2024_01', tmp_path / 'archive')
+
+    assert rows == 3
+    assert path == tmp_path / 'archive' / 'messages_2024_01.csv.gz'
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        records = list(csv.DictReader(io.StringIO(f.read())))
+    assert tuple(records[0]) == ARCHIVE_COLUMNS
+    assert [record['content'] for record in records] == ['january one', 'january two', 'january three']
+    assert 'messages_2024_01' not in {partition['name'] for partition in manager.partitions()}
+    assert [msg['content'] for msg in pg_store.get_conversation('mixed')['messages']] == ['recent']
@@ -0,0 +1,51 @@
+"""fuse_many on PostgreSQL, and the schema.sql functions behind db_utils.sh fuse-many/resolve"""
+
+
+def contents(store, session_id):
+    return [msg['content'] for msg in store.get_conversation(session_id)['messages']]
+
+
+def seed(store):
+    """target, first and second with tied timestamps; returns their ids"""
+    ids = [store.create_conversation(name) for name in ('target', 'first', 'second')]
+    target, first, second = ids
+    same = '20250101120000'
+    store.add_message(second, same, 'user', 'second.1')
+    store.add_message(target, same, 'user', 'target.1')
+    store.add_message(first, same, 'user', 'first.1')
+    store.add_message(first, same, 'assistant', 'first.2')
+    store.add_message(target, '20250101115959', 'user', 'target.0')
+    return ids
+
+
+EXPECTED = ['target.0', 'target.1', 'second.1', 'first.1', 'first.2']
+
+
+def test_store_fuse_many_orders_like_sqlite(pg_store):
+    target, first, second = seed(pg_store)
+
+    assert pg_store.fuse_many([second, first], target) == 3
+
+    messages = pg_store.get_conversation('target')['messages']
+    assert [msg['content'] for msg in messages] == EXPECTED
+    assert [msg['seq'] for msg in messages] == [1, 2, 3, 4, 5]
+
+
+def test_schema_function_matches_the_store(pg_store):
+    target, first, second = seed(pg_store)
+    old = pg_store.create_conversation('old')
+    pg_store.fuse_conversations(old, second)
+
+    with pg_store.backend.pool.connection() as conn:
+        moved = conn.execute("SELECT fuse_conversations_many(ARRAY[%s, %s]::INTEGER[], %s, 'cleanup')",
+                             (second, first, target)).fetchone()
+        resolved = conn.execute("SELECT session_id FROM resolve_conversation('old')").fetchone()
+        summary = conn.execute("SELECT message_count FROM conversation_summaries WHERE conversation_id = %s",
+                               (target,)).fetchone()
+
+    assert list(moved.values()) == [3]
+    assert contents(pg_store, 'target') == EXPECTED
+    assert resolved['session_id'] == 'target'
+    assert summary['message_count'] == 5
+    pg_store.add_message(target, '20250101130000', 'assistant', 'after')
+    assert [msg['seq'] for msg in pg_store.get_conversation('target')['messages']] == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,86 @@
+"""Coalesced process output: OutputBatcher and ProcessManager emits"""
+
+import threading
+import time
+
+import pytest
+
+import heychat_web_server
+from heychat_web_server import OutputBatcher, ProcessManager
+
+
+class Recorder:
+    def __init__(self):
+        self.batches = []
+        self.emitted = threading.Event()
+
+    def __call__(self, lines):
+        self.batches.append(list(lines))
+        self.emitted.set()
+
+
+def test_lines_within_the_window_share_one_emit():
+    emit = Recorder()
+    batcher = OutputBatcher(emit, window=0.2, max_bytes=1 << 20)
+    for n in range(100):
+        batcher.add(f"line {n}\n")
+
+    assert emit.emitted.wait(2)
+    batcher.close()
+
+    assert emit.batches == [[f"line {n}\n" for n in range(100)]]
+
+
+def test_max_bytes_flushes_before_the_window():
+    emit = Recorder()
+    batcher = OutputBatcher(emit, window=10, max_bytes=100)
+    started = time.monotonic()
+    for _ in range(5):
+        batcher.add("x" * 30 + "\n")
+
+    assert emit.emitted.wait(2)
+    assert time.monotonic() - started < 5
+    batcher.close()
+
+    assert sum(len(batch) for batch in emit.batches) == 5
+    assert sum(len(line) for line in emit.batches[0]) >= 100
+
+
+def test_close_flushes_pending_lines_in_order():
+    emit = Recorder()
+    batcher = OutputBatcher(emit, window=10)
+    for n in range(3):
+        batcher.add(f"{n}\n")
+    batcher.close()
+
+    assert [line for batch in emit.batches for line in batch] == ["0\n", "1\n", "2\n"]
+
+
+def test_close_without_output_emits_nothing():
+    emit = Recorder()
+    OutputBatcher(emit).close()
+
+    assert emit.batches == []
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    events = []
+    monkeypatch.setattr(heychat_web_server.socketio, 'emit', lambda event, data: events.append((event, data)))
+    return events
+
+
+def test_process_output_arrives_in_batches_then_completes(emitted):
+    manager = ProcessManager()
+
+    result = manager.start_process('test', 'for i in $(seq 1 500); do echo "line $i"; done', 'Counting')
+    manager.output_threads['test'].join(10)
+
+    assert result['success']
+    outputs = [data for event, data in emitted if event == 'process_output']
+    lines = [line for data in outputs for line in data['lines']]
+    assert lines == [f"line {n}\n" for n in range(1, 501)]
+    assert len(outputs) < 50
+    assert emitted[-1][0] == 'process_complete'
+    assert emitted[-1][1]['return_code'] == 0
+    assert manager.get_status('test') == {"running": False, "exists": True, "return_code": 0}
@@ -0,0 +1,73 @@
+"""Ranked full-text search on the SQLite FTS5 indexes"""
+
+import pytest
+
+
+@pytest.fixture
+def corpus(store):
+    weather = store.create_conversation('weather', 'Weather chat')
+    store.add_message(weather, '20250101120000', 'user', 'Will it rain tomorrow in Lisbon?')
+    store.add_message(weather, '20250101120001', 'assistant', 'Rain is likely; the rain should stop by noon.')
+    cooking = store.create_conversation('cooking', 'Dinner plans')
+    store.add_message(cooking, '20250101120002', 'user', 'How long should pasta be boiled?')
+    store.add_message(cooking, '20250101120003', 'assistant', 'Boil it for ten minutes. No rain needed.')
+    running = store.create_conversation('running', 'Marathon training')
+    store.add_message(running, '20250101120004', 'user', 'I ran twelve kilometers while running uphill')
+    # Background text, so the searched words are rare enough for BM25 to weigh them
+    chat = store.create_conversation('smalltalk', 'Small talk')
+    for n in range(8):
+        store.add_message(chat, f"2025010112001{n}", 'user', f"Nothing much happening today, item {n}")
+    return store
+
+
+def sessions(results):
+    return [result['session_id'] for result in results]
+
+
+def test_best_match_first(corpus):
+    results = corpus.search_conversations('rain')
+
+    assert sessions(results) == ['weather', 'cooking']
+    assert results[0]['rank'] > results[1]['rank']
+    assert results[0]['match_count'] == 2
+    assert '[rain]' in results[0]['preview'].lower()
+
+
+def test_stemming_matches_word_forms(corpus):
+    assert sessions(corpus.search_conversations('boiling')) == ['cooking']
+    assert sessions(corpus.search_conversations('runs')) == ['running']
+
+
+def test_titles_are_searched(corpus):
+    assert sessions(corpus.search_conversations('marathon')) == ['running']
+
+
+def test_all_terms_must_match(corpus):
+    assert sessions(corpus.search_conversations('rain noon')) == ['weather']
+    assert corpus.search_conversations('rain pasta kilometers') == []
+
+
+@pytest.mark.parametrize('term', ['', '   ', '?!', '"', 'AND OR NOT', 'rain" OR "pasta', 'title:rain*'])
+def test_query_syntax_is_not_interpreted(corpus, term):
+    # Quotes, operators and column filters are treated as plain words
+    results = corpus.search_conversations(term)
+    assert isinstance(results, list)
+    if term.startswith('rain"'):
+        assert results == []
+
+
+def test_inactive_conversations_are_excluded(corpus):
+    corpus.fuse_conversations(corpus.get_conversation_id('cooking'), corpus.get_conversation_id('running'))
+
+    assert sessions(corpus.search_conversations('pasta')) == ['running']
+
+
+def test_limit(corpus):
+    assert len(corpus.search_conversations('rain', limit=1)) == 1
+
+
+def test_deleted_messages_leave_the_index(corpus):
+    with corpus.backend.pool.connection() as conn:
+        conn.execute("DELETE FROM messages WHERE content LIKE 'How long%'")
+
+    assert corpus.search_conversations('pasta') == []
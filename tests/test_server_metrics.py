@@ -0,0 +1,109 @@
+"""Prometheus metrics: registry rendering and the web server's request metrics"""
+
+import math
+import re
+
+from server_metrics import MetricsRegistry
+
+
+def samples(text):
+    """{sample name with labels: value} from Prometheus text format"""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def test_counter_and_gauge():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('route',))
+    in_flight = registry.gauge('in_flight', 'In flight')
+    requests.inc('/a')
+    requests.inc('/a', amount=2)
+    requests.inc('/b')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+
+    assert '# TYPE requests_total counter' in text
+    assert samples(text) == {'requests_total{route="/a"}': 3, 'requests_total{route="/b"}': 1, 'in_flight': 1}
+
+
+def test_collected_gauge_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    value = {'n': 1}
+    registry.gauge('workers', 'Workers', collect=lambda: value['n'])
+    value['n'] = 4
+
+    assert samples(registry.render())['workers'] == 4
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('c', 'C', ('path',)).inc('a"b\\c\nd')
+
+    assert 'c{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative_with_quantiles():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        latency.observe(value, '/x')
+
+    values = samples(registry.render())
+
+    assert values['latency_seconds_bucket{route="/x",le="0.1"}'] == 2
+    assert values['latency_seconds_bucket{route="/x",le="1"}'] == 3
+    assert values['latency_seconds_bucket{route="/x",le="+Inf"}'] == 4
+    assert values['latency_seconds_count{route="/x"}'] == 4
+    assert values['latency_seconds_sum{route="/x"}'] == 2.6
+    assert values['latency_quantile_seconds{route="/x",quantile="0.5"}'] == 0.05
+    assert values['latency_quantile_seconds{route="/x",quantile="0.99"}'] == 2.0
+
+
+def test_quantiles_cover_only_the_recent_window():
+    registry = MetricsRegistry()
+    latency = registry.histogram('t_seconds', 'T', window=10)
+    for _ in range(100):
+        latency.observe(10.0)
+    for _ in range(10):
+        latency.observe(0.001)
+
+    values = samples(registry.render())
+
+    assert values['t_quantile_seconds{quantile="0.99"}'] == 0.001
+    assert values['t_seconds_count'] == 110
+
+
+def test_timer_observes_elapsed_time():
+    registry = MetricsRegistry()
+    latency = registry.histogram('block_seconds', 'Block')
+    with latency.time():
+        pass
+
+    values = samples(registry.render())
+    assert values['block_seconds_count'] == 1
+    assert not math.isnan(values['block_quantile_seconds{quantile="0.5"}'])
+
+
+def test_requests_are_counted_by_route_template(web):
+    client, store = web
+    store.create_conversation('metrics')
+    client.get('/api/conversations/show/metrics')
+    client.get('/api/conversations/show/metrics')
+    client.get('/api/conversations/show/missing')
+    client.get('/no/such/page')
+
+    response = client.get('/api/metrics')
+
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    values = samples(response.get_data(as_text=True))
+    route = 'route="/api/conversations/show/<session_id>"'
+    assert values[f'heychat_http_requests_total{{method="GET",{route},status="200"}}'] >= 2
+    assert values[f'heychat_http_requests_total{{method="GET",{route},status="404"}}'] >= 1
+    assert values['heychat_http_requests_total{method="GET",route="unmatched",status="404"}'] >= 1
+    assert values[f'heychat_http_request_duration_seconds_count{{method="GET",{route}}}'] >= 3
+    # Only the scrape itself is in flight
+    assert values['heychat_http_requests_in_flight'] == 1
+    assert not [name for name in values if re.search(r'session_id="metrics"', name)]
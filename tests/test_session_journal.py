@@ -0,0 +1,85 @@
+"""Append-only session journal: replay, clear, summaries and torn writes"""
+
+from session_journal import SessionJournal
+
+
+def test_history_is_rebuilt_on_reopen(tmp_path):
+    path = tmp_path / "journal" / "session.jsonl"
+    journal = SessionJournal(path)
+    assert journal.append("user", "hello", "20250101120000") == 1
+    assert journal.append("assistant", "hi there") == 2
+    journal.close()
+
+    reopened = SessionJournal(path)
+
+    assert reopened.history == [{"role": "user", "content": "hello"},
+                                {"role": "assistant", "content": "hi there"}]
+    assert reopened.replayed == 2
+    assert reopened.append("user", "again") == 3
+    reopened.close()
+
+
+def test_appends_never_rewrite_earlier_lines(tmp_path):
+    path = tmp_path / "session.jsonl"
+    journal = SessionJournal(path)
+    journal.append("user", "first")
+    before = path.read_bytes()
+    journal.append("assistant", "second")
+    journal.close()
+
+    assert path.read_bytes().startswith(before)
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_clear_drops_earlier_messages_and_summary(tmp_path):
+    path = tmp_path / "session.jsonl"
+    journal = SessionJournal(path)
+    journal.extend([{"role": "user", "content": "old"}, {"role": "assistant", "content": "older"}])
+    journal.set_summary({"text": "talked about old things", "covers": 2, "tokens": 6})
+    journal.clear()
+    journal.append("user", "new")
+    journal.close()
+
+    reopened = SessionJournal(path)
+
+    assert reopened.history == [{"role": "user", "content": "new"}]
+    assert reopened.summary is None
+    assert reopened.seq == 3
+    reopened.close()
+
+
+def test_latest_summary_is_replayed(tmp_path):
+    path = tmp_path / "session.jsonl"
+    journal = SessionJournal(path)
+    journal.append("user", "question")
+    journal.set_summary({"text": "first", "covers": 1, "tokens": 1})
+    journal.set_summary({"text": "second", "covers": 1, "tokens": 1})
+    journal.close()
+
+    assert SessionJournal(path).summary == {"text": "second", "covers": 1, "tokens": 1}
+
+
+def test_torn_final_line_is_skipped(tmp_path):
+    path = tmp_path / "session.jsonl"
+    journal = SessionJournal(path, fsync=True)
+    journal.append("user", "kept")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "message", "seq": 2, "role": "assis')
+
+    reopened = SessionJournal(path)
+
+    assert reopened.history == [{"role": "user", "content": "kept"}]
+    assert reopened.seq == 1
+    reopened.close()
+
+
+def test_appends_after_a_torn_line_survive_the_next_replay(tmp_path):
+    path = tmp_path / "session.jsonl"
+    path.write_text('{"type": "message", "seq": 1, "role": "user", "content": "kept"}\n{"type": "mess')
+    journal = SessionJournal(path)
+    journal.append("assistant", "after the crash")
+    journal.close()
+
+    assert SessionJournal(path).history == [{"role": "user", "content": "kept"},
+                                            {"role": "assistant", "content": "after the crash"}]
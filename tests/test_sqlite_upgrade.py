@@ -0,0 +1,110 @@
+"""Opening a database created by an older release upgrades it in place"""
+
+import sqlite3
+
+import pytest
+
+from conversation_store import ConversationStore, SQLiteBackend
+
+# Schema before seq numbers, conversation summaries and fusion lineage
+OLD_SCHEMA = """
+CREATE TABLE conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id VARCHAR(50) UNIQUE NOT NULL,
+    title VARCHAR(255),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    is_active BOOLEAN DEFAULT 1,
+    metadata TEXT
+);
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    timestamp_str VARCHAR(14) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    content TEXT NOT NULL,
+    audio_file_path VARCHAR(500),
+    transcription_confidence DECIMAL(3,2),
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    metadata TEXT
+);
+CREATE TABLE conversation_fusions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    target_conversation_id INTEGER REFERENCES conversations(id) ON DELETE CASCADE,
+    fused_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    fusion_reason TEXT,
+    metadata TEXT
+);
+"""
+
+
+@pytest.fixture
+def old_database(tmp_path):
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.executemany("INSERT INTO conversations (id, session_id, title) VALUES (?, ?, ?)",
+                     [(1, 'morning', 'Morning'), (2, 'evening', 'Evening'), (3, 'night', 'Night')])
+    # Inserted out of time order; the old history load sorted by (timestamp, id)
+    conn.executemany("INSERT INTO messages (id, conversation_id, timestamp_str, role, content) "
+                     "VALUES (?, ?, ?, ?, ?)", [
+                         (1, 1, '20250101090005', 'assistant', 'good morning to you'),
+                         (2, 1, '20250101090000', 'user', 'good morning'),
+                         (3, 2, '20250101190000', 'user', 'good evening'),
+                         (4, 1, '20250101090005', 'user', 'coffee please'),
+                     ])
+    # night was fused into evening, then evening into morning
+    conn.executemany("INSERT INTO conversation_fusions (source_conversation_id, target_conversation_id) "
+                     "VALUES (?, ?)", [(3, 2), (2, 1)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def upgraded(old_database):
+    store = ConversationStore(SQLiteBackend(old_database))
+    yield store
+    store.backend.pool.close()
+
+
+def test_existing_messages_are_numbered_in_their_old_order(upgraded):
+    messages = upgraded.get_conversation('morning')['messages']
+
+    assert [(msg['seq'], msg['content']) for msg in messages] == [
+        (1, 'good morning'), (2, 'good morning to you'), (3, 'coffee please')
+    ]
+    assert [msg['seq'] for msg in upgraded.get_conversation('evening')['messages']] == [1]
+
+
+def test_new_messages_continue_the_sequence(upgraded):
+    conv_id = upgraded.get_conversation_id('morning')
+    upgraded.add_message(conv_id, '20250101080000', 'user', 'earlier timestamp, later message')
+
+    messages = upgraded.get_conversation('morning')['messages']
+    assert [msg['seq'] for msg in messages] == [1, 2, 3, 4]
+    assert messages[-1]['content'] == 'earlier timestamp, later message'
+
+
+def test_summaries_and_search_cover_existing_messages(upgraded):
+    listed = {conv['session_id']: conv for conv in upgraded.list_conversations(active_only=False)}
+
+    assert listed['morning']['message_count'] == 3
+    assert listed['evening']['message_count'] == 1
+    assert not listed['night']['message_count']
+    assert [hit['session_id'] for hit in upgraded.search_conversations('coffee')] == ['morning']
+
+
+def test_fusion_lineage_is_replayed(upgraded):
+    assert upgraded.resolve_conversation('night')['session_id'] == 'morning'
+    assert upgraded.resolve_conversation('evening')['session_id'] == 'morning'
+
+
+def test_upgrade_runs_once(old_database, upgraded):
+    upgraded.backend.pool.close()
+    reopened = ConversationStore(SQLiteBackend(old_database))
+    try:
+        assert [msg['seq'] for msg in reopened.get_conversation('morning')['messages']] == [1, 2, 3]
+    finally:
+        reopened.backend.pool.close()
@@ -0,0 +1,71 @@
+"""Streaming capture: segments are transcribed while the user is still speaking"""
+
+import threading
+import time
+from pathlib import Path
+
+from audio_stream import WavStream
+from vad import endpoint_segmenter
+from voice_engine import VoiceEngine
+
+SPEECH = Path(__file__).resolve().parent / 'fixtures' / 'speech_pause.wav'
+
+
+class SegmentClient:
+    """Transcribes each segment as its name, recording when each upload arrived"""
+
+    connections_opened = 1
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, filename='audio.wav', content_type='audio/wav', timing=None, **params):
+        name = filename.rsplit('.', 1)[0]
+        with self.lock:
+            self.calls.append((name, time.monotonic()))
+        time.sleep(self.delays.get(name, 0))
+        return name.replace('_', ' ')
+
+    def chat(self, messages, model=None, **params):
+        return "ok"
+
+    def close(self):
+        pass
+
+
+def engine_for(client, store, tmp_path, realtime=False, workers=2):
+    return VoiceEngine(client, WavStream([SPEECH], realtime=realtime), tts=None, store=store,
+                       model='gpt-4o-mini', session_id='streaming', tts_enabled=False,
+                       summarize=False, segmenter=endpoint_segmenter(streaming=True),
+                       transcribe_workers=workers, upload_codec='wav', log_dir=tmp_path / 'logs')
+
+
+def test_segments_are_stitched_in_order_whichever_finishes_first(store, tmp_path):
+    # The first segment's upload finishes last
+    client = SegmentClient(delays={'segment_1': 0.2})
+    engine = engine_for(client, store, tmp_path)
+    try:
+        transcript = engine.transcribe_stream()
+    finally:
+        engine.close()
+
+    assert transcript == "segment 1 segment 2"
+    assert [name for name, _ in client.calls] == ['segment_1', 'segment_2']
+
+
+def test_first_segment_is_uploaded_before_the_user_stops(store, tmp_path, capsys):
+    client = SegmentClient()
+    engine = engine_for(client, store, tmp_path, realtime=True)
+    started = time.monotonic()
+    try:
+        assert engine.transcribe_stream() == "segment 1 segment 2"
+    finally:
+        engine.close()
+
+    # speech_pause.wav: the first phrase ends at 2.1s, the second at 3.6s
+    first_upload = client.calls[0][1] - started
+    assert first_upload < 3.3
+    assert engine.segmenter.speech_ended_at - started >= 3.3
+    assert "(2 segments)" in capsys.readouterr().out
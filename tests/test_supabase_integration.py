@@ -0,0 +1,126 @@
+"""HeyChatSupabase on the pooled store, the connection pool and the CLI"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from conversation_store import ConnectionPool, StoreError, create_backend
+from supabase_integration import HeyChatSupabase
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def db(store):
+    return HeyChatSupabase(store)
+
+
+def test_save_conversation_keeps_question_before_answer(db, store):
+    conv_id = db.save_conversation('s1', 'What is 2+2?', 'Four.', confidence='0.93')
+    db.save_conversation('s1', 'And 3+3?', 'Six.')
+
+    assert db.get_conversation_id('s1') == conv_id
+    assert json.loads(db.load_conversation_for_api('s1')) == [
+        {"role": "user", "content": "What is 2+2?"},
+        {"role": "assistant", "content": "Four."},
+        {"role": "user", "content": "And 3+3?"},
+        {"role": "assistant", "content": "Six."}
+    ]
+    assert store.get_conversation('s1')['messages'][0]['confidence'] == pytest.approx(0.93)
+
+
+def test_unknown_session_loads_empty_history(db):
+    assert db.load_conversation_for_api('missing') == "[]"
+    assert db.get_conversation_id('missing') is None
+
+
+def test_add_message_accepts_session_or_conversation_id(db, store):
+    msg_id = db.add_message('s2', '20250101120000', 'user', 'by session', '', '')
+    conv_id = db.get_conversation_id('s2')
+    db.add_message(str(conv_id), '20250101120001', 'assistant', 'by id')
+
+    assert msg_id
+    assert [m['content'] for m in store.get_history(conv_id)] == ['by session', 'by id']
+
+
+def test_add_messages_accepts_tuples_and_dicts(db, store):
+    ids = db.add_messages('s3', [
+        ('20250101120000', 'user', 'tuple'),
+        {"timestamp_str": '20250101120001', "role": 'assistant', "content": 'dict', "confidence": '0.5'}
+    ])
+
+    conv_id = db.get_conversation_id('s3')
+    assert len(ids) == 2 and ids == sorted(ids)
+    assert [m['content'] for m in store.get_history(conv_id)] == ['tuple', 'dict']
+
+
+def test_pool_reuses_connections_and_rolls_back_failures(tmp_path):
+    backend = create_backend(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2)
+    try:
+        with backend.pool.connection() as first:
+            pass
+        with backend.pool.connection() as second:
+            second.execute("INSERT INTO conversations (session_id) VALUES ('kept')")
+        with pytest.raises(RuntimeError):
+            with backend.pool.connection() as conn:
+                conn.execute("INSERT INTO conversations (session_id) VALUES ('rolled_back')")
+                raise RuntimeError("boom")
+        with backend.pool.connection() as conn:
+            sessions = [row['session_id'] for row in conn.execute("SELECT session_id FROM conversations")]
+    finally:
+        backend.pool.close()
+
+    assert first is second
+    assert 'kept' in sessions and 'rolled_back' not in sessions
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+
+def test_pool_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.05)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    try:
+        assert held.wait(5)
+        with pytest.raises(StoreError, match='Timed out'):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_unsupported_database_url():
+    with pytest.raises(StoreError):
+        create_backend('mysql://localhost/heychat')
+
+
+def test_cli_save_and_load(tmp_path):
+    env = dict(os.environ, HEYCHAT_DATABASE_URL=f"sqlite:///{tmp_path / 'cli.db'}")
+
+    def cli(*args):
+        return subprocess.run([sys.executable, 'supabase_integration.py', *args], cwd=REPO, env=env,
+                              capture_output=True, text=True, check=True).stdout.strip()
+
+    conv_id = cli('save', 'cli_session', 'hello', 'hi there')
+    assert cli('get-id', 'cli_session') == conv_id
+    assert json.loads(cli('load', 'cli_session')) == [
+        {"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi there"}
+    ]
+    assert 'successful' in cli('test')
@@ -0,0 +1,83 @@
+"""TTLCache expiry, LRU eviction and tag invalidation"""
+
+from ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set('a', 1)
+
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    clock.now = 10
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = TTLCache()
+    cache.set('list', 'page', tags=('all', 'conversation:1'))
+    cache.set('show', 'one', tags=('conversation:2',))
+
+    assert cache.invalidate('conversation:1') == 1
+    assert cache.get('list') is None
+    assert cache.get('show') == 'one'
+
+
+def test_get_or_compute_caches_with_tags_from_value():
+    cache = TTLCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [1, 2]
+
+    tags = lambda ids: [f"conversation:{i}" for i in ids]
+    assert cache.get_or_compute('k', compute, tags=tags) == [1, 2]
+    assert cache.get_or_compute('k', compute, tags=tags) == [1, 2]
+    assert len(calls) == 1
+
+    cache.invalidate('conversation:2')
+    cache.get_or_compute('k', compute, tags=tags)
+    assert len(calls) == 2
+
+
+def test_value_computed_across_an_invalidation_is_not_stored():
+    cache = TTLCache()
+
+    def compute():
+        cache.invalidate('anything')
+        return 'stale'
+
+    assert cache.get_or_compute('k', compute) == 'stale'
+    assert cache.get('k') is None
+
+
+def test_hit_rate():
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('missing')
+
+    assert cache.stats()['hit_rate'] == 0.5
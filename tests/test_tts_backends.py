@@ -0,0 +1,105 @@
+"""Sentence splitting and queued speech for streamed replies"""
+
+import threading
+import time
+
+import pytest
+
+from tts_backends import NullTTS, SentenceSplitter, SpeechQueue, create_tts
+
+
+def split_stream(tokens, min_chars=20):
+    splitter = SentenceSplitter(min_chars)
+    sentences = []
+    for token in tokens:
+        sentences.extend(splitter.feed(token))
+    return sentences, splitter.flush()
+
+
+def test_sentences_are_emitted_as_soon_as_they_end():
+    splitter = SentenceSplitter()
+
+    assert splitter.feed("The weather today is ") == []
+    assert splitter.feed("sunny and warm. Tomor") == ["The weather today is sunny and warm."]
+    assert splitter.feed("row it will rain!\n") == ["Tomorrow it will rain!"]
+    assert splitter.flush() == []
+
+
+def test_tokens_split_at_any_point_give_the_same_sentences():
+    reply = "I checked the calendar for you. Your meeting is at noon? Yes, it moved yesterday. Bye"
+    whole = split_stream([reply])
+
+    assert split_stream(list(reply)) == whole
+    assert split_stream([reply[i:i + 3] for i in range(0, len(reply), 3)]) == whole
+    assert whole == (["I checked the calendar for you.", "Your meeting is at noon?",
+                      "Yes, it moved yesterday."], ["Bye"])
+
+
+def test_short_sentences_are_merged_with_the_next():
+    sentences, rest = split_stream(["Sure. ", "Here is the full answer you asked for. ", "Ok."])
+
+    assert sentences == ["Sure. Here is the full answer you asked for."]
+    assert rest == ["Ok."]
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    sentences, rest = split_stream(["Ask Dr. Smith about the results, e.g. the blood test. Then rest."],
+                                   min_chars=5)
+
+    assert sentences == ["Ask Dr. Smith about the results, e.g. the blood test."]
+    assert rest == ["Then rest."]
+
+
+def test_closing_quotes_stay_with_their_sentence():
+    sentences, _ = split_stream(['He said "come back tomorrow." Then he left. '], min_chars=5)
+
+    assert sentences == ['He said "come back tomorrow."', 'Then he left.']
+
+
+class RecordingTTS:
+    def __init__(self, delay=0.0):
+        self.spoken = []
+        self.delay = delay
+        self.threads = set()
+
+    def speak(self, text):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        self.spoken.append(text)
+
+
+def test_speech_queue_speaks_in_order_off_the_caller_thread():
+    tts = RecordingTTS(delay=0.01)
+    speech = SpeechQueue(tts)
+    before = time.monotonic()
+    for sentence in ("one", "two", "three"):
+        speech.put(sentence)
+    queued_in = time.monotonic() - before
+    speech.close()
+
+    assert tts.spoken == ["one", "two", "three"]
+    assert threading.current_thread().name not in tts.threads
+    assert queued_in < 0.01
+    assert speech.first_audio_at >= before
+
+
+def test_speech_queue_survives_backend_errors():
+    class FailingTTS(RecordingTTS):
+        def speak(self, text):
+            if text == "bad":
+                raise OSError("audio device busy")
+            super().speak(text)
+
+    tts = FailingTTS()
+    speech = SpeechQueue(tts)
+    for sentence in ("bad", "good"):
+        speech.put(sentence)
+    speech.close()
+
+    assert tts.spoken == ["good"]
+
+
+def test_create_tts():
+    assert isinstance(create_tts('none'), NullTTS)
+    with pytest.raises(ValueError, match="Unknown TTS backend"):
+        create_tts('nope')
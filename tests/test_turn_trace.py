@@ -0,0 +1,96 @@
+"""Turn tracing: span accounting and the spans a voice turn records"""
+
+import time
+import wave
+
+import numpy as np
+
+from turn_trace import STAGES, TurnTrace, summarize_traces
+from voice_engine import VoiceEngine, WavFileSource
+
+
+class FakeClient:
+    """Chat API stand-in that reports fixed upload/transcribe timings"""
+
+    connections_opened = 1
+
+    def transcribe(self, audio, filename='audio.wav', content_type='audio/wav', timing=None, **params):
+        if timing is not None:
+            timing['upload'] = timing.get('upload', 0.0) + 0.002
+            timing['transcribe'] = timing.get('transcribe', 0.0) + 0.003
+        return "what time is it"
+
+    def chat(self, messages, model=None, **params):
+        return "It is noon."
+
+    def close(self):
+        pass
+
+
+def write_tone(path, seconds=1.0, rate=16000):
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (np.sin(2 * np.pi * 220 * t) * 8000).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def test_spans_accumulate_and_follow_stage_order():
+    trace = TurnTrace()
+    trace.add('persist', 0.010)
+    trace.add('record', 0.5)
+    trace.add('persist', 0.005)
+
+    spans = trace.as_metadata()
+
+    assert list(spans) == ['record', 'persist', 'total']
+    assert spans['persist'] == 15.0
+
+
+def test_running_span_counts_toward_the_snapshot():
+    trace = TurnTrace()
+    with trace.span('persist'):
+        time.sleep(0.01)
+        inside = trace.as_metadata()
+
+    assert inside['persist'] >= 10.0
+    assert trace.as_metadata()['persist'] >= inside['persist']
+
+
+def test_summarize_orders_known_stages_first():
+    traces = [{'record': 100.0, 'preprocess': 4.0, 'custom': 1.0}, {'record': 300.0, 'preprocess': 6.0}]
+
+    summary = summarize_traces(traces)
+
+    assert list(summary) == ['record', 'preprocess', 'custom']
+    assert summary['record'] == {"count": 2, "mean": 200.0, "p50": 100.0, "p95": 300.0, "p99": 300.0}
+
+
+def test_turn_trace_separates_preprocess_and_persists_both_messages(store, tmp_path):
+    engine = VoiceEngine(FakeClient(), WavFileSource([write_tone(tmp_path / 'turn.wav')]), tts=None,
+                         store=store, model='gpt-4o-mini', session_id='trace', tts_enabled=False,
+                         summarize=False, upload_codec='wav', log_dir=tmp_path / 'logs')
+    append = engine.journal.append
+
+    def slow_append(*args, **kwargs):
+        time.sleep(0.02)
+        return append(*args, **kwargs)
+
+    engine.journal.append = slow_append
+    try:
+        assert engine.run_turn() is True
+    finally:
+        engine.close()
+
+    messages = store.get_conversation('trace')['messages']
+    assert [msg['role'] for msg in messages] == ['user', 'assistant']
+    [spans] = list(store.iter_turn_traces())
+    assert set(spans) <= set(STAGES)
+    assert {'record', 'preprocess', 'upload', 'transcribe', 'completion', 'persist', 'total'} <= set(spans)
+    # Upload is only the request, as reported by the client
+    assert spans['upload'] == 2.0 and spans['transcribe'] == 3.0
+    # Both journal appends (user message and reply) fall inside persist
+    assert spans['persist'] >= 40.0
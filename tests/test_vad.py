@@ -0,0 +1,132 @@
+"""VAD endpointing, PauseSegmenter output and upload preparation on the WAV fixtures"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audio_prep import prepare, prepare_file, resample, trim_silence
+from audio_stream import FRAME_MS, EnergyDetector, PauseSegmenter, WavStream, read_wav
+from vad import HANGOVER_MS, AdaptiveVAD, endpoint_segmenter
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+SPEECH = FIXTURES / 'speech_pause.wav'
+# speech_pause.wav: voiced 0.5–2.1s and 2.6–3.6s, 4.6s long
+SPEECH_START_MS, SPEECH_END_MS, LENGTH_S = 500, 3600, 4.6
+
+
+def run(segmenter, name):
+    """Segment a fixture; returns [(seconds or None, is_final)]"""
+    source = WavStream([FIXTURES / name], realtime=False)
+    return [(None if samples is None else len(samples) / source.rate, final)
+            for samples, final in segmenter.segments(source.frames())]
+
+
+@pytest.mark.parametrize('name', ['silence.wav', 'noise.wav'])
+def test_no_turn_without_speech(name):
+    segmenter = endpoint_segmenter()
+
+    assert run(segmenter, name) == []
+    assert segmenter.timing is None
+
+
+def test_adaptive_floor_ignores_steady_noise_a_fixed_threshold_takes_for_speech():
+    fixed = PauseSegmenter(EnergyDetector(), min_segment_ms=None, end_silence_ms=HANGOVER_MS)
+    adaptive = endpoint_segmenter(AdaptiveVAD())
+
+    assert run(fixed, 'noise.wav') != []
+    assert run(adaptive, 'noise.wav') == []
+
+
+def test_endpoint_timing_follows_the_hangover():
+    segmenter = endpoint_segmenter()
+
+    segments = run(segmenter, 'speech_pause.wav')
+
+    timing = segmenter.timing
+    assert SPEECH_START_MS <= timing['speech_start_ms'] <= SPEECH_START_MS + 3 * FRAME_MS
+    assert SPEECH_END_MS - FRAME_MS <= timing['speech_end_ms'] <= SPEECH_END_MS + FRAME_MS
+    # The turn ends one hangover (in whole frames) after the last speech frame
+    assert timing['endpoint_delay_ms'] == HANGOVER_MS // FRAME_MS * FRAME_MS
+    assert timing['endpoint_ms'] == timing['speech_end_ms'] + timing['endpoint_delay_ms']
+    # One segment: the 0.5s pause is shorter than the hangover
+    [(seconds, final)] = segments
+    assert final
+    assert 3.1 <= seconds <= 3.5
+
+
+@pytest.mark.parametrize('hangover_ms', [300, 400, 1000])
+def test_shorter_hangover_ends_the_turn_sooner(hangover_ms):
+    segmenter = endpoint_segmenter(hangover_ms=hangover_ms)
+
+    segments = run(segmenter, 'speech_pause.wav')
+
+    assert segmenter.timing['endpoint_delay_ms'] == hangover_ms // FRAME_MS * FRAME_MS
+    if hangover_ms <= 400:
+        # The mid-utterance pause now ends the turn after the first phrase
+        assert segmenter.timing['speech_end_ms'] <= 2100 + FRAME_MS
+        assert [final for _, final in segments] == [True]
+
+
+def test_streaming_cuts_at_the_pause():
+    segmenter = endpoint_segmenter(streaming=True)
+
+    segments = run(segmenter, 'speech_pause.wav')
+
+    speech = [(seconds, final) for seconds, final in segments if seconds is not None]
+    assert [final for _, final in speech] == [False, False]
+    assert segments[-1][1] is True
+    # First cut falls inside the pause: the first phrase plus pre-roll and half the pause gap
+    assert 1.7 <= speech[0][0] <= 2.1
+    assert sum(seconds for seconds, _ in speech) == pytest.approx(
+        sum(seconds for seconds, _ in run(endpoint_segmenter(), 'speech_pause.wav')), abs=0.5)
+
+
+def test_segmenter_stops_reading_at_the_endpoint():
+    read = []
+
+    def frames():
+        for frame in WavStream([SPEECH], realtime=False).frames():
+            read.append(frame)
+            yield frame
+
+    segmenter = endpoint_segmenter()
+    list(segmenter.segments(frames()))
+
+    assert len(read) * FRAME_MS == segmenter.timing['endpoint_ms'] < LENGTH_S * 1000
+
+
+def test_trim_keeps_speech_with_padding():
+    samples, rate = read_wav(SPEECH)
+
+    trimmed = trim_silence(samples, rate)
+
+    # 0.5–3.6s of speech plus 150ms of padding on either side
+    assert len(trimmed) / rate == pytest.approx(3.4, abs=0.1)
+
+
+def test_trim_leaves_silence_alone():
+    samples, rate = read_wav(FIXTURES / 'silence.wav')
+
+    assert len(trim_silence(samples, rate)) == len(samples)
+
+
+def test_prepare_file_reports_sizes():
+    upload = prepare_file(SPEECH, codec='wav')
+
+    assert upload.codec == 'wav' and upload.content_type == 'audio/wav'
+    assert upload.original_bytes == SPEECH.stat().st_size
+    assert upload.duration == pytest.approx(3.4, abs=0.1)
+    assert upload.bytes_saved > 0
+
+
+def test_resample_downsamples_only():
+    samples, rate = read_wav(SPEECH)
+    doubled = np.repeat(samples, 3)
+
+    down, down_rate = resample(doubled, 48000)
+    same, same_rate = resample(samples, rate)
+
+    assert down_rate == 16000 and len(down) == len(samples)
+    assert same_rate == rate and same is samples
+    assert prepare(doubled, 48000, 'wav', trim=False).duration == pytest.approx(LENGTH_S)
@@ -0,0 +1,98 @@
+"""Paging in view_conversations.py and browse_conversations.py"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from browse_conversations import InteractiveBrowser
+from conversation_store import ConversationStore, SQLiteBackend
+from view_conversations import ConversationViewer
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def seven(store, set_updated_at):
+    """conv_0..conv_6, conv_6 most recently updated"""
+    for n in range(7):
+        set_updated_at(store.create_conversation(f"conv_{n}"), f"2025-01-01 00:00:{n:02d}")
+    return store
+
+
+def listed(output):
+    return re.findall(r'^\s*\d+\. (conv_\d+)$', output, re.M)
+
+
+def test_viewer_prints_cursor_for_the_next_page(seven, capsys):
+    viewer = ConversationViewer(seven)
+
+    viewer.list_conversations(limit=3)
+    first = capsys.readouterr().out
+    cursor = re.search(r'--cursor (\S+)', first).group(1)
+    viewer.list_conversations(limit=3, cursor=cursor)
+    second = capsys.readouterr().out
+
+    assert listed(first) == ['conv_6', 'conv_5', 'conv_4']
+    assert listed(second) == ['conv_3', 'conv_2', 'conv_1']
+
+
+def test_browser_next_and_prev(seven, capsys):
+    browser = InteractiveBrowser(seven)
+    browser.page_size = 3
+
+    browser.list_conversations()
+    browser.next_page()
+    browser.next_page()
+    last = capsys.readouterr().out
+    browser.next_page()
+    assert 'Already on last page' in capsys.readouterr().out
+    browser.prev_page()
+    back = capsys.readouterr().out
+
+    assert listed(last)[-1:] == ['conv_0']
+    assert 'more available' not in last.split('Page 3')[-1]
+    assert listed(back) == ['conv_3', 'conv_2', 'conv_1']
+    assert 'Page 2' in back
+
+
+def test_browser_shows_the_last_message_preview(store, capsys):
+    short = store.create_conversation('short')
+    store.add_message(short, '20250101120000', 'user', 'See you soon')
+    long = store.create_conversation('long')
+    store.add_message(long, '20250101120001', 'assistant', 'x' * 80)
+    store.create_conversation('empty')
+
+    InteractiveBrowser(store).list_conversations()
+    out = capsys.readouterr().out
+
+    assert '💭 See you soon\n' in out
+    assert f"💭 {'x' * 60}...\n" in out
+    assert out.count('💭') == 2
+
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'many'])
+def test_browser_list_rejects_a_bad_page_size(seven, capsys, limit):
+    browser = InteractiveBrowser(seven)
+    browser.page_size = 3
+
+    browser.list_conversations(limit)
+
+    assert 'Usage: list [n]' in capsys.readouterr().out
+    assert browser.page_size == 3
+
+
+def test_list_command_rejects_a_bad_cursor(tmp_path):
+    env = dict(os.environ, HEYCHAT_DATABASE_URL=f"sqlite:///{tmp_path / 'cli.db'}")
+    store = ConversationStore(SQLiteBackend(tmp_path / 'cli.db'))
+    store.create_conversation('only')
+    store.backend.pool.close()
+
+    result = subprocess.run([sys.executable, 'view_conversations.py', 'list', '--cursor', 'garbage'],
+                            cwd=REPO, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 1
+    assert '❌' in result.stdout
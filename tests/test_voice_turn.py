@@ -0,0 +1,102 @@
+"""One full voice turn through voice_engine.py and openai_client.py against the stub API server"""
+
+import wave
+
+import numpy as np
+import pytest
+
+from audio_stream import WavStream
+from openai_client import OpenAIClient, OpenAIError
+from stub_api_server import StubAPIServer
+from vad import endpoint_segmenter
+from voice_engine import VoiceEngine
+
+RATE = 16000
+
+
+def write_utterance(path, speech_seconds=1.0, rate=RATE):
+    """Quiet room noise, a voiced burst, then enough silence to end the turn"""
+    rng = np.random.default_rng(7)
+    t = np.arange(int(speech_seconds * rate)) / rate
+    voiced = sum(np.sin(2 * np.pi * f * t) / n for n, f in enumerate((180, 360, 540), 1)) * 6000
+    samples = np.concatenate([
+        rng.normal(0, 30, int(0.6 * rate)),
+        voiced * np.hanning(len(t)) ** 0.25,
+        rng.normal(0, 30, int(1.5 * rate))
+    ])
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.clip(samples, -32768, 32767).astype('<i2').tobytes())
+    return path
+
+
+@pytest.fixture
+def stub_api():
+    server = StubAPIServer(port=0, transcripts=["What time is it?", "Quit."]).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_api):
+    client = OpenAIClient(api_key='test', base_url=stub_api.base_url)
+    yield client
+    client.close()
+
+
+def test_client_reuses_one_keep_alive_connection(stub_api, client):
+    assert client.transcribe(b'RIFF', filename='a.wav') == "What time is it?"
+    assert client.chat([{"role": "user", "content": "hi"}]) == "You said: hi"
+    assert ''.join(client.chat_stream([{"role": "user", "content": "one two three"}])) == "You said: one two three"
+    assert client.chat([{"role": "user", "content": "again"}]) == "You said: again"
+
+    assert client.connections_opened == 1
+    assert stub_api.stats['connections'] == 1
+    assert stub_api.stats['requests'] == 4
+
+
+def test_stream_yields_deltas_in_order(client):
+    deltas = list(client.chat_stream([{"role": "user", "content": "a b c"}]))
+
+    assert deltas == ["You ", "said: ", "a ", "b ", "c"]
+
+
+def test_http_errors_raise(client):
+    client._path = '/v0'
+    with pytest.raises(OpenAIError, match='HTTP 404'):
+        client.chat([{"role": "user", "content": "hi"}])
+
+
+def test_voice_turn_end_to_end(stub_api, client, store, tmp_path, capsys):
+    wavs = [write_utterance(tmp_path / 'question.wav'), write_utterance(tmp_path / 'quit.wav', 0.5)]
+    engine = VoiceEngine(client, WavStream(wavs, realtime=False), tts=None, store=store,
+                         model='gpt-4o-mini', session_id='voice-turn', tts_enabled=False,
+                         stream=True, summarize=False, segmenter=endpoint_segmenter(),
+                         transcribe_workers=1, upload_codec='wav', log_dir=tmp_path / 'logs')
+    try:
+        assert engine.run_turn() is True
+        assert engine.run_turn() is False  # "Quit."
+    finally:
+        engine.close()
+
+    out = capsys.readouterr().out
+    assert "You said: What time is it?" in out
+    assert "🎯 Endpoint" in out
+
+    messages = store.get_conversation('voice-turn')['messages']
+    assert [(msg['role'], msg['content']) for msg in messages] == [
+        ('user', 'What time is it?'), ('assistant', 'You said: What time is it?')
+    ]
+    [trace] = list(store.iter_turn_traces())
+    assert {'record', 'preprocess', 'upload', 'transcribe', 'completion', 'persist'} <= set(trace)
+
+    # Whole-utterance uploads (no streaming capture), 16 kHz WAV
+    assert [upload['filename'] for upload in stub_api.uploads] == ['segment_1.wav', 'segment_1.wav']
+    # The chat request carried the transcript as the last user message
+    assert stub_api.chats[0][-1] == {"role": "user", "content": "What time is it?"}
+    # Keep-alive: one connection on the turn thread, one on the transcription worker
+    assert stub_api.stats['transcriptions'] == 2 and stub_api.stats['completions'] == 1
+    assert stub_api.stats['connections'] == client.connections_opened == 2
@@ -0,0 +1,96 @@
+"""Conversation endpoints of heychat_web_server against a SQLite store"""
+
+import pytest
+
+
+def test_list_pages_follow_next_cursor(web):
+    client, store = web
+    for n in range(3):
+        store.create_conversation(f"conv_{n}")
+
+    first = client.get('/api/conversations/list?limit=2').get_json()
+    second = client.get(f"/api/conversations/list?limit=2&cursor={first['next_cursor']}").get_json()
+
+    assert first['success'] and second['success']
+    assert len(first['conversations']) == 2 and len(second['conversations']) == 1
+    assert second['next_cursor'] is None
+    seen = [conv['session_id'] for conv in first['conversations'] + second['conversations']]
+    assert sorted(seen) == ['conv_0', 'conv_1', 'conv_2']
+
+
+def test_bad_cursor_is_rejected_with_400(web):
+    client, _ = web
+
+    response = client.get('/api/conversations/list?cursor=not-a-cursor')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('limit', [0, -1, -3])
+def test_limit_below_one_is_rejected_with_400(web, limit):
+    client, store = web
+    for n in range(4):
+        store.create_conversation(f"conv_{n}")
+
+    response = client.get(f'/api/conversations/list?limit={limit}')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_limit_is_capped_at_the_maximum_page_size(web):
+    from heychat_web_server import MAX_PAGE_SIZE
+    client, store = web
+    for n in range(MAX_PAGE_SIZE + 5):
+        store.create_conversation(f"conv_{n}")
+
+    page = client.get('/api/conversations/list?limit=1000').get_json()
+
+    assert len(page['conversations']) == MAX_PAGE_SIZE
+    assert page['next_cursor'] is not None
+
+
+def cached_list(client, cursor=None):
+    """Fetch a list page and report whether it came from the cache"""
+    from heychat_web_server import conversation_cache
+    hits = conversation_cache.hits
+    url = '/api/conversations/list?limit=2' + (f"&cursor={cursor}" if cursor else '')
+    page = client.get(url).get_json()
+    return page, conversation_cache.hits > hits
+
+
+def test_write_drops_only_list_pages_showing_the_conversation(web, set_web_updated_at):
+    client, store = web
+    ids = [store.create_conversation(f"conv_{n}") for n in range(6)]
+    for n, conv_id in enumerate(ids):
+        set_web_updated_at(conv_id, f"2025-01-01 00:00:{n:02d}")
+    first, _ = cached_list(client)
+    second, _ = cached_list(client, first['next_cursor'])
+    third, _ = cached_list(client, second['next_cursor'])
+    assert [conv['session_id'] for conv in second['conversations']] == ['conv_3', 'conv_2']
+
+    store.add_message(ids[1], '20250101120000', 'user', 'hello')
+
+    # The first page always refreshes, the page holding conv_1 refreshes,
+    # the page in between is still served from the cache
+    assert cached_list(client)[1] is False
+    assert cached_list(client, first['next_cursor'])[1] is True
+    assert cached_list(client, second['next_cursor'])[1] is False
+
+
+def test_write_drops_search_and_stats(web):
+    client, store = web
+    conv_id = store.create_conversation('conv')
+    from heychat_web_server import conversation_cache
+    for url in ('/api/conversations/stats', '/api/conversations/search?q=hello'):
+        client.get(url)
+
+    store.add_message(conv_id, '20250101120000', 'user', 'hello')
+
+    hits = conversation_cache.hits
+    stats = client.get('/api/conversations/stats').get_json()
+    results = client.get('/api/conversations/search?q=hello').get_json()
+    assert conversation_cache.hits == hits
+    assert stats['stats']['total_messages'] == 1
+    assert len(results['results']) == 1
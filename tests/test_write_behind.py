@@ -0,0 +1,106 @@
+"""WriteBehindQueue: batched persistence, outbox recovery and shutdown"""
+
+import json
+import threading
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+class BlockingStore:
+    """Store whose writes wait until released; fails while ``fail`` is set"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.fail = False
+        self.rows = []
+
+    def get_or_create_conversation(self, session_id):
+        return 1
+
+    def persist_messages(self, rows, skip_existing=False):
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("database down")
+        self.rows.extend(rows)
+        return len(rows)
+
+
+def outbox_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_messages_reach_the_database_in_order(store, tmp_path):
+    queue = WriteBehindQueue(store, tmp_path / 'outbox.jsonl')
+    for seq in range(1, 6):
+        queue.put('s1', seq, '20250101120000', 'user' if seq % 2 else 'assistant', f"m{seq}")
+
+    assert queue.flush(timeout=5)
+    assert queue.close() == 0
+    assert [msg['content'] for msg in store.get_conversation('s1')['messages']] == [f"m{n}" for n in range(1, 6)]
+    assert queue.persisted == 5
+
+
+def test_unsaved_messages_are_replayed_on_next_start(store, tmp_path):
+    path = tmp_path / 'outbox.jsonl'
+    blocked = BlockingStore()
+    blocked.fail = True
+    blocked.release.set()
+    queue = WriteBehindQueue(blocked, path)
+    queue.put('s1', 1, '20250101120000', 'user', 'hello')
+    queue.put('s1', 2, '20250101120001', 'assistant', 'hi')
+
+    assert queue.close(timeout=5) == 2
+
+    replay = WriteBehindQueue(store, path)
+    assert replay.recovered == 2
+    assert replay.flush(timeout=5)
+    replay.close()
+    assert [msg['content'] for msg in store.get_conversation('s1')['messages']] == ['hello', 'hi']
+
+
+def test_replay_skips_messages_already_committed(store, tmp_path):
+    path = tmp_path / 'outbox.jsonl'
+    conv_id = store.get_or_create_conversation('s1')
+    store.add_message(conv_id, '20250101120000', 'user', 'hello')
+    # Committed, but the process died before writing the "persisted" record
+    path.write_text(json.dumps({
+        "type": "message", "session_id": "s1", "seq": 1, "timestamp_str": "20250101120000",
+        "role": "user", "content": "hello", "audio_file_path": None, "metadata": None
+    }) + "\n")
+
+    queue = WriteBehindQueue(store, path)
+    assert queue.flush(timeout=5)
+    queue.close()
+
+    assert [msg['content'] for msg in store.get_conversation('s1')['messages']] == ['hello']
+
+
+def test_close_during_a_slow_batch_leaves_the_outbox_open(tmp_path, capsys):
+    path = tmp_path / 'outbox.jsonl'
+    blocked = BlockingStore()
+    queue = WriteBehindQueue(blocked, path)
+    queue.put('s1', 1, '20250101120000', 'user', 'hello')
+    assert blocked.started.wait(5)
+
+    assert queue.close(timeout=0.05) == 1
+    assert 'Flush incomplete' in capsys.readouterr().err
+    assert not queue._file.closed
+
+    # The writer finishes its batch and records it instead of failing on a closed file
+    blocked.release.set()
+    queue._thread.join(5)
+    assert not queue._thread.is_alive()
+    assert len(blocked.rows) == 1
+    assert outbox_records(path)[-1] == {"type": "persisted", "session_id": "s1", "seq": 1}
+
+
+def test_put_after_close_is_rejected(store, tmp_path):
+    queue = WriteBehindQueue(store, tmp_path / 'outbox.jsonl')
+    queue.close()
+
+    with pytest.raises(RuntimeError):
+        queue.put('s1', 1, '20250101120000', 'user', 'late')
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+HeyChat TTL/LRU Cache
+Bounded, thread-safe cache with per-entry expiry, LRU eviction and
+tag-based invalidation, plus hit/miss counters for sizing.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire after ``ttl`` seconds.
+
+    Entries may carry tags; ``invalidate(tag)`` drops every entry with that
+    tag. ``get_or_compute`` will not store a value if an invalidation ran
+    while it was being computed, so a write racing a read can't leave a
+    stale entry behind.
+    """
+
+    def __init__(self, maxsize=256, ttl=10.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """Return a cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags=(), ttl=None):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._store(key, value, tags, ttl)
+
+    def _store(self, key, value, tags, ttl):
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value, frozenset(tags))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute, tags=(), ttl=None):
+        """Return the cached value for key, computing and caching it on a miss.
+
+        ``tags`` may be an iterable or a callable taking the computed value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            generation = self._generation
+        value = compute()
+        entry_tags = tags(value) if callable(tags) else tags
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value, entry_tags, ttl)
+        return value
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
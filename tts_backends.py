@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+HeyChat Text-to-Speech Backends
+Pluggable speech output for the voice engine, plus the pieces for speaking a
+streamed reply sentence by sentence while later tokens are still arriving.
+
+Backends implement ``speak(text)`` (blocking until the text has been spoken).
+Register new ones in TTS_BACKENDS.
+"""
+
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import time
+
+
+class CommandTTS:
+    """Speak by running a command with the text as its last argument"""
+    command = None
+
+    def __init__(self, command=None):
+        self.command = command or self.command
+
+    def speak(self, text):
+        if text:
+            subprocess.run([*self.command.split(), text], stderr=subprocess.DEVNULL)
+
+
+class SayTTS(CommandTTS):
+    """macOS built-in 'say'"""
+    command = 'say'
+
+
+class EspeakTTS(CommandTTS):
+    """espeak / espeak-ng on Linux"""
+    command = 'espeak'
+
+
+class NullTTS:
+    """Discard speech (tests and --no-tts)"""
+
+    def speak(self, text):
+        pass
+
+
+TTS_BACKENDS = {
+    'say': SayTTS,
+    'espeak': EspeakTTS,
+    'none': NullTTS
+}
+
+
+def create_tts(name=None):
+    """Create a TTS backend by name; 'auto' picks the first installed command"""
+    if not name or name == 'auto':
+        for candidate in ('say', 'espeak'):
+            if shutil.which(candidate):
+                return TTS_BACKENDS[candidate]()
+        return NullTTS()
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name} (choose from {', '.join(TTS_BACKENDS)})")
+    return TTS_BACKENDS[name]()
+
+
+# End of sentence: terminal punctuation (plus closing quotes/brackets) then whitespace
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+# Abbreviations that end in a period but don't end a sentence
+_ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e', 'approx'}
+
+
+class SentenceSplitter:
+    """Split a token stream into sentences as soon as each one is complete.
+
+    Sentences shorter than ``min_chars`` are merged with the next one so the
+    TTS isn't started for fragments like "Sure." on their own.
+    """
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars
+        self._buffer = ''
+        self._scan_from = 0
+
+    def feed(self, text):
+        """Add streamed text and return the sentences it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer, self._scan_from):
+            candidate = self._buffer[start:match.end()]
+            last_word = candidate.rstrip().rstrip('.').rsplit(None, 1)[-1:] or ['']
+            if match.group().strip().startswith('.') and last_word[0].lower() in _ABBREVIATIONS:
+                continue
+            if len(candidate.strip()) < self.min_chars:
+                continue
+            sentences.append(candidate.strip())
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        # Only rescan the tail: a boundary can't appear inside already-scanned text
+        self._scan_from = max(0, len(self._buffer) - 1)
+        return sentences
+
+    def flush(self):
+        """Return whatever is left at the end of the stream"""
+        rest, self._buffer, self._scan_from = self._buffer.strip(), '', 0
+        return [rest] if rest else []
+
+
+class SpeechQueue:
+    """Speak queued sentences in order on a background thread.
+
+    ``first_audio_at`` records when the first sentence was handed to the
+    backend (time.monotonic()), for time-to-first-audio reporting.
+    """
+
+    def __init__(self, tts):
+        self.tts = tts
+        self.first_audio_at = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, sentence):
+        self._queue.put(sentence)
+
+    def close(self):
+        """Wait until every queued sentence has been spoken"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            sentence = self._queue.get()
+            if sentence is None:
+                return
+            if self.first_audio_at is None:
+                self.first_audio_at = time.monotonic()
+            try:
+                self.tts.speak(sentence)
+            except OSError:
+                pass
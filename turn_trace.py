@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+HeyChat Turn Tracing
+Per-turn latency spans for the voice engine. Each answered turn stores its
+spans, in milliseconds, as ``metadata.trace`` on the assistant message:
+
+    record        capturing the utterance (until the endpoint)
+    preprocess    trimming, resampling and encoding the audio for upload
+    upload        sending the audio to Whisper
+    transcribe    waiting for Whisper's answer
+    history_load  building the messages sent to the chat model
+    completion    the chat completion (to the last token when streaming)
+    persist       saving the user message and the assistant reply (journal
+                  and write-behind queue)
+    speak         text-to-speech left after the reply arrived
+    total         the whole turn
+
+With streaming capture, segments are prepared, uploaded and transcribed
+while the user is still talking; preprocess, upload and transcribe are then
+summed over the segments and overlap record. The trace is taken while the
+assistant reply is being saved, after its journal entry and before its
+write-behind record (which carries the trace), so that last append is the
+only part of the turn it leaves out.
+
+``summarize_traces`` turns stored traces into per-stage percentiles
+(``view_conversations.py latency``).
+"""
+
+import time
+from contextlib import contextmanager
+
+STAGES = ('record', 'preprocess', 'upload', 'transcribe', 'history_load', 'completion', 'persist', 'speak', 'total')
+PERCENTILES = (50, 95, 99)
+
+
+class TurnTrace:
+    """Accumulates span durations for one turn"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self._open = {}  # stage -> start of the span still running
+
+    def add(self, stage, seconds):
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        started = self._open[stage] = time.perf_counter()
+        try:
+            yield
+        finally:
+            del self._open[stage]
+            self.add(stage, time.perf_counter() - started)
+
+    def as_metadata(self):
+        """Spans in milliseconds, total and running spans so far included, for messages.metadata.trace"""
+        now = time.perf_counter()
+        spans = dict(self.spans, total=now - self.started)
+        for stage, started in self._open.items():
+            spans[stage] = spans.get(stage, 0.0) + now - started
+        return {stage: round(spans[stage] * 1000, 1) for stage in STAGES if stage in spans}
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list"""
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def summarize_traces(traces):
+    """Per-stage count, mean and p50/p95/p99 (milliseconds) over trace dicts"""
+    samples = {}
+    for trace in traces:
+        for stage, ms in trace.items():
+            if isinstance(ms, (int, float)):
+                samples.setdefault(stage, []).append(float(ms))
+
+    summary = {}
+    for stage in sorted(samples, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+        values = sorted(samples[stage])
+        summary[stage] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 1),
+            **{f"p{p}": round(percentile(values, p), 1) for p in PERCENTILES}
+        }
+    return summary
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+HeyChat Voice Activity Detection
+NumPy speech detector with an adaptive noise floor, used to end a turn a
+short, configurable hangover after the user stops talking instead of waiting
+for sox's fixed 4 seconds of silence.
+
+The noise floor follows the frame energy while nobody is speaking (quickly
+down, slowly up), so the detector works the same in a quiet room and next to
+a fan. A frame is speech when it is ``margin_db`` above the floor and above
+an absolute minimum; a few consecutive speech frames are needed to start an
+utterance, so clicks and taps don't open a turn.
+
+Usage (endpoint timing for recorded fixtures, no API calls):
+    python3 vad.py speech.wav noisy.wav
+    python3 vad.py speech.wav --hangover-ms 400 --margin-db 8
+"""
+
+import argparse
+import math
+import sys
+
+import numpy as np
+
+from audio_stream import FRAME_MS, MIN_SEGMENT_MS, PauseSegmenter, WavStream
+
+# Speech must be this far above the noise floor...
+MARGIN_DB = 10.0
+# ...and above this absolute level (dB relative to full scale)
+MIN_SPEECH_DB = -50.0
+# Consecutive speech needed to start an utterance
+START_MS = 60
+# Frames at the start of the stream used only to measure the noise floor
+WARMUP_MS = 150
+# Trailing silence that ends the turn
+HANGOVER_MS = 700
+# Noise floor time constants: fall fast when it gets quieter, rise slowly when
+# it gets louder, and creep up very slowly during speech so a noise source
+# that switches on mid-sentence is eventually absorbed
+FLOOR_FALL_MS = 100
+FLOOR_RISE_MS = 2000
+FLOOR_SPEECH_RISE_MS = 20000
+
+
+def frame_db(frame):
+    """Frame energy in dB relative to full scale (int16 input)"""
+    if not len(frame):
+        return -120.0
+    x = frame.astype(np.float32) / 32768.0
+    return 10.0 * math.log10(float(np.mean(x * x)) + 1e-12)
+
+
+def _smoothing(frame_ms, time_constant_ms):
+    return 1.0 - math.exp(-frame_ms / time_constant_ms)
+
+
+class AdaptiveVAD:
+    """Energy speech detector with an adaptive noise floor.
+
+    Drop-in for audio_stream.EnergyDetector: ``is_speech(frame)`` per frame.
+    ``reset()`` re-measures the noise floor; PauseSegmenter calls it at the
+    start of every utterance, since each turn opens a new recording.
+    """
+
+    def __init__(self, frame_ms=FRAME_MS, margin_db=MARGIN_DB, min_speech_db=MIN_SPEECH_DB,
+                 start_ms=START_MS, warmup_ms=WARMUP_MS):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.warmup_frames = warmup_ms // frame_ms
+        self._fall = _smoothing(frame_ms, FLOOR_FALL_MS)
+        self._rise = _smoothing(frame_ms, FLOOR_RISE_MS)
+        self._speech_rise = _smoothing(frame_ms, FLOOR_SPEECH_RISE_MS)
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None
+        self.in_speech = False
+        self._frames = 0
+        self._run = 0
+
+    def threshold_db(self):
+        """Current speech threshold in dBFS"""
+        if self.noise_floor_db is None:
+            return self.min_speech_db
+        return max(self.noise_floor_db + self.margin_db, self.min_speech_db)
+
+    def is_speech(self, frame):
+        level = frame_db(frame)
+        self._frames += 1
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level
+        if self._frames <= self.warmup_frames:
+            # Calibrating: take the quietest level seen so far as the floor
+            self.noise_floor_db = min(self.noise_floor_db, level)
+            return False
+
+        loud = level > self.threshold_db()
+        self._run = self._run + 1 if loud else 0
+        self.in_speech = self._run >= self.start_frames or (self.in_speech and loud)
+
+        if not loud:
+            rate = self._fall if level < self.noise_floor_db else self._rise
+        else:
+            rate = self._speech_rise
+        self.noise_floor_db += (level - self.noise_floor_db) * rate
+        return self.in_speech
+
+
+def endpoint_segmenter(vad=None, hangover_ms=HANGOVER_MS, streaming=False):
+    """PauseSegmenter that ends the turn ``hangover_ms`` after speech stops.
+
+    With ``streaming`` the utterance is also cut at pauses for concurrent
+    transcription; otherwise it is kept as one segment.
+    """
+    return PauseSegmenter(
+        vad or AdaptiveVAD(),
+        end_silence_ms=hangover_ms,
+        min_segment_ms=MIN_SEGMENT_MS if streaming else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat VAD endpointing on WAV files')
+    parser.add_argument('wav', nargs='+', help='WAV fixtures (one utterance each)')
+    parser.add_argument('--hangover-ms', type=int, default=HANGOVER_MS,
+                        help=f'Silence that ends a turn (default: {HANGOVER_MS})')
+    parser.add_argument('--margin-db', type=float, default=MARGIN_DB,
+                        help=f'Speech level above the noise floor (default: {MARGIN_DB:g})')
+    parser.add_argument('--streaming', action='store_true', help='Also cut segments at pauses')
+
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.wav:
+        source = WavStream([path], realtime=False)
+        vad = AdaptiveVAD(margin_db=args.margin_db)
+        segmenter = endpoint_segmenter(vad, args.hangover_ms, args.streaming)
+        try:
+            segments = [samples for samples, _ in segmenter.segments(source.frames())
+                        if samples is not None]
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            failed = True
+            continue
+
+        timing = segmenter.timing
+        if not timing:
+            print(f"🔈 {path}: no speech detected")
+            continue
+        print(f"🎯 {path}: speech {timing['speech_start_ms'] / 1000:.2f}s–"
+              f"{timing['speech_end_ms'] / 1000:.2f}s, turn ended at "
+              f"{timing['endpoint_ms'] / 1000:.2f}s (+{timing['endpoint_delay_ms']}ms), "
+              f"{len(segments)} segment(s), noise floor {vad.noise_floor_db:.1f} dBFS")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 HeyChat Conversation Viewer
-View and browse conversation data from Supabase
+View and browse conversation data from the HeyChat database
 """
 
 import json
@@ -10,9 +10,14 @@ import os
 from datetime import datetime
 import argparse
 
+from conversation_store import EXPORT_FORMATS, StoreError, get_store
+from conversation_archive import ACTIVITY_FILTERS, ARCHIVE_FORMATS, import_archive, write_archive
+from turn_trace import PERCENTILES, summarize_traces
+
 class ConversationViewer:
-    def __init__(self):
+    def __init__(self, store=None):
         self.db_name = "heychat"
+        self.store = store or get_store()
         
     def format_timestamp(self, timestamp_str):
         """Format timestamp string to readable format"""
@@ -32,70 +37,41 @@ class ConversationViewer:
         except:
             return "Unknown"
     
-    def list_conversations(self, limit=10, active_only=True):
+    def list_conversations(self, limit=10, active_only=True, cursor=None):
         """List recent conversations"""
         print("🗣️  HeyChat Conversations")
         print("=" * 50)
         
-        # In a real implementation, this would query Supabase
-        # For now, show placeholder data
-        conversations = [
-            {
-                "id": "conv_001",
-                "session_id": "session_20251007120000_abc123",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 12:00:00",
-                "message_count": 8,
-                "duration": "00:05:23"
-            },
-            {
-                "id": "conv_002", 
-                "session_id": "session_20251007130000_def456",
-                "title": "Voice Conversation",
-                "created_at": "2025-01-15 13:00:00",
-                "message_count": 12,
-                "duration": "00:08:45"
-            }
-        ]
+        page = self.store.list_conversations_page(limit=limit, cursor=cursor, active_only=active_only)
+        conversations = page['conversations']
+        
+        if not conversations:
+            print("No conversations found.")
+            print()
+            return
         
         for i, conv in enumerate(conversations, 1):
             print(f"{i:2d}. {conv['session_id']}")
-            print(f"    📅 {conv['created_at']}")
+            print(f"    📅 {conv['created_at'].replace('T', ' ')}")
             print(f"    💬 {conv['message_count']} messages")
             print(f"    ⏱️  {conv['duration']}")
             print()
+        
+        if page['next_cursor']:
+            print(f"➡️  Next page: --cursor {page['next_cursor']}")
+            print()
     
     def show_conversation(self, session_id):
         """Show detailed conversation"""
         print(f"🗣️  Conversation: {session_id}")
         print("=" * 60)
         
-        # In a real implementation, this would query Supabase
-        # For now, show placeholder conversation
-        messages = [
-            {
-                "timestamp_str": "20251007120000",
-                "role": "user",
-                "content": "Hello, how are you today?"
-            },
-            {
-                "timestamp_str": "20251007120005",
-                "role": "assistant", 
-                "content": "I'm doing well, thank you for asking! How can I help you today?"
-            },
-            {
-                "timestamp_str": "20251007120015",
-                "role": "user",
-                "content": "Can you help me with a coding problem?"
-            },
-            {
-                "timestamp_str": "20251007120020",
-                "role": "assistant",
-                "content": "Of course! I'd be happy to help you with a coding problem. What programming language are you working with and what specific issue are you facing?"
-            }
-        ]
-        
-        for msg in messages:
+        conversation = self.store.get_conversation(session_id)
+        if conversation is None:
+            print("❌ Conversation not found")
+            return
+        
+        for msg in conversation['messages']:
             timestamp = self.format_timestamp(msg['timestamp_str'])
             role_icon = "👤" if msg['role'] == 'user' else "🤖"
             role_name = "You" if msg['role'] == 'user' else "ChatGPT"
@@ -109,18 +85,15 @@ class ConversationViewer:
         print(f"🔍 Search Results for: '{search_term}'")
         print("=" * 50)
         
-        # In a real implementation, this would query Supabase
-        # For now, show placeholder results
-        results = [
-            {
-                "session_id": "session_20251007120000_abc123",
-                "timestamp": "2025-01-15 12:00:00",
-                "preview": "Hello, how are you today? I'm doing well, thank you for asking!"
-            }
-        ]
+        results = self.store.search_conversations(search_term)
+        
+        if not results:
+            print("No matching conversations.")
+            print()
+            return
         
         for result in results:
-            print(f"📅 {result['timestamp']}")
+            print(f"📅 {result['created_at'].replace('T', ' ')}")
             print(f"🆔 {result['session_id']}")
             print(f"💬 {result['preview']}")
             print()
@@ -130,21 +103,13 @@ class ConversationViewer:
         print("📊 HeyChat Statistics")
         print("=" * 30)
         
-        # In a real implementation, this would query Supabase
-        stats = {
-            "total_conversations": 15,
-            "total_messages": 127,
-            "total_duration": "02:15:30",
-            "avg_messages_per_conversation": 8.5,
-            "most_active_day": "2025-01-15",
-            "longest_conversation": "00:12:45"
-        }
+        stats = self.store.get_stats()
         
         print(f"📈 Total Conversations: {stats['total_conversations']}")
         print(f"💬 Total Messages: {stats['total_messages']}")
         print(f"⏱️  Total Duration: {stats['total_duration']}")
         print(f"📊 Avg Messages/Conversation: {stats['avg_messages_per_conversation']}")
-        print(f"📅 Most Active Day: {stats['most_active_day']}")
+        print(f"📅 Most Active Day: {stats['most_active_day'] or 'N/A'}")
         print(f"🏆 Longest Conversation: {stats['longest_conversation']}")
         print()
     
@@ -152,58 +117,107 @@ class ConversationViewer:
         """Export conversation to file"""
         print(f"📤 Exporting conversation: {session_id}")
         
-        # In a real implementation, this would query Supabase and export
-        export_data = {
-            "session_id": session_id,
-            "exported_at": datetime.now().isoformat(),
-            "messages": [
-                {
-                    "timestamp": "2025-01-15T12:00:00",
-                    "role": "user",
-                    "content": "Hello, how are you today?"
-                },
-                {
-                    "timestamp": "2025-01-15T12:00:05", 
-                    "role": "assistant",
-                    "content": "I'm doing well, thank you for asking!"
-                }
-            ]
-        }
+        chunks = self.store.export_stream(session_id, format)
+        if chunks is None:
+            print("❌ Conversation not found")
+            sys.exit(1)
         
         filename = f"conversation_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
         
-        if format == 'json':
-            with open(filename, 'w') as f:
-                json.dump(export_data, f, indent=2)
-        elif format == 'txt':
-            with open(filename, 'w') as f:
-                f.write(f"Conversation: {session_id}\n")
-                f.write(f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 50 + "\n\n")
-                for msg in export_data['messages']:
-                    f.write(f"[{msg['timestamp']}] {msg['role'].upper()}: {msg['content']}\n\n")
+        with open(filename, 'w') as f:
+            for chunk in chunks:
+                f.write(chunk)
         
         print(f"✅ Exported to: {filename}")
+    
+    def archive_conversations(self, output=None, format='ndjson', since=None, until=None, activity='all'):
+        """Bulk export conversations to a compressed archive"""
+        if not output:
+            extension = 'ndjson.gz' if format == 'ndjson' else 'parquet'
+            output = f"heychat_archive_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        
+        print(f"📦 Archiving conversations to: {output}")
+        stats = write_archive(self.store, output, format, since=since, until=until, activity=activity)
+        
+        size_kb = os.path.getsize(output) / 1024
+        print(f"✅ Archived {stats['conversations']} conversations, {stats['messages']} messages, "
+              f"{stats['fusions']} fusions")
+        print(f"💾 {size_kb:.1f} KB in {stats['seconds']}s")
+    
+    def import_conversations(self, source):
+        """Load conversations from an archive"""
+        print(f"📥 Importing archive: {source}")
+        stats = import_archive(self.store, source)
+        
+        print(f"✅ Imported {stats['conversations']} conversations, {stats['messages']} messages in {stats['seconds']}s")
+        if stats['skipped_conversations']:
+            print(f"⏭️  Skipped {stats['skipped_conversations']} conversations already in the database")
+        if stats['fusions']:
+            print(f"🔗 Restored {stats['fusions']} fusion records")
+        if stats['skipped_fusions']:
+            print(f"⏭️  Skipped {stats['skipped_fusions']} fusion records for skipped or missing conversations")
+
+    def show_latency(self, since=None, until=None):
+        """Per-stage voice turn latency percentiles from stored turn traces"""
+        print("⏱️  Voice Turn Latency")
+        print("=" * 30)
+        
+        summary = summarize_traces(self.store.iter_turn_traces(since, until))
+        if not summary:
+            print("No traced turns found")
+            return
+        
+        turns = summary.get('total', {}).get('count', max(s['count'] for s in summary.values()))
+        print(f"🔢 {turns} turns" + (f" since {since:%Y-%m-%d %H:%M}" if since else "")
+              + (f" until {until:%Y-%m-%d %H:%M}" if until else ""))
+        header = ''.join(f"{'p' + str(p):>10}" for p in PERCENTILES)
+        print(f"{'stage':<14}{'count':>7}{'mean':>10}{header}   (ms)")
+        for stage, stats in summary.items():
+            values = ''.join(f"{stats['p' + str(p)]:>10.1f}" for p in PERCENTILES)
+            print(f"{stage:<14}{stats['count']:>7}{stats['mean']:>10.1f}{values}")
+        print()
+
+def parse_date(value):
+    """argparse type for YYYY-MM-DD or ISO timestamps"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value}")
 
 def main():
     parser = argparse.ArgumentParser(description='HeyChat Conversation Viewer')
     parser.add_argument('command', nargs='?', default='list', 
-                       choices=['list', 'show', 'search', 'stats', 'export'],
+                       choices=['list', 'show', 'search', 'stats', 'latency', 'export', 'archive', 'import'],
                        help='Command to execute')
     parser.add_argument('--session-id', help='Session ID for show/export commands')
     parser.add_argument('--search', help='Search term for search command')
     parser.add_argument('--limit', type=int, default=10, help='Limit for list command')
-    parser.add_argument('--format', choices=['json', 'txt'], default='json', 
+    parser.add_argument('--cursor', help='Page cursor for list command (printed after each page)')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='json', 
                        help='Export format')
     parser.add_argument('--active-only', action='store_true', default=True,
                        help='Show only active conversations')
+    parser.add_argument('--output', help='Archive file for archive command')
+    parser.add_argument('--input', help='Archive file for import command')
+    parser.add_argument('--archive-format', choices=ARCHIVE_FORMATS, default='ndjson',
+                       help='Archive format (ndjson.gz or parquet)')
+    parser.add_argument('--since', type=parse_date,
+                       help='Archive conversations (latency: turns) created on/after this date')
+    parser.add_argument('--until', type=parse_date,
+                       help='Archive conversations (latency: turns) created before this date')
+    parser.add_argument('--activity', choices=ACTIVITY_FILTERS, default='all',
+                       help='Archive active, inactive or all conversations')
     
     args = parser.parse_args()
     
     viewer = ConversationViewer()
     
     if args.command == 'list':
-        viewer.list_conversations(limit=args.limit, active_only=args.active_only)
+        try:
+            viewer.list_conversations(limit=args.limit, active_only=args.active_only, cursor=args.cursor)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
     elif args.command == 'show':
         if not args.session_id:
             print("❌ Error: --session-id required for show command")
@@ -216,11 +230,29 @@ def main():
         viewer.search_conversations(args.search)
     elif args.command == 'stats':
         viewer.show_stats()
+    elif args.command == 'latency':
+        viewer.show_latency(since=args.since, until=args.until)
     elif args.command == 'export':
         if not args.session_id:
             print("❌ Error: --session-id required for export command")
             sys.exit(1)
         viewer.export_conversation(args.session_id, args.format)
+    elif args.command == 'archive':
+        try:
+            viewer.archive_conversations(args.output, args.archive_format,
+                                         since=args.since, until=args.until, activity=args.activity)
+        except StoreError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+    elif args.command == 'import':
+        if not args.input:
+            print("❌ Error: --input required for import command")
+            sys.exit(1)
+        try:
+            viewer.import_conversations(args.input)
+        except (StoreError, ValueError, OSError) as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
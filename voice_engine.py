@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+HeyChat Voice Engine
+Long-running voice conversation loop: record, transcribe, chat, save and speak
+in one process. The API connection (HTTP keep-alive) and the database pool stay
+open across turns instead of being re-created by curl/jq/python per message.
+
+Usage:
+    python3 voice_engine.py                      # microphone, turn ends 0.7s after speech
+    python3 voice_engine.py --no-tts --hangover-ms 500
+    python3 voice_engine.py --stream --tts say      # speak sentence by sentence
+    python3 voice_engine.py --streaming-capture     # transcribe at each pause while speaking
+    python3 voice_engine.py --legacy-rec            # sox 'rec' with its fixed 4s silence
+    python3 voice_engine.py --input-wav a.wav b.wav --api-base http://127.0.0.1:8089/v1
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from audio_prep import CODECS, DEFAULT_CODEC, prepare, prepare_file
+from audio_stream import MicStream, WavStream
+from context_window import DEFAULT_BUDGET, ContextWindow, summary_request, token_counter
+from conversation_store import get_store, read_setting
+from openai_client import OpenAIClient, OpenAIError, default_chat_model
+from session_journal import SessionJournal
+from supabase_integration import HeyChatSupabase
+from tts_backends import TTS_BACKENDS, SentenceSplitter, SpeechQueue, create_tts
+from turn_trace import TurnTrace
+from vad import HANGOVER_MS, MARGIN_DB, AdaptiveVAD, endpoint_segmenter
+from write_behind import WriteBehindQueue
+
+LOG_DIR = Path(read_setting('LOG_DIR', str(Path.home() / '.config/voice-chatgpt/logs'))).expanduser()
+MAX_RECORD_SECONDS = 30
+SILENCE_SECONDS = 4.0
+TRANSCRIBE_WORKERS = 3
+
+QUIT_COMMANDS = ('quit', 'exit', 'goodbye', 'bye')
+CLEAR_COMMANDS = ('clear', 'clear conversation', 'reset')
+HELP_COMMANDS = ('help', 'commands', 'what can i say')
+TTS_ON_COMMANDS = ('tts on', 'enable tts', 'turn on speech', 'speak responses')
+TTS_OFF_COMMANDS = ('tts off', 'disable tts', 'turn off speech', 'stop speaking')
+NEW_SESSION_COMMANDS = ('new session', 'new conversation', 'start over')
+
+
+class RecAudioSource:
+    """Record one utterance per turn from the microphone with sox 'rec'"""
+
+    def __init__(self, path, max_seconds=MAX_RECORD_SECONDS, silence_seconds=SILENCE_SECONDS):
+        self.path = Path(path)
+        self.max_seconds = max_seconds
+        self.silence_seconds = silence_seconds
+
+    def capture(self):
+        """Record until silence; return the WAV path, or None if nothing was recorded"""
+        subprocess.run(
+            ['rec', '-q', '-t', 'wav', str(self.path), 'trim', '0', str(self.max_seconds),
+             'silence', '1', '0.1', '1%', '1', str(self.silence_seconds), '1%'],
+            stderr=subprocess.DEVNULL
+        )
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return None
+        return str(self.path)
+
+    def discard(self, path):
+        """Remove the recording once the turn is done"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def exhausted(self):
+        return False
+
+
+class WavFileSource:
+    """Play back recorded WAV fixtures as turns instead of using the microphone"""
+
+    def __init__(self, paths):
+        self._paths = list(paths)
+
+    def capture(self):
+        return str(self._paths.pop(0)) if self._paths else None
+
+    def discard(self, path):
+        pass
+
+    def exhausted(self):
+        return not self._paths
+
+
+class VoiceEngine:
+    """One voice conversation session: holds the API client, DB pool and history"""
+
+    def __init__(self, client, source, tts, store=None, model=None, session_id=None,
+                 tts_enabled=True, stream=False, context_tokens=DEFAULT_BUDGET, summarize=True,
+                 segmenter=None, transcribe_workers=TRANSCRIBE_WORKERS, upload_codec=DEFAULT_CODEC,
+                 log_dir=LOG_DIR):
+        self.client = client
+        self.source = source
+        self.tts = tts
+        self.store = store or get_store()
+        self.db = HeyChatSupabase(self.store)
+        self.model = model or default_chat_model()
+        self.tts_enabled = tts_enabled
+        self.stream = stream
+        self.context = ContextWindow(context_tokens, token_counter(self.model))
+        self.summarize = summarize
+        self.segmenter = segmenter or endpoint_segmenter()
+        self.upload_codec = upload_codec
+        # Persistent workers, so each keeps its own keep-alive API connection
+        self.transcribe_pool = ThreadPoolExecutor(max_workers=transcribe_workers,
+                                                  thread_name_prefix='transcribe')
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.session_file = self.log_dir / 'current_session.id'
+        self.transcript_file = self.log_dir / 'transcripts.log'
+        self.journal_dir = self.log_dir / 'sessions'
+        self.journal_fsync = read_setting('HEYCHAT_JOURNAL_FSYNC', '0') in ('1', 'true', 'yes')
+        # Messages are written to the database in the background, off the turn's critical path
+        self.persistence = WriteBehindQueue(self.store, self.log_dir / 'outbox.jsonl',
+                                            fsync=self.journal_fsync)
+        if self.persistence.recovered:
+            print(f"💾 Saving {self.persistence.recovered} message(s) left over from the last run")
+        self.turns = 0
+        self.journal = None
+        self.conversation_id = None
+        self.start_session(session_id or self._saved_session_id())
+
+    @property
+    def history(self):
+        """Chat API messages for this session, kept in memory by the journal"""
+        return self.journal.history
+
+    def _saved_session_id(self):
+        try:
+            session_id = self.session_file.read_text().strip()
+        except OSError:
+            session_id = ''
+        return session_id or self.db.generate_session_id()
+
+    def start_session(self, session_id):
+        """Switch to a session, rebuilding its history from the session journal.
+
+        A session without a journal (started elsewhere) is seeded once from
+        the database.
+        """
+        if self.journal:
+            self.journal.close()
+        self.session_id = session_id
+        self.session_file.write_text(session_id + "\n")
+        journal_name = re.sub(r'[^\w.-]', '_', session_id) + '.jsonl'
+        self.journal = SessionJournal(self.journal_dir / journal_name, fsync=self.journal_fsync)
+        self.conversation_id = None
+        try:
+            self.conversation_id = self.store.get_or_create_conversation(session_id)
+            if not self.journal.replayed:
+                self.journal.extend(self.store.get_history(self.conversation_id))
+                header = self.store.get_conversation_header(session_id) or {}
+                self._restore_summary(header.get('metadata'))
+        except Exception as e:
+            print(f"⚠️  Database unavailable, keeping history in the local journal: {e}", file=sys.stderr)
+        self.context.reset(self.journal.summary)
+
+    def _restore_summary(self, metadata):
+        """Reuse a context summary saved in the conversation metadata"""
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata or 'null')
+        summary = (metadata or {}).get('context_summary')
+        if summary and summary.get('covers', 0) <= len(self.history):
+            self.journal.set_summary({key: summary[key] for key in ('text', 'covers', 'tokens')})
+
+    def save_message(self, timestamp, role, content, audio_file_path=None, metadata=None):
+        """Append to the session journal and queue the message for the database.
+
+        ``metadata`` may be a callable, called after the journal append
+        (the turn trace uses this to include as much of the save as it can).
+        """
+        seq = self.journal.append(role, content, timestamp)
+        if callable(metadata):
+            metadata = metadata()
+        self.persistence.put(self.session_id, seq, timestamp, role, content, audio_file_path, metadata)
+
+    def compact_context(self):
+        """Summarize (or drop) the oldest turns once the history outgrows the token budget"""
+        if not self.context.needs_compaction(self.history):
+            return
+        summarize = self._summarize if self.summarize else None
+        try:
+            summary = self.context.compact(self.history, summarize)
+        except OpenAIError as e:
+            print(f"⚠️  Could not summarize earlier turns: {e}", file=sys.stderr)
+            return
+
+        self.journal.set_summary(summary)
+        print(f"🗜️  Context: {summary['covers']} earlier messages "
+              f"{'summarized' if summarize else 'dropped'}, "
+              f"{self.context.tokens(self.history)} tokens in window")
+        if self.conversation_id is not None:
+            try:
+                self.store.update_conversation_metadata(self.conversation_id, {
+                    "context_summary": {**summary, "updated_at": datetime.now().isoformat()}
+                })
+            except Exception as e:
+                print(f"⚠️  Could not save context summary: {e}", file=sys.stderr)
+
+    def _summarize(self, previous, messages):
+        return self.client.chat(summary_request(previous, messages), model=self.model).strip()
+
+    def log_transcript(self, timestamp, speaker, text):
+        with open(self.transcript_file, 'a') as f:
+            f.write(f"[{timestamp}] {speaker}: {text}\n")
+
+    def handle_command(self, command):
+        """Run a voice command; return 'quit', True if handled, False otherwise"""
+        if command in QUIT_COMMANDS:
+            print("👋 Goodbye!")
+            return 'quit'
+        if command in CLEAR_COMMANDS:
+            self.journal.clear()
+            self.context.reset()
+            print("🧹 Conversation history cleared.")
+        elif command in HELP_COMMANDS:
+            show_help()
+        elif command in TTS_ON_COMMANDS:
+            self.tts_enabled = True
+            print("📢 Text-to-speech enabled.")
+        elif command in TTS_OFF_COMMANDS:
+            self.tts_enabled = False
+            print("🔇 Text-to-speech disabled.")
+        elif command in NEW_SESSION_COMMANDS:
+            self.start_session(self.db.generate_session_id())
+            print(f"🆕 New conversation session started: {self.session_id}")
+        else:
+            return False
+        return True
+
+    def run_turn(self):
+        """Record and answer one utterance; return False when the session should end"""
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        print(f"🎤 [{timestamp}] Recording... ({self.source_hint()})")
+
+        trace = TurnTrace()
+        audio_path = None
+        endpoint = None
+        try:
+            if hasattr(self.source, 'frames'):
+                transcript = self.transcribe_stream(trace)
+                endpoint = self.segmenter.timing
+            else:
+                with trace.span('record'):
+                    audio_path = self.source.capture()
+                transcript = self.transcribe_file(audio_path, trace) if audio_path else None
+
+            if transcript is None:
+                if self.source.exhausted():
+                    return False
+                print("🔈 No audio detected. Try speaking louder or check your microphone.")
+                return True
+            print(f"🗣️  You said: {transcript}")
+
+            if not transcript:
+                return True
+            command = self.handle_command(transcript.lower().strip(' .!?'))
+            if command:
+                return command != 'quit'
+
+            self.turns += 1
+            self.log_transcript(timestamp, "User", transcript)
+            with trace.span('persist'):
+                self.save_message(timestamp, "user", transcript, audio_path,
+                                  metadata={"endpoint": endpoint} if endpoint else None)
+
+            print("🤔 ChatGPT is thinking...")
+            with trace.span('history_load'):
+                messages = self.context.messages(self.history)
+            context = {
+                "prompt_tokens": self.context.sent_tokens,
+                "messages_sent": len(messages),
+                "summarized_messages": self.context.start
+            }
+            if self.stream:
+                response = self.stream_reply(messages, trace)
+            else:
+                with trace.span('completion'):
+                    response = self.client.chat(messages, model=self.model)
+                print(f"🤖 ChatGPT:\n{response}")
+                if self.tts_enabled:
+                    with trace.span('speak'):
+                        self.tts.speak(response)
+
+            self.log_transcript(timestamp, "ChatGPT", response)
+            spans = {}
+
+            def reply_metadata():
+                spans.update(trace.as_metadata())
+                return {"context": context, "trace": spans}
+
+            with trace.span('persist'):
+                self.save_message(timestamp, "assistant", response, metadata=reply_metadata)
+            print("🧭 " + " · ".join(f"{stage} {ms:.0f}ms" for stage, ms in spans.items()))
+            self.compact_context()
+            return True
+
+        except OpenAIError as e:
+            print(f"❌ API error: {e}")
+            return True
+        finally:
+            if audio_path:
+                self.source.discard(audio_path)
+
+    def transcribe_file(self, audio_path, trace=None):
+        """Trim, downsample and compress a whole recording, then upload it to Whisper"""
+        print("📝 Transcribing...")
+        upload = prepare_file(audio_path, self.upload_codec)
+        print(f"📦 Upload: {upload.describe()}")
+        timing = {"preprocess": upload.seconds}
+        text = self.client.transcribe(upload.data, filename=upload.filename(Path(audio_path).stem),
+                                      content_type=upload.content_type, timing=timing)
+        if trace:
+            for stage, seconds in timing.items():
+                trace.add(stage, seconds)
+        return text
+
+    def _transcribe_segment(self, samples, rate, name):
+        """Prepare and upload one segment (runs on the transcription pool)"""
+        # The VAD has already cut the segment to speech, so no trimming here
+        upload = prepare(samples, rate, self.upload_codec, trim=False)
+        timing = {"preprocess": upload.seconds}
+        text = self.client.transcribe(upload.data, filename=upload.filename(name),
+                                      content_type=upload.content_type, timing=timing)
+        return text, upload, timing
+
+    def transcribe_stream(self, trace=None):
+        """Transcribe an utterance segment by segment while it is still being spoken.
+
+        The turn ends when the segmenter's VAD has heard the hangover's worth
+        of silence. Each segment cut at a pause is uploaded on the
+        transcription pool right away; after the final segment the texts are
+        stitched in order. Returns None if no speech was captured.
+        """
+        futures = []
+        started = time.perf_counter()
+        for samples, _ in self.segmenter.segments(self.source.frames()):
+            if samples is None:
+                continue
+            futures.append(self.transcribe_pool.submit(
+                self._transcribe_segment, samples, self.source.rate, f"segment_{len(futures) + 1}"
+            ))
+            print(f"✂️  Segment {len(futures)}: {len(samples) / self.source.rate:.1f}s")
+        if not futures:
+            return None
+
+        timing = self.segmenter.timing
+        print(f"🎯 Endpoint: speech {timing['speech_start_ms'] / 1000:.2f}s–"
+              f"{timing['speech_end_ms'] / 1000:.2f}s, turn ended "
+              f"{timing['endpoint_delay_ms']}ms after end of speech")
+
+        if trace:
+            trace.add('record', time.perf_counter() - started)
+        captured_at = time.monotonic()
+        results = [future.result() for future in futures]
+        transcript = ' '.join(text for text, _, _ in results if text)
+        done_at = time.monotonic()
+        original = sum(upload.original_bytes for _, upload, _ in results)
+        sent = sum(len(upload.data) for _, upload, _ in results)
+        print(f"📦 Upload: {original:,} → {sent:,} bytes "
+              f"({(original - sent) / original * 100:.0f}% saved, {results[-1][1].codec}) in "
+              f"{sum(upload.seconds for _, upload, _ in results) * 1000:.0f} ms")
+        if trace:
+            for _, _, timing in results:
+                for stage, seconds in timing.items():
+                    trace.add(stage, seconds)
+        print(f"⏱️  Transcript ready {done_at - captured_at:.2f}s after capture ended, "
+              f"{done_at - self.segmenter.speech_ended_at:.2f}s after end of speech "
+              f"({len(futures)} segment{'s' if len(futures) != 1 else ''})")
+        return transcript
+
+    def stream_reply(self, messages, trace=None):
+        """Print the reply as tokens arrive and speak each sentence as soon as it completes"""
+        started = time.monotonic()
+        splitter = SentenceSplitter()
+        speech = SpeechQueue(self.tts) if self.tts_enabled else None
+        parts = []
+
+        print("🤖 ChatGPT:")
+        try:
+            for delta in self.client.chat_stream(messages, model=self.model):
+                if not parts:
+                    first_token = time.monotonic() - started
+                parts.append(delta)
+                sys.stdout.write(delta)
+                sys.stdout.flush()
+                if speech:
+                    for sentence in splitter.feed(delta):
+                        speech.put(sentence)
+            if speech:
+                for sentence in splitter.flush():
+                    speech.put(sentence)
+        finally:
+            print()
+            finished = time.monotonic()
+            if trace:
+                trace.add('completion', finished - started)
+            if speech:
+                speech.close()
+                if trace:
+                    trace.add('speak', time.monotonic() - finished)
+
+        if parts:
+            timing = f"⏱️  first token {first_token:.2f}s"
+            if speech and speech.first_audio_at:
+                timing += f", first audio {speech.first_audio_at - started:.2f}s"
+            print(f"{timing}, full reply {time.monotonic() - started:.2f}s")
+        return ''.join(parts).strip()
+
+    def source_hint(self):
+        if hasattr(self.source, 'frames'):
+            hangover = self.segmenter.end_silence_ms / 1000
+            if self.segmenter.min_segment_frames is not None:
+                return f"segments are transcribed at each pause, {hangover:g}s silence = send, Ctrl+C to stop"
+            return f"{hangover:g}s silence = send, Ctrl+C to stop"
+        if isinstance(self.source, RecAudioSource):
+            return f"{self.source.silence_seconds:g}s silence = send, Ctrl+C to stop"
+        return "reading WAV input"
+
+    def run(self):
+        """Run turns until a quit command or the input runs out"""
+        print("🎤 HeyChat Voice Engine Started")
+        print(f"🆔 Session: {self.session_id} ({len(self.history)} messages)")
+        print("💡 Say 'help' for commands or start speaking...")
+        print()
+
+        started = time.monotonic()
+        while self.run_turn():
+            print("✅ Ready for next input...")
+            print()
+
+        print(f"📊 {self.turns} turns in {time.monotonic() - started:.1f}s, "
+              f"{self.client.connections_opened} API connection(s) opened")
+
+    def close(self):
+        """Finish background work: persist queued messages and close the journal"""
+        self.transcribe_pool.shutdown(wait=False)
+        left = self.persistence.close()
+        print(f"💾 {self.persistence.persisted} message(s) saved in {self.persistence.batches} batch(es)")
+        if left:
+            print(f"⚠️  {left} message(s) not saved yet; they stay in {self.persistence.path} "
+                  f"and are saved on the next start", file=sys.stderr)
+        self.journal.close()
+        self.client.close()
+
+
+def show_help():
+    print("🎤 HeyChat Voice Interface")
+    print("Voice Commands (say any of these):")
+    print("  🚪 Exit: 'quit', 'exit', 'goodbye', 'bye'")
+    print("  🧹 Clear: 'clear', 'clear conversation', 'reset'")
+    print("  📢 TTS: 'tts on', 'enable tts', 'turn on speech'")
+    print("  🔇 TTS: 'tts off', 'disable tts', 'turn off speech'")
+    print("  🆕 New: 'new session', 'new conversation', 'start over'")
+    print("  ❓ Help: 'help', 'commands', 'what can i say'")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HeyChat Voice Engine')
+    parser.add_argument('-n', '--no-tts', action='store_true', help='Start with text-to-speech disabled')
+    parser.add_argument('--input-wav', nargs='+', metavar='WAV',
+                        help='Use recorded WAV files as turns instead of the microphone')
+    parser.add_argument('--api-base', help='OpenAI API base URL (default: OPENAI_BASE_URL or api.openai.com)')
+    parser.add_argument('--model', help='Chat model (default: CHATGPT_MODEL)')
+    parser.add_argument('--session-id', help='Resume or start this session instead of the saved one')
+    parser.add_argument('--stream', action='store_true',
+                        default=read_setting('HEYCHAT_STREAM_CHAT', '0') in ('1', 'true', 'yes'),
+                        help='Stream the reply and speak it sentence by sentence (HEYCHAT_STREAM_CHAT=1)')
+    parser.add_argument('--context-tokens', type=int,
+                        default=int(read_setting('HEYCHAT_CONTEXT_TOKENS', DEFAULT_BUDGET)),
+                        help=f'Token budget for history sent to the model (HEYCHAT_CONTEXT_TOKENS, default: {DEFAULT_BUDGET})')
+    parser.add_argument('--no-summary', action='store_true',
+                        default=read_setting('HEYCHAT_CONTEXT_SUMMARY', '1') in ('0', 'false', 'no'),
+                        help='Drop old turns instead of summarizing them (HEYCHAT_CONTEXT_SUMMARY=0)')
+    parser.add_argument('--streaming-capture', action='store_true',
+                        default=read_setting('HEYCHAT_STREAMING_CAPTURE', '0') in ('1', 'true', 'yes'),
+                        help='Cut speech at pauses and transcribe segments while you talk (HEYCHAT_STREAMING_CAPTURE=1)')
+    parser.add_argument('--transcribe-workers', type=int,
+                        default=int(read_setting('HEYCHAT_TRANSCRIBE_WORKERS', TRANSCRIBE_WORKERS)),
+                        help=f'Concurrent segment uploads (default: {TRANSCRIBE_WORKERS})')
+    parser.add_argument('--hangover-ms', type=int,
+                        default=int(read_setting('HEYCHAT_VAD_HANGOVER_MS', HANGOVER_MS)),
+                        help=f'Silence after speech that ends the turn (HEYCHAT_VAD_HANGOVER_MS, default: {HANGOVER_MS})')
+    parser.add_argument('--vad-margin-db', type=float,
+                        default=float(read_setting('HEYCHAT_VAD_MARGIN_DB', MARGIN_DB)),
+                        help=f'Speech level above the noise floor (HEYCHAT_VAD_MARGIN_DB, default: {MARGIN_DB:g})')
+    parser.add_argument('--legacy-rec', action='store_true',
+                        help=f"Record with sox 'rec' silence detection ({SILENCE_SECONDS:g}s) instead of the VAD")
+    parser.add_argument('--upload-codec', choices=CODECS,
+                        default=read_setting('HEYCHAT_UPLOAD_CODEC', DEFAULT_CODEC),
+                        help=f'Codec for audio uploads, resampled to 16 kHz mono (HEYCHAT_UPLOAD_CODEC, default: {DEFAULT_CODEC})')
+    parser.add_argument('--tts', choices=['auto', *TTS_BACKENDS], default=read_setting('HEYCHAT_TTS', 'auto'),
+                        help='Text-to-speech backend (HEYCHAT_TTS, default: auto)')
+
+    args = parser.parse_args()
+
+    client = OpenAIClient(base_url=args.api_base)
+    if not client.api_key:
+        print("❌ Error: OPENAI_API_KEY is not set (environment or ~/.config/voice-chatgpt/.env)")
+        sys.exit(1)
+
+    if args.legacy_rec:
+        source = WavFileSource(args.input_wav) if args.input_wav else RecAudioSource(LOG_DIR / 'voice_input.wav')
+    else:
+        source = WavStream(args.input_wav) if args.input_wav else MicStream()
+    segmenter = endpoint_segmenter(AdaptiveVAD(margin_db=args.vad_margin_db), args.hangover_ms,
+                                   streaming=args.streaming_capture)
+
+    engine = VoiceEngine(
+        client, source, create_tts(args.tts),
+        model=args.model,
+        session_id=args.session_id,
+        tts_enabled=not args.no_tts,
+        stream=args.stream,
+        context_tokens=args.context_tokens,
+        summarize=not args.no_summary,
+        segmenter=segmenter,
+        transcribe_workers=args.transcribe_workers,
+        upload_codec=args.upload_codec
+    )
+    if args.no_tts:
+        print("🔇 Text-to-speech disabled. Say 'tts on' to enable.")
+
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        print("\n👋 Interrupted. Goodbye!")
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
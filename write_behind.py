@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+HeyChat Write-Behind Persistence
+Takes message persistence off the voice loop's critical path: ``put()``
+appends the message to a local outbox journal and returns at once, and a
+background thread writes queued messages to the database in batches, one
+transaction per batch. While one batch is being written, new messages
+queue up behind it, so a slow database gets bigger batches, not a slower
+conversation.
+
+Each message carries a per-session sequence number (stored as
+``messages.metadata.seq``). The writer inserts messages in queue order, so
+the database order follows the conversation without waiting for the clock
+to tick between messages.
+
+Outbox records (one JSON object per line):
+    {"type": "message", "session_id": "...", "seq": 3, "timestamp_str": "...",
+     "role": "user", "content": "...", "audio_file_path": null, "metadata": {...}}
+    {"type": "persisted", "session_id": "...", "seq": 3}
+                           -- the session's messages up to seq 3 are in the database
+
+Messages that were not persisted when the process stopped (crash, database
+down) are replayed from the outbox on the next start.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+
+BATCH_SIZE = 200
+# Retry a failed batch after this long, doubling up to MAX_RETRY_DELAY
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+# Start a fresh outbox once everything in it is persisted and it is this big
+COMPACT_BYTES = 256 * 1024
+
+
+class WriteBehindQueue:
+    """Asynchronous, batched message writer backed by an outbox journal"""
+
+    def __init__(self, store, path, batch_size=BATCH_SIZE, fsync=False):
+        self.store = store
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.enqueued = 0
+        self.persisted = 0
+        self.batches = 0
+        self.failures = 0
+        self.recovered = 0
+        self._pending = deque()
+        self._in_flight = False
+        self._conversations = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self._recover()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def _recover(self):
+        """Queue outbox messages that never reached the database and rewrite the outbox"""
+        messages = []
+        persisted = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    if record.get('type') == 'message':
+                        messages.append(record)
+                    elif record.get('type') == 'persisted':
+                        session_id = record['session_id']
+                        persisted[session_id] = max(persisted.get(session_id, 0), record['seq'])
+        except FileNotFoundError:
+            return
+
+        for record in messages:
+            if record['seq'] > persisted.get(record['session_id'], 0):
+                # May have been committed just before a crash; skipped if so
+                record['replayed'] = True
+                self._pending.append(record)
+        self.recovered = len(self._pending)
+
+        temp = self.path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            for record in self._pending:
+                f.write(json.dumps(record) + "\n")
+        os.replace(temp, self.path)
+
+    def _write(self, record):
+        """Append an outbox record (caller holds the lock)"""
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def put(self, session_id, seq, timestamp_str, role, content, audio_file_path=None, metadata=None):
+        """Journal a message and queue it for the database; returns immediately"""
+        record = {
+            "type": "message", "session_id": session_id, "seq": seq,
+            "timestamp_str": timestamp_str, "role": role, "content": content,
+            "audio_file_path": audio_file_path, "metadata": metadata
+        }
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Write-behind queue is closed")
+            self._write(record)
+            self._pending.append(record)
+            self.enqueued += 1
+            self._cond.notify_all()
+
+    @property
+    def pending(self):
+        """Messages accepted but not yet in the database"""
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """Wait until every queued message is persisted; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def close(self, timeout=10.0):
+        """Persist what can be persisted within ``timeout`` and stop the writer.
+
+        Returns the number of messages left in the outbox for the next start.
+        If the writer is still inside a batch when ``timeout`` runs out, the
+        outbox stays open for it to record the batch and finish.
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            if self._thread.is_alive():
+                print(f"⚠️  Flush incomplete: {len(self._pending)} messages still being saved, "
+                      f"unsaved ones are kept in {self.path}", file=sys.stderr)
+            else:
+                self._file.close()
+            return len(self._pending)
+
+    def _run(self):
+        delay = RETRY_DELAY
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    return
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+
+            try:
+                self._persist(batch)
+            except Exception as e:
+                self.failures += 1
+                if delay == RETRY_DELAY:
+                    print(f"⚠️  Could not save messages, keeping them in {self.path}: {e}", file=sys.stderr)
+                with self._cond:
+                    if self._closing:
+                        return
+                    # close() cuts the wait short for one last attempt
+                    self._cond.wait_for(lambda: self._closing, delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            delay = RETRY_DELAY
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+                self.persisted += len(batch)
+                self.batches += 1
+                last_seq = {}
+                for record in batch:
+                    last_seq[record['session_id']] = record['seq']
+                for session_id, seq in last_seq.items():
+                    self._write({"type": "persisted", "session_id": session_id, "seq": seq})
+                if not self._pending and self._file.tell() > COMPACT_BYTES:
+                    self._file.seek(0)
+                    self._file.truncate()
+                self._cond.notify_all()
+
+    def _conversation_id(self, session_id):
+        conv_id = self._conversations.get(session_id)
+        if conv_id is None:
+            conv_id = self._conversations[session_id] = self.store.get_or_create_conversation(session_id)
+        return conv_id
+
+    def _persist(self, batch):
+        rows = []
+        for record in batch:
+            metadata = dict(record['metadata'] or {}, seq=record['seq'])
+            rows.append((self._conversation_id(record['session_id']), record['timestamp_str'],
+                         record['role'], record['content'], record['audio_file_path'], None, metadata))
+        self.store.persist_messages(rows, skip_existing=any(r.get('replayed') for r in batch))